@@ -1,9 +1,11 @@
 import asyncio
 import datetime
+import itertools
 import os
 from pathlib import Path
 import subprocess
-from typing import TypeAlias, Callable, Optional
+from dataclasses import dataclass
+from typing import TypeAlias, Callable, Optional, Dict, List, Sequence, Union, Iterable, Set
 
 import httpx
 from dulwich import porcelain
@@ -11,16 +13,46 @@ from loguru import logger
 
 from gtnh_translation_compare import settings
 from gtnh_translation_compare.filetypes import FiletypeLang, Language, FiletypeGTLang, Filetype
+from gtnh_translation_compare.filetypes.lang_reparse import parse_lang, reparse_lang
 from gtnh_translation_compare.modpack.modpack import ModPack
+from gtnh_translation_compare.paratranz.adaptive_limiter import AdaptiveLimiter
+from gtnh_translation_compare.paratranz.artifact import Artifact
 from gtnh_translation_compare.paratranz.client_wrapper import ClientWrapper
 from gtnh_translation_compare.paratranz.converter import Converter
-from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache
-from gtnh_translation_compare.paratranz.types import TranslationFile
-from gtnh_translation_compare.utils.file import ensure_lf
+from gtnh_translation_compare.paratranz.file_table import FileTable
+from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache, FileExtraCache
+from gtnh_translation_compare.paratranz.target import Target, parse_targets
+from gtnh_translation_compare.paratranz.types import TranslationFile, File
+from gtnh_translation_compare.paratranz.upload_journal import UploadJournal
+from gtnh_translation_compare.source.parse_state import LangParseState
+from gtnh_translation_compare.source.source_fetcher import SourceFetcher, is_commit_sha
+from gtnh_translation_compare.utils.failures import FailurePolicy, FailureLog
+from gtnh_translation_compare.utils.pipeline import run_pipeline, task_group
 
 ParatranzFilenameFilter: TypeAlias = Callable[[str], bool]
 ParatranzToLocalPathConverter: TypeAlias = Callable[[str], Path]
 AfterToTranslationFileCallback: TypeAlias = Callable[[TranslationFile], None]
+# e.g. "zh_CN:4964,ja_JP:5678"
+Targets: TypeAlias = Union[str, Sequence[str]]
+
+
+# noinspection PyUnresolvedReferences
+@dataclass
+class TranslationDownload:
+    """
+    Which files to download from Paratranz and where to write them
+
+    Attributes:
+        filter_ (ParatranzFilenameFilter): Selects the files by their name on Paratranz
+        after_to_translation_file_callback (Optional[AfterToTranslationFileCallback]): Edits each downloaded file
+        raise_when_empty (Optional[Exception]): Raised when no file is selected
+        path_converter (Optional[ParatranzToLocalPathConverter]): Maps the relpath of a file to its path in the repo
+    """
+
+    filter_: ParatranzFilenameFilter
+    after_to_translation_file_callback: Optional[AfterToTranslationFileCallback]
+    raise_when_empty: Optional[Exception]
+    path_converter: Optional[ParatranzToLocalPathConverter]
 
 
 class Action:
@@ -28,53 +60,234 @@ class Action:
         paratranz_project_id = settings.PARATRANZ_PROJECT_ID
         paratranz_token = settings.PARATRANZ_TOKEN
 
-        self.client = ClientWrapper(
-            client=httpx.AsyncClient(
-                headers={"Authorization": paratranz_token},
-                base_url="https://paratranz.cn/api",
-                timeout=60,
-            ),
-            project_id=paratranz_project_id,
-            cache_dir=settings.PARATRANZ_CACHE_DIR,
+        # one connection pool shared by all projects
+        self.paratranz_client = httpx.AsyncClient(
+            headers={"Authorization": paratranz_token},
+            base_url="https://paratranz.cn/api",
+            timeout=60,
         )
-        self.converter = Converter(
-            client=self.client,
-            cache=ParatranzCache(settings.PARATRANZ_CACHE_DIR),
-            target_lang=settings.TARGET_LANG,
+        self._client_wrappers: Dict[int, ClientWrapper] = {}
+        self._converters: Dict[Target, Converter] = {}
+        self.client = self._get_client_wrapper(paratranz_project_id)
+        self.converter = self._get_converter(Target(settings.TARGET_LANG, paratranz_project_id))
+        self.source_fetcher = SourceFetcher(
+            client=httpx.AsyncClient(timeout=60, follow_redirects=True),
+            cache_dir=settings.SOURCE_CACHE_DIR,
         )
 
-    async def __paratranz_to_translation(
+    def _get_client_wrapper(self, project_id: int) -> ClientWrapper:
+        client_wrapper = self._client_wrappers.get(project_id)
+        if client_wrapper is None:
+            cache_dir = settings.PARATRANZ_CACHE_DIR
+            if project_id != settings.PARATRANZ_PROJECT_ID:
+                cache_dir = os.path.join(cache_dir, f"project-{project_id}")
+            client_wrapper = ClientWrapper(
+                client=self.paratranz_client,
+                project_id=project_id,
+                cache_dir=cache_dir,
+                patch_max_change_ratio=settings.PARATRANZ_PATCH_MAX_CHANGE_RATIO,
+                patch_max_changes=settings.PARATRANZ_PATCH_MAX_CHANGES,
+                strict_validation=settings.PARATRANZ_STRICT_VALIDATION,
+                endpoint_policies=settings.PARATRANZ_ENDPOINT_POLICIES,
+                limiter=AdaptiveLimiter(
+                    f"project {project_id}",
+                    initial=settings.PARATRANZ_CONCURRENCY,
+                    maximum=settings.PARATRANZ_MAX_CONCURRENCY,
+                ),
+                page_size=settings.PARATRANZ_PAGE_SIZE,
+            )
+            self._client_wrappers[project_id] = client_wrapper
+        return client_wrapper
+
+    def _log_concurrency(self) -> None:
+        for project_id, client_wrapper in self._client_wrappers.items():
+            logger.info(
+                "project {}: concurrency converged to {}, average latencies {}",
+                project_id,
+                client_wrapper.limiter.current,
+                {endpoint: round(latency, 3) for endpoint, latency in client_wrapper.limiter.average_latencies.items()},
+            )
+
+    def _get_converter(self, target: Target) -> Converter:
+        converter = self._converters.get(target)
+        if converter is None:
+            client_wrapper = self._get_client_wrapper(target.project_id)
+            converter = Converter(
+                client=client_wrapper,
+                cache=ParatranzCache(client_wrapper.cache_dir, strict_validation=settings.PARATRANZ_STRICT_VALIDATION),
+                target_lang=target.language,
+                extra_cache=FileExtraCache(os.path.join(client_wrapper.cache_dir, "extras")),
+            )
+            self._converters[target] = converter
+        return converter
+
+    def _get_target_converters(self, targets: Optional[Targets]) -> List[Converter]:
+        parsed_targets = parse_targets(targets) if targets is not None else settings.PARATRANZ_TARGETS
+        return [self._get_converter(target) for target in parsed_targets]
+
+    @staticmethod
+    def _open_upload_journals(name: str, converters: Sequence[Converter], resume: bool) -> Dict[int, UploadJournal]:
+        """
+        Open the upload journal of a command for every project, a run that does not resume starts a fresh journal.
+        """
+        journals: Dict[int, UploadJournal] = {}
+        for converter in converters:
+            client_wrapper = converter.client
+            if client_wrapper.project_id in journals:
+                continue
+            journal = UploadJournal(os.path.join(client_wrapper.cache_dir, f"upload_journal_{name}.jsonl"))
+            if not resume:
+                journal.clear()
+            journals[client_wrapper.project_id] = journal
+        return journals
+
+    @staticmethod
+    async def _upload_to_targets(
+        file: Filetype,
+        converters: Sequence[Converter],
+        journals: Dict[int, UploadJournal],
+        changed_keys: Optional[Dict[int, Set[str]]] = None,
+    ) -> None:
+        async def upload_file(converter: Converter) -> None:
+            file_changed_keys = changed_keys.get(converter.client.project_id) if changed_keys is not None else None
+            paratranz_file = await converter.to_paratranz_file(file, file_changed_keys)
+            await converter.client.upload_file(paratranz_file, journals.get(converter.client.project_id))
+
+        # the en_US file is scanned and parsed once, then uploaded to every language concurrently
+        async with task_group() as tg:
+            for converter in converters:
+                tg.create_task(upload_file(converter))
+
+    async def _upload_files_to_targets(
         self,
-        filter_: ParatranzFilenameFilter,
-        after_to_translation_file_callback: Optional[AfterToTranslationFileCallback],
-        raise_when_empty: Optional[Exception],
-        message: str,
-        repo_path: Optional[str] = None,
-        subdirectory: Optional[Path] = None,
-        path_converter: Optional[ParatranzToLocalPathConverter] = None,
-        issue: Optional[str] = None,
+        name: str,
+        files: Iterable[Filetype],
+        converters: Sequence[Converter],
+        journals: Dict[int, UploadJournal],
+        failure_policy: Optional[str],
+        retry_failed: bool,
+        resume: bool,
+        workers: int,
+        queue_size: int,
+        memory_budget: Optional[int] = None,
     ) -> None:
+        """
+        Upload files to every target through a pipeline, following the failure policy.
+
+        Args:
+            name: The command name, which names the failure log
+            files: The files to upload
+            converters: The converters of the targets
+            journals: The upload journals of the projects
+            failure_policy: `fail_fast` or `continue`, `settings.UPLOAD_FAILURE_POLICY` if not given
+            retry_failed: Upload only the files which failed in the last run, a run which stopped early also needs
+                `resume` and then uploads every file not in the journals
+            resume: Whether the journals of the last run were kept
+            workers: The number of files uploaded at a time
+            queue_size: The maximum number of files waiting for a worker
+            memory_budget: The maximum estimated memory of the files waiting, in bytes
+        """
+        policy = settings.UPLOAD_FAILURE_POLICY if failure_policy is None else FailurePolicy.from_str(failure_policy)
+        failure_log_path = os.path.join(settings.PARATRANZ_CACHE_DIR, f"failed_uploads_{name}.json")
+        if retry_failed:
+            last_failure_log = FailureLog.read(failure_log_path)
+            if last_failure_log is None:
+                logger.info("{}: no failed files to retry", name)
+                return
+            if last_failure_log.complete:
+                retry_files = set(last_failure_log.files)
+                logger.info("{}: retrying {} failed files", name, len(retry_files))
+                files = (f for f in files if f.relpath in retry_files)
+            elif resume:
+                logger.info("{}: the last run stopped early, uploading every file not in the journals", name)
+            else:
+                raise ValueError(
+                    f"{name}: the last run stopped early and {failure_log_path} does not list the files it did not "
+                    f"reach, retry with --resume"
+                )
+        failure_log = FailureLog(failure_log_path)
+
+        async def upload_file(file: Filetype) -> None:
+            try:
+                await self._upload_to_targets(file, converters, journals)
+            except asyncio.CancelledError:
+                failure_log.mark_pending(file.relpath)
+                raise
+            except Exception as e:
+                failure_log.record(file.relpath, e)
+                if policy == FailurePolicy.fail_fast:
+                    raise
+                logger.error("{}: failed to upload {}, continuing: {!r}", name, file.relpath, e)
+
+        try:
+            await run_pipeline(
+                files,
+                upload_file,
+                workers=workers,
+                queue_size=queue_size,
+                weigh=estimate_memory,
+                memory_budget=memory_budget,
+            )
+        except BaseException:
+            # the files not reached yet are unknown
+            failure_log.complete = False
+            raise
+        finally:
+            failure_log.write()
+            self._log_concurrency()
+        if failure_log.failed:
+            raise RuntimeError(
+                f"{name}: {len(failure_log.failed)} files failed to upload, "
+                f"see {failure_log_path} and retry them with --retry_failed"
+            )
+
+    async def _download_artifact(self) -> Artifact:
+        """
+        Download the project artifact, to build every translation file from one download instead of a request per
+        string page.
+        """
+        artifact_path = os.path.join(self.client.cache_dir, "artifact.zip")
+        # read before downloading, an export made in between only makes more files look outdated
+        artifact_info = await self.client.get_artifact_info()
+        await self.client.download_artifact(artifact_path)
+        return Artifact(artifact_path, created_at=artifact_info.created_at)
+
+    async def _to_translation_files(
+        self,
+        download: TranslationDownload,
+        all_files: FileTable,
+        artifact: Optional[Artifact],
+    ) -> List[TranslationFile]:
         translation_files: list[TranslationFile] = []
-        translation_filepaths: list[str] = []
-        all_files = await self.client.get_all_files()
-        for f in all_files:
-            if filter_(f.name):
+        for f in all_files.filter_by_name(download.filter_):
+            if artifact is not None:
+                translation_file = await self.converter.to_translation_file_from_artifact(f, artifact)
+            else:
                 translation_file = await self.converter.to_translation_file(f)
-                if after_to_translation_file_callback is not None:
-                    after_to_translation_file_callback(translation_file)
-                translation_files.append(translation_file)
+            if download.after_to_translation_file_callback is not None:
+                download.after_to_translation_file_callback(translation_file)
+            translation_files.append(translation_file)
 
         if len(translation_files) == 0:
-            if raise_when_empty is not None:
-                raise raise_when_empty
-
+            if download.raise_when_empty is not None:
+                raise download.raise_when_empty
+        return translation_files
+
+    @staticmethod
+    def _write_translation_files(
+        translation_files: List[TranslationFile],
+        repo_path: Optional[str],
+        subdirectory: Optional[Path],
+        path_converter: Optional[ParatranzToLocalPathConverter],
+    ) -> List[str]:
+        translation_filepaths: list[str] = []
         if repo_path is None:
             for translation_file in translation_files:
                 print("#" * 80)
                 print(f"# {translation_file.relpath}")
                 print("#" * 80)
                 print(translation_file.content, end="\n\n")
-            return
+            return translation_filepaths
 
         for translation_file in translation_files:
             base_path = os.path.join(repo_path, subdirectory) if subdirectory is not None else repo_path
@@ -82,6 +295,39 @@ class Action:
             translation_filepath = os.path.abspath(os.path.join(base_path, translation_file_relpath))
             translation_filepaths.append(translation_filepath)
             write_file(translation_filepath, translation_file.content)
+        return translation_filepaths
+
+    async def __paratranz_to_translation(
+        self,
+        downloads: Sequence[TranslationDownload],
+        message: str,
+        repo_path: Optional[str] = None,
+        subdirectory: Optional[Path] = None,
+        issue: Optional[str] = None,
+        bulk: Optional[bool] = None,
+    ) -> None:
+        # one file listing (and artifact) for all downloads, which are converted concurrently
+        all_files: FileTable = await self.client.get_all_files()
+        if bulk is None:
+            bulk = settings.PARATRANZ_BULK_DOWNLOAD
+        artifact = await self._download_artifact() if bulk else None
+        try:
+            async with task_group() as tg:
+                tasks = [
+                    tg.create_task(self._to_translation_files(download, all_files, artifact)) for download in downloads
+                ]
+            results = [task.result() for task in tasks]
+        finally:
+            if artifact is not None:
+                artifact.close()
+
+        translation_filepaths: list[str] = []
+        for download, translation_files in zip(downloads, results):
+            translation_filepaths.extend(
+                self._write_translation_files(translation_files, repo_path, subdirectory, download.path_converter)
+            )
+        if repo_path is None:
+            return
 
         git_commit(
             repo_path,
@@ -97,35 +343,33 @@ class Action:
     ############################################################################
 
     # Quest Book
+    @staticmethod
+    def _quest_book_download() -> TranslationDownload:
+        filter_: ParatranzFilenameFilter = lambda name: name == settings.DEFAULT_QUESTS_LANG_TARGET_REL_PATH + ".json"
+        return TranslationDownload(filter_, None, ValueError("No quest book file found"), None)
+
     def paratranz_to_quest_book(
         self,
         repo_path: Optional[str] = None,
         subdirectory: Optional[str] = None,
         issue: Optional[str] = None,
         commit_message: str = "[自动化] 更新 任务书",
+        bulk: Optional[bool] = None,
     ) -> None:
-        filter_: ParatranzFilenameFilter = lambda name: name == settings.DEFAULT_QUESTS_LANG_TARGET_REL_PATH + ".json"
         asyncio.run(
             self.__paratranz_to_translation(
-                filter_,
-                None,
-                ValueError("No quest book file found"),
+                [self._quest_book_download()],
                 commit_message,
                 repo_path,
                 subdirectory if subdirectory is not None else None,
-                None,
                 issue,
+                bulk,
             )
         )
 
     # Lang + Zs
-    def paratranz_to_lang_and_zs(
-        self,
-        repo_path: Optional[str] = None,
-        subdirectory: Optional[str] = None,
-        issue: Optional[str] = None,
-        commit_message: str = "[自动化] 更新 语言文件 + 脚本",
-    ) -> None:
+    @staticmethod
+    def _lang_and_zs_download() -> TranslationDownload:
         def filter_(name: str) -> bool:
             return any(
                 [
@@ -138,20 +382,42 @@ class Action:
         # Existing projects use resource folder on PT
         path_converter_: ParatranzToLocalPathConverter = lambda path: Path('config/txloader/forceload') / os.path.relpath(path, Path('resources'))
 
+        return TranslationDownload(filter_, None, ValueError("No lang or zs file found"), path_converter_)
+
+    def paratranz_to_lang_and_zs(
+        self,
+        repo_path: Optional[str] = None,
+        subdirectory: Optional[str] = None,
+        issue: Optional[str] = None,
+        commit_message: str = "[自动化] 更新 语言文件 + 脚本",
+        bulk: Optional[bool] = None,
+    ) -> None:
         asyncio.run(
             self.__paratranz_to_translation(
-                filter_,
-                None,
-                ValueError("No lang or zs file found"),
+                [self._lang_and_zs_download()],
                 commit_message,
                 repo_path,
                 subdirectory if subdirectory is not None else None,
-                path_converter_,
                 issue,
+                bulk,
             )
         )
 
     # Gt Lang
+    @staticmethod
+    def _gt_lang_download(lang: str) -> TranslationDownload:
+        filter_: ParatranzFilenameFilter = lambda name: name == settings.GT_LANG_TARGET_REL_PATH + ".json"
+
+        def after_to_translation_file_callback(translation_file: TranslationFile) -> None:
+            translation_file.content = translation_file.content.replace(
+                "B:UseThisFileAsLanguageFile=false", "B:UseThisFileAsLanguageFile=true"
+            )
+        path_converter_: ParatranzToLocalPathConverter = lambda path: Path(f"GregTech_{lang}.lang")
+
+        return TranslationDownload(
+            filter_, after_to_translation_file_callback, ValueError("No gt lang file found"), path_converter_
+        )
+
     def paratranz_to_gt_lang(
         self,
         repo_path: Optional[str] = None,
@@ -159,85 +425,189 @@ class Action:
         lang: str = "en_US",
         issue: Optional[str] = None,
         commit_message: str = "[自动化] 更新 GT 语言文件",
+        bulk: Optional[bool] = None,
     ) -> None:
-        filter_: ParatranzFilenameFilter = lambda name: name == settings.GT_LANG_TARGET_REL_PATH + ".json"
-
-        def after_to_translation_file_callback(translation_file: TranslationFile) -> None:
-            translation_file.content = translation_file.content.replace(
-                "B:UseThisFileAsLanguageFile=false", "B:UseThisFileAsLanguageFile=true"
+        asyncio.run(
+            self.__paratranz_to_translation(
+                [self._gt_lang_download(lang)],
+                commit_message,
+                repo_path,
+                subdirectory if subdirectory is not None else None,
+                issue,
+                bulk,
             )
-        path_converter_: ParatranzToLocalPathConverter = lambda path: Path(f"GregTech_{lang}.lang")
+        )
 
+    # All of the above
+    def paratranz_to_all(
+        self,
+        repo_path: Optional[str] = None,
+        subdirectory: Optional[str] = None,
+        lang: str = "en_US",
+        issue: Optional[str] = None,
+        commit_message: str = "[自动化] 更新 任务书 + 语言文件 + 脚本 + GT 语言文件",
+        bulk: Optional[bool] = None,
+    ) -> None:
+        """
+        Download the quest book, the lang and zs files and the GT lang file in one run and one commit.
+        """
         asyncio.run(
             self.__paratranz_to_translation(
-                filter_,
-                after_to_translation_file_callback,
-                ValueError("No gt lang file found"),
+                [self._quest_book_download(), self._lang_and_zs_download(), self._gt_lang_download(lang)],
                 commit_message,
                 repo_path,
-                subdirectory if subdirectory is not None else None,
-                path_converter_,
+                Path(subdirectory) if subdirectory is not None else None,
                 issue,
+                bulk,
             )
         )
 
+    # Cache warm-up
+    async def _prefetch(self, concurrency: int = 2) -> None:
+        all_files: FileTable = await self.client.get_all_files()
+        stale_files = [f for f in all_files if not self.converter.cache.has(f)]
+        logger.info("prefetch: {} of {} files are stale", len(stale_files), len(all_files))
+        # the mirror of the files to warm up is refreshed first, so the translation files below are built from it
+        await self.client.refresh_string_mirror(stale_files, concurrency)
+
+        # keep the concurrency low, so that the warm-up does not compete with user-triggered actions
+        sem = asyncio.Semaphore(concurrency)
+
+        async def warm_up(f: File) -> None:
+            async with sem:
+                await self.converter.to_translation_file(f)
+
+        # noinspection PyTypeChecker
+        results = await asyncio.gather(*[warm_up(f) for f in stale_files], return_exceptions=True)
+        for f, result in zip(stale_files, results):
+            if isinstance(result, BaseException):
+                logger.warning("prefetch: failed to warm up {}: {}", f.name, result)
+
+    def prefetch(self, concurrency: int = 2) -> None:
+        asyncio.run(self._prefetch(concurrency))
+
     ############################################################################
     # To Paratranz
     ############################################################################
 
     # Quest Book
-    async def _quest_book_to_paratranz(self, commit_sha: Optional[str] = None) -> None:
+    async def _quest_book_to_paratranz(
+        self,
+        commit_sha: Optional[str] = None,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+    ) -> None:
+        converters = self._get_target_converters(targets)
+        journals = self._open_upload_journals("quest_book", converters, resume)
         if commit_sha is None or commit_sha == "":
             commit_sha = "master"
         qb_lang_file_url = (
             f"https://raw.githubusercontent.com"
             f"/{settings.GTNH_REPO}/{commit_sha}/{settings.DEFAULT_QUESTS_LANG_TEMPLATE_REL_PATH}"
         )
-        res = httpx.get(url=qb_lang_file_url, timeout=60)
-        if res.status_code != 200:
-            raise ValueError(f"Failed to get quest book file from {qb_lang_file_url}")
+        qb_lang_file_content = await self.source_fetcher.fetch(qb_lang_file_url, immutable=is_commit_sha(commit_sha))
+
+        # reparse only the lines changed since the last uploaded version
+        state_path = os.path.join(settings.SOURCE_CACHE_DIR, "quest_book_parse_state.bin")
+        state = LangParseState.read(state_path)
+        changed_keys: Dict[int, Set[str]] = {}
+        if state is not None:
+            result = reparse_lang(state.lines, qb_lang_file_content)
+            assert result.changed_keys is not None
+            logger.info("quest book: {} keys changed since {}", len(result.changed_keys), state.commit_sha)
+            # the projects the last version was not uploaded to compare all strings
+            for converter in converters:
+                if converter.client.project_id in state.project_ids:
+                    changed_keys[converter.client.project_id] = result.changed_keys
+        else:
+            result = parse_lang(qb_lang_file_content)
         qb_lang_file = FiletypeLang(
-            relpath=settings.DEFAULT_QUESTS_LANG_EN_US_REL_PATH, content=res.text, language=Language.en_US
+            relpath=settings.DEFAULT_QUESTS_LANG_EN_US_REL_PATH,
+            content=qb_lang_file_content,
+            language=Language.en_US,
+            properties=result.properties,
         )
-        qb_paratranz_file = await self.converter.to_paratranz_file(qb_lang_file)
-        await self.client.upload_file(qb_paratranz_file)
+        await self._upload_to_targets(qb_lang_file, converters, journals, changed_keys)
+        project_ids = [converter.client.project_id for converter in converters]
+        LangParseState(commit_sha, result.lines, project_ids).write(state_path)
 
-    def quest_book_to_paratranz(self, commit_sha: Optional[str] = None) -> None:
-        asyncio.run(self._quest_book_to_paratranz(commit_sha))
+    def quest_book_to_paratranz(
+        self,
+        commit_sha: Optional[str] = None,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+    ) -> None:
+        asyncio.run(self._quest_book_to_paratranz(commit_sha, targets, resume))
 
     # Lang + Zs
-    async def _lang_and_zs_to_paratranz(self, modpack_path: str) -> None:
-        modpack = ModPack(Path(modpack_path))
-        # concurrency number
-        sem = asyncio.Semaphore(10)
-
-        async def upload_file(_sem: asyncio.Semaphore, lang_file: Filetype) -> None:
-            async with _sem:
-                paratranz_file = await self.converter.to_paratranz_file(lang_file)
-                await self.client.upload_file(paratranz_file)
-
-        tasks = [upload_file(sem, lang_file) for lang_file in modpack.lang_files]
-        tasks += [upload_file(sem, script_file) for script_file in modpack.script_files]
-
-        # noinspection PyTypeChecker
-        await asyncio.gather(*tasks)
+    async def _lang_and_zs_to_paratranz(
+        self,
+        modpack_path: str,
+        low_memory: Optional[bool] = None,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+        failure_policy: Optional[str] = None,
+        retry_failed: bool = False,
+    ) -> None:
+        converters = self._get_target_converters(targets)
+        journals = self._open_upload_journals("lang_and_zs", converters, resume)
+        low_memory = settings.LOW_MEMORY if low_memory is None else low_memory
+        modpack = ModPack(modpack_path, low_memory=low_memory)
+
+        try:
+            # jars are scanned while the files found so far are being uploaded
+            await self._upload_files_to_targets(
+                "lang_and_zs",
+                itertools.chain(modpack.iter_lang_files(), modpack.iter_script_files()),
+                converters,
+                journals,
+                failure_policy,
+                retry_failed,
+                resume,
+                # concurrency number, the requests in flight adapt below this
+                workers=1 if low_memory else settings.PARATRANZ_MAX_CONCURRENCY,
+                queue_size=1 if low_memory else 20,
+                memory_budget=settings.MEMORY_BUDGET_MB * 1024 * 1024 if low_memory else None,
+            )
+        finally:
+            modpack.close()
 
-    def lang_and_zs_to_paratranz(self, modpack_path: str) -> None:
-        asyncio.run(self._lang_and_zs_to_paratranz(modpack_path))
+    def lang_and_zs_to_paratranz(
+        self,
+        modpack_path: str,
+        low_memory: Optional[bool] = None,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+        failure_policy: Optional[str] = None,
+        retry_failed: bool = False,
+    ) -> None:
+        asyncio.run(
+            self._lang_and_zs_to_paratranz(modpack_path, low_memory, targets, resume, failure_policy, retry_failed)
+        )
 
     # Gt Lang
-    async def _gt_lang_to_paratranz(self, gt_lang_url: str) -> None:
-        res = httpx.get(url=gt_lang_url, timeout=60)
-        gt_lang_file = FiletypeGTLang(
+    async def _gt_lang_to_paratranz(
+        self,
+        gt_lang_url: str,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+    ) -> None:
+        converters = self._get_target_converters(targets)
+        journals = self._open_upload_journals("gt_lang", converters, resume)
+        gt_lang_file = await FiletypeGTLang.from_stream(
             relpath=settings.GT_LANG_TARGET_REL_PATH,
-            content=ensure_lf(res.text),
+            chunks=self.source_fetcher.stream(gt_lang_url),
             language=Language.en_US,
         )
-        gt_paratranz_file = await self.converter.to_paratranz_file(gt_lang_file)
-        await self.client.upload_file(gt_paratranz_file)
+        await self._upload_to_targets(gt_lang_file, converters, journals)
 
-    def gt_lang_to_paratranz(self, gt_lang_url: str) -> None:
-        asyncio.run(self._gt_lang_to_paratranz(gt_lang_url))
+    def gt_lang_to_paratranz(
+        self,
+        gt_lang_url: str,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+    ) -> None:
+        asyncio.run(self._gt_lang_to_paratranz(gt_lang_url, targets, resume))
 
     async def _save_nightly_modpack_history(
             self,
@@ -248,21 +618,22 @@ class Action:
             return os.path.join(repo_path, path) if repo_path is not None else path
 
         paths_to_commit: list[str] = []
-        modpack = ModPack(Path(modpack_path))
-        for lang_file in modpack.lang_files:
-            relpath = get_relpath(lang_file.get_en_us_relpath())
-            write_file(os.path.abspath(relpath), lang_file.content)
-            paths_to_commit.append(relpath)
+        modpack = ModPack(modpack_path, low_memory=settings.LOW_MEMORY)
+        try:
+            for lang_file in modpack.iter_lang_files():
+                relpath = get_relpath(lang_file.get_en_us_relpath())
+                write_file(os.path.abspath(relpath), lang_file.content)
+                paths_to_commit.append(relpath)
+        finally:
+            modpack.close()
 
         qb_lang_file_url = (
             f"https://raw.githubusercontent.com"
             f"/{settings.GTNH_REPO}/master/{settings.DEFAULT_QUESTS_LANG_TEMPLATE_REL_PATH}"
         )
-        res = httpx.get(url=qb_lang_file_url, timeout=60)
-        if res.status_code != 200:
-            raise ValueError(f"Failed to get quest book file from {qb_lang_file_url}")
+        qb_lang_file_content = await self.source_fetcher.fetch(qb_lang_file_url)
         relpath = get_relpath(settings.DEFAULT_QUESTS_LANG_EN_US_REL_PATH)
-        write_file(os.path.abspath(relpath), res.text)
+        write_file(os.path.abspath(relpath), qb_lang_file_content)
         paths_to_commit.append(relpath)
 
         git_commit(
@@ -281,7 +652,16 @@ class Action:
     ) -> None:
         asyncio.run(self._save_nightly_modpack_history(modpack_path, repo_path))
 
-    async def _sync_to_paratranz_conditional(self, repo_path: Optional[str] = None,) -> None:
+    async def _sync_to_paratranz_conditional(
+        self,
+        repo_path: Optional[str] = None,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+        failure_policy: Optional[str] = None,
+        retry_failed: bool = False,
+    ) -> None:
+        converters = self._get_target_converters(targets)
+        journals = self._open_upload_journals("sync_conditional", converters, resume)
         if repo_path is not None:
             os.chdir(repo_path)
 
@@ -297,34 +677,40 @@ class Action:
             qb_lang_file = FiletypeLang(
                 relpath=settings.DEFAULT_QUESTS_LANG_EN_US_REL_PATH, content=content, language=Language.en_US
             )
-            qb_paratranz_file = await self.converter.to_paratranz_file(qb_lang_file)
-            await self.client.upload_file(qb_paratranz_file)
+            await self._upload_to_targets(qb_lang_file, converters, journals)
             changed_files.remove(settings.DEFAULT_QUESTS_LANG_EN_US_REL_PATH)
 
         lang_files = []
         for file_path in changed_files:
-            with open(settings.DEFAULT_QUESTS_LANG_EN_US_REL_PATH, 'r', encoding='UTF-8') as f:
+            with open(file_path, 'r', encoding='UTF-8') as f:
                 content = f.read()
             lang_files.append(FiletypeLang(file_path, content))
 
-        # concurrency number
-        sem = asyncio.Semaphore(10)
-
-        async def upload_file(_sem: asyncio.Semaphore, lang_file: Filetype) -> None:
-            async with _sem:
-                paratranz_file = await self.converter.to_paratranz_file(lang_file)
-                await self.client.upload_file(paratranz_file)
-
-        tasks = [upload_file(sem, lang_file) for lang_file in lang_files]
-
-        # noinspection PyTypeChecker
-        await asyncio.gather(*tasks)
+        await self._upload_files_to_targets(
+            "sync_conditional",
+            lang_files,
+            converters,
+            journals,
+            failure_policy,
+            retry_failed,
+            resume,
+            # concurrency number, the requests in flight adapt below this
+            workers=settings.PARATRANZ_MAX_CONCURRENCY,
+            queue_size=settings.PARATRANZ_MAX_CONCURRENCY,
+        )
 
         if repo_path is not None:
             os.chdir('..')
 
-    def sync_to_paratranz_conditional(self, repo_path: Optional[str] = None,) -> None:
-        asyncio.run(self._sync_to_paratranz_conditional(repo_path))
+    def sync_to_paratranz_conditional(
+        self,
+        repo_path: Optional[str] = None,
+        targets: Optional[Targets] = None,
+        resume: bool = False,
+        failure_policy: Optional[str] = None,
+        retry_failed: bool = False,
+    ) -> None:
+        asyncio.run(self._sync_to_paratranz_conditional(repo_path, targets, resume, failure_policy, retry_failed))
 
 
 def git_commit(
@@ -346,6 +732,11 @@ def git_commit(
     )
 
 
+def estimate_memory(file: Filetype) -> int:
+    # the content, its parsed properties and the upload payload built from them
+    return len(file.content) * 8
+
+
 def write_file(filepath: str, content: str) -> None:
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     with open(filepath, "w") as fp:
@@ -1,16 +1,49 @@
-from typing import Dict
+from typing import Dict, Optional, AsyncIterable, List
 
 from gtnh_translation_compare.filetypes.filetype import Filetype
 from gtnh_translation_compare.filetypes.language import Language
 from gtnh_translation_compare.filetypes.property import Property
-from gtnh_translation_compare.utils.line_iterator import line_iterator
+from gtnh_translation_compare.utils.line_iterator import line_iterator, async_line_iterator
 
 
 class FiletypeGTLang(Filetype):
-    def __init__(self, relpath: str, content: str, language: Language = Language.en_US):
+    def __init__(
+        self,
+        relpath: str,
+        content: str,
+        language: Language = Language.en_US,
+        properties: Optional[Dict[str, Property]] = None,
+    ):
         self._relpath = relpath
         self._content = content
         self._language = language
+        self._properties = properties
+
+    @classmethod
+    async def from_stream(
+        cls, relpath: str, chunks: AsyncIterable[str], language: Language = Language.en_US
+    ) -> "FiletypeGTLang":
+        """
+        Parse a GT lang file while its content is still arriving, line breaks are normalized to LF on the way.
+
+        Args:
+            relpath: The relative path of the file
+            chunks: The chunks of the content
+            language: The language of the file
+
+        Returns:
+            The GT lang file with its properties already parsed
+        """
+        lines: List[str] = []
+        properties: Dict[str, Property] = {}
+        parser = _LanguagefileParser()
+        async for _, line, start, end in async_line_iterator(chunks):
+            lines.append(line)
+            if not parser.finished:
+                p = parser.feed(line, end)
+                if p is not None:
+                    properties[p.key] = p
+        return cls(relpath, "\n".join(lines), language, properties)
 
     def _get_relpath(self) -> str:
         return self._relpath
@@ -19,26 +52,16 @@ class FiletypeGTLang(Filetype):
         return self._content
 
     def _get_properties(self, content: str) -> Dict[str, Property]:
+        if self._properties is not None:
+            return self._properties
         properties: Dict[str, Property] = {}
-        in_languagefile_category = False
+        parser = _LanguagefileParser()
         for _, line, start, end in line_iterator(content):
-            if not in_languagefile_category:
-                if line.startswith("languagefile {"):
-                    in_languagefile_category = True
-                continue
-
-            # in_languagefile_category == True
-            if line.startswith("}"):
+            p = parser.feed(line, end)
+            if parser.finished:
                 break
-            # noinspection DuplicatedCode
-            split = line.split("=", 1)
-            if len(split) != 2:
-                continue
-            key = split[0]
-            s_key = f"gt-lang|{key}"
-            value = split[1]
-            full = line
-            properties[s_key] = Property(key=s_key, value=value, full=full, start=end - len(value), end=end)
+            if p is not None:
+                properties[p.key] = p
         return properties
 
     def get_en_us_relpath(self) -> str:
@@ -52,3 +75,33 @@ class FiletypeGTLang(Filetype):
         if target_language == Language.en_US:
             return self.get_en_us_relpath()
         return self.get_en_us_relpath().replace("GregTech_US", "GregTech")
+
+
+class _LanguagefileParser:
+    """
+    Picks the properties of the `languagefile { ... }` category out of the lines fed to it one by one
+    """
+
+    def __init__(self) -> None:
+        self.in_languagefile_category = False
+        self.finished = False
+
+    def feed(self, line: str, end: int) -> Optional[Property]:
+        if not self.in_languagefile_category:
+            if line.startswith("languagefile {"):
+                self.in_languagefile_category = True
+            return None
+
+        # in_languagefile_category == True
+        if line.startswith("}"):
+            self.finished = True
+            return None
+        # noinspection DuplicatedCode
+        split = line.split("=", 1)
+        if len(split) != 2:
+            return None
+        key = split[0]
+        s_key = f"gt-lang|{key}"
+        value = split[1]
+        full = line
+        return Property(key=s_key, value=value, full=full, start=end - len(value), end=end)
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 
 from gtnh_translation_compare.filetypes.filetype import Filetype
 from gtnh_translation_compare.filetypes.language import Language
@@ -6,11 +6,40 @@ from gtnh_translation_compare.filetypes.property import Property
 from gtnh_translation_compare.utils.line_iterator import line_iterator
 
 
+def parse_lang_line(line: str, end: int) -> Optional[Property]:
+    """
+    Parse one line of a lang file.
+
+    Args:
+        line: The line without its line break
+        end: The end index of the line in the file
+
+    Returns:
+        The property of the line, None for comments and lines without `=`
+    """
+    if line.startswith("#"):
+        return None
+    split = line.split("=", 1)
+    if len(split) != 2:
+        return None
+    key = split[0]
+    s_key = f"lang|{key}"
+    value = split[1]
+    return Property(key=s_key, value=value, full=line, start=end - len(value), end=end)
+
+
 class FiletypeLang(Filetype):
-    def __init__(self, relpath: str, content: str, language: Language = Language.en_US):
+    def __init__(
+        self,
+        relpath: str,
+        content: str,
+        language: Language = Language.en_US,
+        properties: Optional[Dict[str, Property]] = None,
+    ):
         self._relpath = relpath
         self._content = content
         self._language = language
+        self._properties = properties
 
     def _get_relpath(self) -> str:
         return self._relpath
@@ -19,19 +48,13 @@ class FiletypeLang(Filetype):
         return self._content
 
     def _get_properties(self, content: str) -> Dict[str, Property]:
+        if self._properties is not None:
+            return self._properties
         properties: Dict[str, Property] = {}
         for _, line, start, end in line_iterator(content):
-            if line.startswith("#"):
-                continue
-            # noinspection DuplicatedCode
-            split = line.split("=", 1)
-            if len(split) != 2:
-                continue
-            key = split[0]
-            s_key = f"lang|{key}"
-            value = split[1]
-            full = line
-            properties[s_key] = Property(key=s_key, value=value, full=full, start=end - len(value), end=end)
+            p = parse_lang_line(line, end)
+            if p is not None:
+                properties[p.key] = p
         return properties
 
     def get_en_us_relpath(self) -> str:
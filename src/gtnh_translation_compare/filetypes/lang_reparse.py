@@ -0,0 +1,154 @@
+import operator
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Set, List, Optional
+
+from gtnh_translation_compare.filetypes.filetype_lang import parse_lang_line
+from gtnh_translation_compare.filetypes.property import Property
+
+
+# noinspection PyUnresolvedReferences
+@dataclass
+class LangLines:
+    """
+    The lines of a lang file with the parse result of each line, what a later version is reparsed against
+
+    Attributes:
+        lines (List[str]): The lines without their line breaks
+        keys (List[Optional[str]]): The property key of each line, None for comments and lines without `=`
+        value_starts (List[int]): Where the value starts in each line, -1 for lines without a property
+    """
+
+    lines: List[str]
+    keys: List[Optional[str]]
+    value_starts: List[int]
+
+
+# noinspection PyUnresolvedReferences
+@dataclass
+class LangReparse:
+    """
+    The result of parsing a lang file, possibly against a previous version
+
+    Attributes:
+        properties (Dict[str, Property]): The properties of the file, equal to `FiletypeLang.properties`
+        lines (LangLines): The lines of the file, to reparse the next version against
+        changed_keys (Optional[Set[str]]): The keys added, removed, or whose line changed since the previous version,
+            None without a previous version
+    """
+
+    properties: Dict[str, Property]
+    lines: LangLines
+    changed_keys: Optional[Set[str]]
+
+
+def parse_lang(content: str) -> LangReparse:
+    """
+    Parse a lang file in full, the same as `FiletypeLang`, keeping the lines to reparse the next version against.
+
+    Args:
+        content: The content, with LF line breaks
+    """
+    lines = content.splitlines()
+    keys: List[Optional[str]] = []
+    value_starts: List[int] = []
+    properties: Dict[str, Property] = {}
+    # same offsets as `line_iterator`: one character per line break
+    start = 0
+    for line in lines:
+        end = start + len(line)
+        p = parse_lang_line(line, end)
+        if p is None:
+            keys.append(None)
+            value_starts.append(-1)
+        else:
+            keys.append(p.key)
+            value_starts.append(p.start - start)
+            properties[p.key] = p
+        start = end + 1
+    return LangReparse(properties=properties, lines=LangLines(lines, keys, value_starts), changed_keys=None)
+
+
+def reparse_lang(old: LangLines, content: str) -> LangReparse:
+    """
+    Parse a new version of a lang file, reusing the parsed lines of the previous version.
+
+    The common prefix and suffix of the versions keep their parse results, only shifted to the new offsets. The lines
+    between them, the changed hunk, are looked up by their text among the old lines of the hunk, so that moved lines
+    are reused as well, and only the lines not found are parsed. This takes linear time.
+
+    Args:
+        old: The lines of the previous version
+        content: The new version, with LF line breaks
+
+    Returns:
+        The properties of the new version, equal to a full parse, and the keys changed since the previous version
+    """
+    new_lines = content.splitlines()
+    old_count, new_count = len(old.lines), len(new_lines)
+    prefix = 0
+    max_common = min(old_count, new_count)
+    while prefix < max_common and old.lines[prefix] == new_lines[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < max_common - prefix and old.lines[old_count - 1 - suffix] == new_lines[new_count - 1 - suffix]:
+        suffix += 1
+    old_hunk = old.lines[prefix : old_count - suffix]
+    new_hunk = new_lines[prefix : new_count - suffix]
+
+    # the old line index of each line of the hunk, -1 for a line to be parsed
+    if len(old_hunk) == len(new_hunk):
+        # lines changed in place, e.g. edited texts, are compared side by side
+        matches = [i if same else -1 for i, same in enumerate(map(operator.eq, old_hunk, new_hunk), prefix)]
+    else:
+        # lines were added or removed, the lines are looked up by their text, hashed by the dict
+        old_hunk_index = {line: i for i, line in enumerate(old_hunk, prefix)}
+        matches = [old_hunk_index.get(line, -1) for line in new_hunk]
+    hunk_keys = [old.keys[i] if i >= 0 else None for i in matches]
+    hunk_value_starts = [old.value_starts[i] if i >= 0 else -1 for i in matches]
+    # the keys of the lines added or removed, the text of a line also decides its key
+    touched_keys: Set[str] = set()
+    for j in [j for j, i in enumerate(matches) if i < 0]:
+        p = parse_lang_line(new_hunk[j], len(new_hunk[j]))
+        if p is not None:
+            hunk_keys[j] = p.key
+            hunk_value_starts[j] = p.start
+            touched_keys.add(p.key)
+    matched = set(matches)
+    touched_keys.update(
+        k for i, k in enumerate(old.keys[prefix : old_count - suffix], prefix) if k is not None and i not in matched
+    )
+
+    keys = old.keys[:prefix] + hunk_keys + old.keys[old_count - suffix :]
+    value_starts = old.value_starts[:prefix] + hunk_value_starts + old.value_starts[old_count - suffix :]
+    properties: Dict[str, Property] = {}
+    start = 0
+    for line, key, value_start in zip(new_lines, keys, value_starts):
+        end = start + len(line)
+        if key is not None:
+            properties[key] = Property(key, line[value_start:], line, start + value_start, end)
+        start = end + 1
+
+    if len(properties) != len(keys) - keys.count(None):
+        # lines of a duplicated key may have been reordered, which changes the line that wins
+        touched_keys.update(k for k, count in Counter(keys).items() if k is not None and count > 1)
+    return LangReparse(
+        properties=properties,
+        lines=LangLines(new_lines, keys, value_starts),
+        changed_keys=_changed_keys(old, properties, touched_keys),
+    )
+
+
+def _changed_keys(old: LangLines, properties: Dict[str, Property], touched_keys: Set[str]) -> Set[str]:
+    # the line of a key is the last one, as in a full parse
+    old_lines: Dict[str, str] = {}
+    if touched_keys:
+        for line, key in zip(old.lines, old.keys):
+            if key in touched_keys:
+                old_lines[key] = line
+    changed_keys = set()
+    for k in touched_keys:
+        new = properties.get(k)
+        if new is None or old_lines.get(k) != new.full:
+            changed_keys.add(k)
+    return changed_keys
@@ -0,0 +1,136 @@
+import io
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List
+
+import httpx
+from loguru import logger
+
+_CONTENT_RANGE_TOTAL = re.compile(r"/(\d+)$")
+
+
+class HttpRangeFile(io.RawIOBase):
+    """
+    A read-only, seekable file over a remote file, read with HTTP Range requests.
+
+    The file is read in blocks, the blocks of one read are fetched in parallel and the most recently used ones are
+    kept in memory, so the small reads of a zip reader (end of central directory, central directory, local headers)
+    hit the same blocks.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        client: Optional[httpx.Client] = None,
+        block_size: int = 256 * 1024,
+        max_cached_blocks: int = 256,
+        workers: int = 8,
+    ):
+        """
+        Args:
+            url: The url of the remote file, the server must support range requests
+            client: The http client, one following redirects is created and closed with the file if not given
+            block_size: The size of the blocks requested and cached
+            max_cached_blocks: The number of blocks kept in memory
+            workers: The number of range requests in flight for one read
+        """
+        super().__init__()
+        self.url = url
+        self.client = client or httpx.Client(follow_redirects=True, timeout=60)
+        self._owns_client = client is None
+        self.block_size = block_size
+        self.max_cached_blocks = max_cached_blocks
+        self.fetched_bytes = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._blocks: OrderedDict[int, bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._pos = 0
+        self.size = self._get_size()
+
+    def _get_size(self) -> int:
+        res = self.client.get(self.url, headers={"Range": "bytes=0-0"})
+        res.raise_for_status()
+        match = _CONTENT_RANGE_TOTAL.search(res.headers.get("Content-Range", ""))
+        if res.status_code != 206 or match is None:
+            raise ValueError(f"Range requests are not supported by {self.url}")
+        return int(match.group(1))
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._pos
+
+    def _fetch_block(self, index: int) -> bytes:
+        start = index * self.block_size
+        end = min(start + self.block_size, self.size) - 1
+        res = self.client.get(self.url, headers={"Range": f"bytes={start}-{end}"})
+        res.raise_for_status()
+        if res.status_code != 206 or len(res.content) != end - start + 1:
+            raise ValueError(f"Failed to get bytes {start}-{end} of {self.url}")
+        logger.debug("HttpRangeFile[{}]: fetched bytes {}-{}", self.url, start, end)
+        with self._lock:
+            self.fetched_bytes += len(res.content)
+        return res.content
+
+    def _get_blocks(self, indexes: range) -> Dict[int, bytes]:
+        blocks: Dict[int, bytes] = {}
+        missing: List[int] = []
+        with self._lock:
+            for i in indexes:
+                block = self._blocks.get(i)
+                if block is None:
+                    missing.append(i)
+                else:
+                    self._blocks.move_to_end(i)
+                    blocks[i] = block
+        for i, block in zip(missing, self._executor.map(self._fetch_block, missing)):
+            blocks[i] = block
+        with self._lock:
+            # keep the tail of a long read, the next read usually continues from there
+            for i in missing[-self.max_cached_blocks :]:
+                self._blocks[i] = blocks[i]
+            while len(self._blocks) > self.max_cached_blocks:
+                self._blocks.popitem(last=False)
+        return blocks
+
+    def readinto(self, buffer: "bytearray | memoryview") -> int:  # type: ignore[override]
+        n = max(0, min(len(buffer), self.size - self._pos))
+        if n == 0:
+            return 0
+        first = self._pos // self.block_size
+        last = (self._pos + n - 1) // self.block_size
+        blocks = self._get_blocks(range(first, last + 1))
+        written = 0
+        for i in range(first, last + 1):
+            block_start = i * self.block_size
+            lo = max(self._pos, block_start) - block_start
+            hi = min(self._pos + n, block_start + len(blocks[i])) - block_start
+            buffer[written : written + hi - lo] = blocks[i][lo:hi]
+            written += hi - lo
+        self._pos += written
+        return written
+
+    def close(self) -> None:
+        if not self.closed:
+            self._executor.shutdown()
+            if self._owns_client:
+                self.client.close()
+            logger.info("HttpRangeFile[{}]: fetched {} of {} bytes", self.url, self.fetched_bytes, self.size)
+        super().close()
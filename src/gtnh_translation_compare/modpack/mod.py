@@ -7,6 +7,20 @@ from gtnh_translation_compare.utils.file import replace_illegal_characters, ensu
 
 Filename: TypeAlias = str
 Content: TypeAlias = str
+Blob: TypeAlias = bytes
+
+
+def decode_lang_file(blob: Blob) -> Content:
+    """
+    Decode the raw bytes of a lang file in a jar.
+
+    Args:
+        blob: The raw bytes of the lang file
+
+    Returns:
+        The content of the lang file with LF as a line break
+    """
+    return ensure_lf(blob.decode("utf-8-sig", errors="ignore"))
 
 
 class Mod:
@@ -32,9 +46,13 @@ class Mod:
 
     @cached_property
     def lang_files(self) -> Dict[Filename, Content]:
-        lang_files = {}
+        return {f: decode_lang_file(blob) for f, blob in self.lang_file_blobs.items()}
+
+    @cached_property
+    def lang_file_blobs(self) -> Dict[Filename, Blob]:
+        lang_file_blobs = {}
         for f in self.__jar.namelist():
             if f.endswith("en_US.lang") and len(f.split("/")) == 4:
                 with self.__jar.open(f, mode="r") as fp:
-                    lang_files[f] = ensure_lf(fp.read().decode("utf-8-sig", errors="ignore"))
-        return lang_files
+                    lang_file_blobs[f] = fp.read()
+        return lang_file_blobs
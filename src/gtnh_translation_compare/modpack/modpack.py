@@ -1,40 +1,115 @@
+import hashlib
 import pathlib
-import zipfile
+import weakref
+from collections import OrderedDict
 from functools import cached_property
 from os import path
-from typing import Sequence
+from typing import Sequence, Iterator, Union, Optional
+
+from loguru import logger
 
 from gtnh_translation_compare.filetypes import Filetype, FiletypeLang, FiletypeScript
-from gtnh_translation_compare.modpack.mod import Mod
+from gtnh_translation_compare.modpack.mod import Mod, decode_lang_file
+from gtnh_translation_compare.modpack.pack_source import open_pack_source
 from gtnh_translation_compare.utils.file import ensure_lf
 
 
+class _ParsedLangFiles:
+    """
+    Parsed lang files by content digest.
+
+    Files still in use elsewhere are found through weak references, and the most recently parsed ones are also kept
+    alive up to `budget` characters of content, so the table stays bounded however large the pack is.
+    """
+
+    def __init__(self, budget: int):
+        self.budget = budget
+        self._in_use: weakref.WeakValueDictionary[bytes, FiletypeLang] = weakref.WeakValueDictionary()
+        self._recent: OrderedDict[bytes, FiletypeLang] = OrderedDict()
+        self._recent_size = 0
+
+    def get(self, digest: bytes) -> Optional[FiletypeLang]:
+        if digest in self._recent:
+            self._recent.move_to_end(digest)
+        return self._in_use.get(digest)
+
+    def add(self, digest: bytes, lang_file: FiletypeLang) -> None:
+        self._in_use[digest] = lang_file
+        size = len(lang_file.content)
+        if size > self.budget:
+            return
+        self._recent[digest] = lang_file
+        self._recent_size += size
+        while self._recent_size > self.budget:
+            _, evicted = self._recent.popitem(last=False)
+            self._recent_size -= len(evicted.content)
+
+
 class ModPack:
-    def __init__(self, pack_path: pathlib.Path):
-        if len(list(pack_path.glob("mods"))) == 1:
-            self.__pack_path = pack_path
-        elif len(list(pack_path.glob("*/mods"))) == 1:
-            self.__pack_path = pathlib.Path(path.join(list(pack_path.glob("*/mods"))[0], ".."))
+    def __init__(
+        self,
+        pack_path: Union[pathlib.Path, str],
+        low_memory: bool = False,
+        dedup_budget: int = 4 * 1024 * 1024,
+    ):
+        """
+        Args:
+            pack_path: The directory of the modpack, or the modpack zip which is read without unpacking it, either a
+                local file or an http(s) url
+            low_memory: Do not keep the parsed files alive for deduplication, only files still in use are shared
+            dedup_budget: The characters of content of recently parsed files kept alive for deduplication, unless
+                `low_memory` is set
+        """
+        self.low_memory = low_memory
+        self.dedup_budget = 0 if low_memory else dedup_budget
+        self.__source = open_pack_source(pack_path)
 
     @cached_property
     def lang_files(self) -> Sequence[Filetype]:
-        lang_files: list[FiletypeLang] = []
-        for mod_path in self.__pack_path.glob("mods/**/*.jar"):
-            with mod_path.open("rb") as mod_jar:
-                mod = Mod(zipfile.ZipFile(mod_jar))
-                for filename, content in mod.lang_files.items():
-                    sub_mod_id = filename.split("/")[1]
-                    filename = path.join(*filename.split("/")[2:])
-                    lang_files.append(FiletypeLang(f"resources/{mod.mod_name}[{sub_mod_id}]/{filename}", content))
-        return lang_files
+        return list(self.iter_lang_files())
+
+    def iter_lang_files(self) -> Iterator[FiletypeLang]:
+        """
+        Scan the lang files jar by jar, each one is yielded as soon as its jar is read.
+        """
+        count = 0
+        distinct_count = 0
+        # identical lang files (shaded libraries, re-packed addons, ...) are decoded and parsed only once
+        parsed_lang_files = _ParsedLangFiles(self.dedup_budget)
+        for jar in self.__source.iter_jars():
+            mod = Mod(jar)
+            for filename, blob in mod.lang_file_blobs.items():
+                sub_mod_id = filename.split("/")[1]
+                filename = path.join(*filename.split("/")[2:])
+                relpath = f"resources/{mod.mod_name}[{sub_mod_id}]/{filename}"
+                digest = hashlib.blake2b(blob, digest_size=16).digest()
+                parsed = parsed_lang_files.get(digest)
+                count += 1
+                if parsed is None:
+                    distinct_count += 1
+                    parsed = FiletypeLang(relpath, decode_lang_file(blob))
+                    parsed_lang_files.add(digest, parsed)
+                    yield parsed
+                else:
+                    yield FiletypeLang(relpath, parsed.content, properties=parsed.properties)
+                del parsed
+        logger.info("found {} lang files, {} of them parsed", count, distinct_count)
 
     @cached_property
     def script_files(self) -> Sequence[Filetype]:
-        script_files: list[FiletypeScript] = []
-        for f in self.__pack_path.glob("scripts/*.zs"):
-            script_file = FiletypeScript(
-                f"scripts/{f.name}", ensure_lf(f.read_text(encoding="utf-8-sig", errors="ignore"))
-            )
+        return list(self.iter_script_files())
+
+    def iter_script_files(self) -> Iterator[FiletypeScript]:
+        """
+        Scan the script files one by one, only scripts with translatable properties are yielded.
+        """
+        for name, blob in self.__source.iter_scripts():
+            script_file = FiletypeScript(f"scripts/{name}", ensure_lf(blob.decode("utf-8-sig", errors="ignore")))
             if 0 < len(script_file.properties):
-                script_files.append(script_file)
-        return script_files
+                yield script_file
+
+    def close(self) -> None:
+        """
+        Close the modpack zip or the connection to it, once the files are iterated.
+        """
+        self.__source.close()
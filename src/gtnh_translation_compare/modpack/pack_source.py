@@ -0,0 +1,191 @@
+import io
+import pathlib
+import struct
+import zipfile
+from abc import ABC, abstractmethod
+from typing import Iterator, Tuple, BinaryIO, Optional, List, Union
+
+from gtnh_translation_compare.modpack.http_range_file import HttpRangeFile
+
+# the fixed part of a zip local file header, followed by the file name and the extra field
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\003\004"
+
+
+class PackSource(ABC):
+    """
+    Where the jars and scripts of a modpack are read from.
+    """
+
+    @abstractmethod
+    def iter_jars(self) -> Iterator[zipfile.ZipFile]:
+        """
+        Open the jars under `mods/` one by one, a jar is closed once the next one is requested.
+        """
+
+    @abstractmethod
+    def iter_scripts(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Read the scripts in `scripts/` one by one.
+
+        Returns:
+            The file name and raw bytes of each script
+        """
+
+    def close(self) -> None:
+        """
+        Release the files and connections the source holds.
+        """
+
+
+class DirectoryPackSource(PackSource):
+    """
+    An unzipped modpack, either the pack root or a directory with the pack root as its only child.
+    """
+
+    def __init__(self, pack_path: pathlib.Path):
+        if len(list(pack_path.glob("mods"))) == 1:
+            self.pack_path = pack_path
+        elif len(list(pack_path.glob("*/mods"))) == 1:
+            self.pack_path = list(pack_path.glob("*/mods"))[0].parent
+        else:
+            raise ValueError(f"No mods directory found in {pack_path}")
+
+    def iter_jars(self) -> Iterator[zipfile.ZipFile]:
+        for mod_path in self.pack_path.glob("mods/**/*.jar"):
+            with mod_path.open("rb") as mod_jar:
+                yield zipfile.ZipFile(mod_jar)
+
+    def iter_scripts(self) -> Iterator[Tuple[str, bytes]]:
+        for f in self.pack_path.glob("scripts/*.zs"):
+            yield f.name, f.read_bytes()
+
+
+class _StoredEntry(io.RawIOBase):
+    """
+    A read-only view of an uncompressed entry, read straight from the archive without extracting it.
+
+    The archive file object is shared, every read seeks to the position of this view first.
+    """
+
+    def __init__(self, fp: BinaryIO, offset: int, size: int):
+        super().__init__()
+        self._fp = fp
+        self._offset = offset
+        self._size = size
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._pos
+
+    def readinto(self, buffer: "bytearray | memoryview") -> int:  # type: ignore[override]
+        n = max(0, min(len(buffer), self._size - self._pos))
+        if n == 0:
+            return 0
+        self._fp.seek(self._offset + self._pos)
+        data = self._fp.read(n)
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class ZipPackSource(PackSource):
+    """
+    A modpack distribution zip, read without unpacking it.
+
+    Nested jars are opened inside the outer archive: uncompressed jars are read in place, compressed ones are inflated
+    into memory one at a time. Only the entries `Mod` asks for (`mcmod.info` and the lang files) are inflated from the
+    jars.
+    """
+
+    def __init__(self, fp: BinaryIO):
+        """
+        Args:
+            fp: The seekable zip file, closed together with the source
+        """
+        self._fp = fp
+        self._zip = zipfile.ZipFile(fp)
+        self.root = self._find_root(self._zip.namelist())
+
+    @staticmethod
+    def _find_root(names: List[str]) -> str:
+        # same as the directory: either `mods/` is at the top, or the pack root is the only child
+        roots = set()
+        for name in names:
+            parts = name.split("/")
+            if parts[0] == "mods":
+                return ""
+            if len(parts) > 2 and parts[1] == "mods":
+                roots.add(parts[0] + "/")
+        if len(roots) != 1:
+            raise ValueError(f"Expected one mods directory in the modpack zip, found {len(roots)}")
+        return roots.pop()
+
+    def _entry_offset(self, info: zipfile.ZipInfo) -> Optional[int]:
+        self._fp.seek(info.header_offset)
+        header = self._fp.read(_LOCAL_HEADER.size)
+        fields = _LOCAL_HEADER.unpack(header)
+        if fields[0] != _LOCAL_HEADER_SIGNATURE:
+            return None
+        filename_length: int = fields[-2]
+        extra_length: int = fields[-1]
+        return info.header_offset + _LOCAL_HEADER.size + filename_length + extra_length
+
+    def _open_jar(self, info: zipfile.ZipInfo) -> BinaryIO:
+        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+            offset = self._entry_offset(info)
+            if offset is not None:
+                return io.BufferedReader(_StoredEntry(self._fp, offset, info.file_size))
+        return io.BytesIO(self._zip.read(info))
+
+    def iter_jars(self) -> Iterator[zipfile.ZipFile]:
+        mods_dir = self.root + "mods/"
+        for info in self._zip.infolist():
+            if info.filename.startswith(mods_dir) and info.filename.endswith(".jar") and not info.is_dir():
+                with self._open_jar(info) as mod_jar:
+                    yield zipfile.ZipFile(mod_jar)
+
+    def iter_scripts(self) -> Iterator[Tuple[str, bytes]]:
+        scripts_dir = self.root + "scripts/"
+        for info in self._zip.infolist():
+            name = info.filename
+            if name.startswith(scripts_dir) and name.endswith(".zs") and "/" not in name[len(scripts_dir) :]:
+                yield name[len(scripts_dir) :], self._zip.read(info)
+
+    def close(self) -> None:
+        self._zip.close()
+        self._fp.close()
+
+
+def open_pack_source(pack: Union[pathlib.Path, str]) -> PackSource:
+    """
+    Args:
+        pack: An unzipped modpack directory, a modpack zip, or the http(s) url of a modpack zip which is read with range
+            requests
+
+    Returns:
+        The pack source for the path, to be closed once read
+    """
+    if isinstance(pack, str) and pack.startswith(("http://", "https://")):
+        return ZipPackSource(HttpRangeFile(pack))  # type: ignore[arg-type]
+    pack_path = pathlib.Path(pack)
+    if pack_path.is_file():
+        return ZipPackSource(pack_path.open("rb"))
+    return DirectoryPackSource(pack_path)
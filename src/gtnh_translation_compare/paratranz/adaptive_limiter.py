@@ -0,0 +1,107 @@
+import asyncio
+import time
+from typing import Optional, Dict
+
+from loguru import logger
+
+
+class AdaptiveLimiter:
+    """
+    Limits the requests in flight with an AIMD controller.
+
+    The limit grows by `increase` once per `limit` healthy responses, and is multiplied by `decrease` on a 429, a 5xx,
+    a timeout or a latency spike, at most once per `cooldown` so a burst of failures counts as one.
+    A latency spike is a response slower than `spike_factor` times the moving average of healthy latencies of the same
+    endpoint, since a large upload is expected to take much longer than a page read.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 10,
+        minimum: int = 1,
+        maximum: int = 32,
+        increase: float = 1,
+        decrease: float = 0.5,
+        spike_factor: float = 3,
+        cooldown: float = 1,
+        min_samples: int = 10,
+    ):
+        """
+        Args:
+            name: The name in logs
+            initial: The limit to start with
+            minimum: The lowest limit
+            maximum: The highest limit
+            increase: The limit added after `limit` healthy responses
+            decrease: The factor the limit is multiplied with on overload
+            spike_factor: How many times the average latency a response has to take to count as a spike
+            cooldown: Seconds after a decrease in which further overload signals are ignored
+            min_samples: Healthy responses of an endpoint needed before its latency spikes are detected
+        """
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        self.cooldown = cooldown
+        self.min_samples = min_samples
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.average_latencies: Dict[str, float] = {}
+        self._samples: Dict[str, int] = {}
+        self._last_decrease = float("-inf")
+        self._condition = asyncio.Condition()
+
+    @property
+    def current(self) -> int:
+        return int(self.limit)
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.current)
+            self.in_flight += 1
+
+    async def release(self, latency: Optional[float], overloaded: bool = False, endpoint: str = "") -> None:
+        """
+        Args:
+            latency: Seconds the request took, `None` for a request that gives no signal, e.g. a cancelled one
+            overloaded: Whether the server was overloaded, a 429, a 5xx or a timeout
+            endpoint: The endpoint the latency is compared within
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if latency is not None:
+                self._adjust(latency, overloaded, endpoint)
+            self._condition.notify_all()
+
+    def _adjust(self, latency: float, overloaded: bool, endpoint: str) -> None:
+        average_latency = self.average_latencies.get(endpoint)
+        is_spike = (
+            self._samples.get(endpoint, 0) >= self.min_samples
+            and average_latency is not None
+            and latency > self.spike_factor * average_latency
+        )
+        if overloaded or is_spike:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self._set_limit(self.limit * self.decrease, "overloaded" if overloaded else f"latency {latency:.2f}s")
+            return
+        self._samples[endpoint] = self._samples.get(endpoint, 0) + 1
+        self.average_latencies[endpoint] = latency if average_latency is None else 0.9 * average_latency + 0.1 * latency
+        self._set_limit(self.limit + self.increase / self.limit, "healthy")
+
+    def _set_limit(self, limit: float, reason: str) -> None:
+        old = self.current
+        self.limit = min(max(limit, self.minimum), self.maximum)
+        if self.current != old:
+            logger.info(
+                "AdaptiveLimiter[{}]: limit {} -> {} ({})",
+                self.name,
+                old,
+                self.current,
+                reason,
+            )
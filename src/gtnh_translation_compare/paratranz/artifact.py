@@ -0,0 +1,67 @@
+import zipfile
+from datetime import datetime, timezone
+from typing import Optional, List
+
+from pydantic import TypeAdapter
+
+from gtnh_translation_compare.paratranz.string_table import StringTable
+from gtnh_translation_compare.paratranz.types import StringRow, File
+
+_STRING_ROWS_ADAPTER: TypeAdapter[List[StringRow]] = TypeAdapter(List[StringRow])
+
+
+def _parse_utc(timestamp: str) -> datetime:
+    """
+    Parse an ISO 8601 time, a time without an offset is taken as UTC so that it compares with the ones with an offset.
+    """
+    parsed = datetime.fromisoformat(timestamp)
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+class Artifact:
+    """
+    A downloaded export of a whole Paratranz project.
+
+    `raw/<file name>` holds the strings of each file as a JSON array, the same as the string pages of the API. The
+    artifact is as recent as the last export of the project.
+    """
+
+    def __init__(self, path: str, created_at: Optional[str]):
+        """
+        Args:
+            path: The artifact zip
+            created_at: When the export was made, `None` if unknown
+        """
+        self.path = path
+        self.created_at = created_at
+        self._zip = zipfile.ZipFile(path)
+
+    def is_up_to_date(self, f: File) -> bool:
+        """
+        Whether the file was not modified since the export, a file with an unknown or unreadable time is not.
+        """
+        if self.created_at is None or f.modified_at is None:
+            return False
+        try:
+            return _parse_utc(f.modified_at) <= _parse_utc(self.created_at)
+        except ValueError:
+            return False
+
+    def get_strings(self, file_name: str) -> Optional[StringTable]:
+        """
+        Args:
+            file_name: The name of the file on Paratranz
+
+        Returns:
+            The strings of the file, None if the file is not in the artifact
+        """
+        try:
+            info = self._zip.getinfo(f"raw/{file_name}")
+        except KeyError:
+            return None
+        strings = StringTable()
+        strings.extend_rows(_STRING_ROWS_ADAPTER.validate_json(self._zip.read(info)))
+        return strings
+
+    def close(self) -> None:
+        self._zip.close()
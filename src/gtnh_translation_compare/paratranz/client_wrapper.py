@@ -1,15 +1,39 @@
 import asyncio
 import os
-from typing import Optional, List, Sequence, cast, Callable
+import time
+from collections import defaultdict
+from typing import Optional, List, Sequence, cast, Callable, Tuple, Dict, Any, AsyncIterator, Set
 
-from asyncache import cached  # type: ignore[import]
-from cachetools import LRUCache  # type: ignore[import]
-from httpx import AsyncClient, Response, HTTPStatusError
+from httpx import AsyncClient, Response, HTTPStatusError, HTTPError
 from loguru import logger
 from pydantic import BaseModel
 from tenacity import retry, wait_fixed, stop_after_attempt, retry_if_exception, WrappedFn, RetryCallState
 
-from gtnh_translation_compare.paratranz.types import File, StringItem, StringPage, ParatranzFile
+from gtnh_translation_compare.paratranz.adaptive_limiter import AdaptiveLimiter
+from gtnh_translation_compare.paratranz.file_table import FileTable
+from gtnh_translation_compare.paratranz.paratranz_cache import ResponseCache
+from gtnh_translation_compare.paratranz.payload import file_upload_body, aiter_chunks, iter_file_extra_json
+from gtnh_translation_compare.paratranz.request_policy import (
+    EndpointPolicy,
+    DEFAULT_ENDPOINT_POLICIES,
+    LatencyTracker,
+    RequestStart,
+    send_with_policy,
+)
+from gtnh_translation_compare.paratranz.single_flight import SingleFlight
+from gtnh_translation_compare.paratranz.string_mirror import StringMirror
+from gtnh_translation_compare.paratranz.string_table import StringTable
+from gtnh_translation_compare.paratranz.types import (
+    ArtifactInfo,
+    File,
+    StringItem,
+    StringPage,
+    ParatranzFile,
+    FILE_LIST_ADAPTER,
+    STRING_PAGE_ADAPTER,
+)
+from gtnh_translation_compare.paratranz.upload_journal import UploadJournal
+from gtnh_translation_compare.utils.pipeline import task_group
 
 
 def retry_after_429() -> Callable[[WrappedFn], WrappedFn]:
@@ -33,98 +57,226 @@ def retry_after_429() -> Callable[[WrappedFn], WrappedFn]:
     )
 
 
-class AllFilesCache(BaseModel):
-    etag: str
-    all_files: List[File]
+class AllFilesCache:
+    def __init__(self, etag: str, all_files: FileTable):
+        self.etag = etag
+        self.all_files = all_files
 
     # noinspection PyBroadException
     @classmethod
     def read(cls, path: str) -> Optional["AllFilesCache"]:
         try:
-            with open(path, "r") as fp:
-                result = cls.model_validate_json(fp.read())
+            with open(path, "rb") as fp:
+                (etag,), all_files = FileTable.loads(fp.read())
                 os.utime(path)
-                return result
+                return cls(etag=etag, all_files=all_files)
         except Exception:
             return None
 
     @classmethod
-    def write(cls, path: str, etag: str, all_files: List[File]) -> None:
-        with open(path, "w") as fp:
-            fp.write(cls(etag=etag, all_files=all_files).model_dump_json())
+    def write(cls, path: str, etag: str, all_files: FileTable) -> None:
+        with open(path + ".tmp", "wb") as fp:
+            fp.write(all_files.dumps(etag))
+        os.replace(path + ".tmp", path)
+
+
+class StringPatch(BaseModel):
+    """
+    The string-level changes needed to turn the strings of a file on Paratranz into the strings to be uploaded
+
+    Attributes:
+        to_create (List[StringItem]): Strings whose key does not exist on Paratranz yet
+        to_update (List[Tuple[int, Dict[str, Any]]]): String ids with the fields to be changed
+        to_delete (List[int]): String ids whose key no longer exists in the file
+    """
+
+    to_create: List[StringItem]
+    to_update: List[Tuple[int, Dict[str, Any]]]
+    to_delete: List[int]
+
+    @property
+    def change_count(self) -> int:
+        return len(self.to_create) + len(self.to_update) + len(self.to_delete)
+
+    @classmethod
+    def diff(
+        cls, old_strings: StringTable, new_strings: List[StringItem], changed_keys: Optional[Set[str]] = None
+    ) -> "StringPatch":
+        """
+        Args:
+            old_strings: The strings on Paratranz
+            new_strings: The strings to be uploaded
+            changed_keys: The keys changed since the strings were last uploaded, only these are compared when given
+
+        Returns:
+            The patch, from all strings if the strings on Paratranz do not add up to the last upload
+        """
+        new_keys = {s.key for s in new_strings}
+        compared = new_strings if changed_keys is None else [s for s in new_strings if s.key in changed_keys]
+        to_create: List[StringItem] = []
+        to_update: List[Tuple[int, Dict[str, Any]]] = []
+        for s in compared:
+            row = old_strings.find(s.key)
+            old_id = old_strings.ids[row] if row is not None else None
+            if row is None or old_id is None:
+                to_create.append(s)
+                continue
+            changes: Dict[str, Any] = {}
+            if old_strings.originals[row] != s.original:
+                changes["original"] = s.original
+                # The old translation no longer matches the original, clear it so that it is not downloaded for the
+                # new original, and let translators translate it again
+                if old_strings.translations[row]:
+                    changes["translation"] = ""
+                changes["stage"] = 0
+            if old_strings.contexts[row] != s.context:
+                changes["context"] = s.context
+            if s.translation and old_strings.translations[row] != s.translation:
+                changes["translation"] = s.translation
+                changes["stage"] = s.stage if s.stage is not None else 1
+            if changes:
+                to_update.append((old_id, changes))
+        to_delete = [
+            string_id
+            for key, string_id in zip(old_strings.keys, old_strings.ids)
+            if key not in new_keys and string_id is not None
+        ]
+        if changed_keys is not None and len(old_strings) + len(to_create) - len(to_delete) != len(new_keys):
+            # strings were added or removed on Paratranz since the last upload, the unchanged keys are compared too
+            logger.warning(
+                "StringPatch.diff: {} strings on Paratranz do not match the last upload, comparing all strings",
+                len(old_strings),
+            )
+            return cls.diff(old_strings, new_strings)
+        return cls(to_create=to_create, to_update=to_update, to_delete=to_delete)
 
 
 class ClientWrapper:
-    def __init__(self, client: AsyncClient, project_id: int, cache_dir: str) -> None:
+    def __init__(
+        self,
+        client: AsyncClient,
+        project_id: int,
+        cache_dir: str,
+        patch_max_change_ratio: Optional[float] = None,
+        patch_max_changes: Optional[int] = None,
+        strict_validation: bool = False,
+        endpoint_policies: Optional[Dict[str, EndpointPolicy]] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        page_size: int = 800,
+    ) -> None:
+        """
+        Args:
+            client: The http client with the Paratranz base url and token
+            project_id: The Paratranz project id
+            cache_dir: The directory to store caches in
+            patch_max_change_ratio: When set, existing files are updated string by string as long as the share of
+                changed keys does not exceed this ratio, otherwise the whole file is uploaded again
+            patch_max_changes: The most string requests a patch may take, larger changes upload the whole file
+            strict_validation: Validate responses in pydantic strict mode instead of the lax mode that coerces types
+            endpoint_policies: The timeout, retry and hedging policy of each endpoint, see `DEFAULT_ENDPOINT_POLICIES`
+            limiter: Limits the requests in flight, adapting the limit to how the server responds
+            page_size: The number of strings requested per page
+        """
         self.client = client
         self.project_id = project_id
         self.cache_dir = cache_dir
+        self.patch_max_change_ratio = patch_max_change_ratio
+        self.patch_max_changes = patch_max_changes
+        self.strict_validation = strict_validation
+        self.endpoint_policies = endpoint_policies if endpoint_policies is not None else DEFAULT_ENDPOINT_POLICIES
+        self._latency_trackers: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
+        self.limiter = limiter if limiter is not None else AdaptiveLimiter(f"project {project_id}")
+        self.page_size = page_size
         os.makedirs(self.cache_dir, exist_ok=True)
+        self.string_mirror = StringMirror(os.path.join(self.cache_dir, "strings"))
+        self.response_cache = ResponseCache(os.path.join(self.cache_dir, "responses"))
+        self._all_files: Optional[FileTable] = None
+        self._all_files_flight: SingleFlight[FileTable] = SingleFlight()
+        self._file_flight: SingleFlight[File] = SingleFlight()
+        self._strings_flight: SingleFlight[StringTable] = SingleFlight()
+
+    @property
+    def single_flight_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        The hit and miss counters of the shared in-flight reads, a hit is a call which joined an identical call
+        """
+        return {
+            "get_all_files": self._all_files_flight.stats(),
+            "get_file": self._file_flight.stats(),
+            "get_strings": self._strings_flight.stats(),
+        }
+
+    async def get_all_files(self) -> FileTable:
+        """
+        The files of the project, listed once per instance.
+        """
+        if self._all_files is None:
+            self._all_files = await self._all_files_flight.do(None, self._get_all_files)
+        return self._all_files
 
-    @cached(cache=LRUCache(maxsize=1))  # type: ignore[misc]
     @retry_after_429()
-    async def get_all_files(self) -> List[File]:
-        cache_json_path = os.path.join(self.cache_dir, "all_files_cache.json")
-        all_files_cache = AllFilesCache.read(cache_json_path)
+    async def _get_all_files(self) -> FileTable:
+        cache_path = os.path.join(self.cache_dir, "all_files_cache.bin")
+        all_files_cache = AllFilesCache.read(cache_path)
         headers = {}
         if all_files_cache:
             headers["If-None-Match"] = all_files_cache.etag
-        res = await self.client.get(url=f"projects/{self.project_id}/files", headers=headers)
+        res = await self._send("get_all_files", "GET", f"projects/{self.project_id}/files", headers=headers)
         if res.status_code == 304:
             logger.info("get_all_files: cache hit")
             return cast(AllFilesCache, all_files_cache).all_files
-        else:
-            logger.info("get_all_files: cache miss")
-            AllFilesCache.write(
-                path=os.path.join(self.cache_dir, "all_files_cache.json"),
-                etag=res.headers["ETag"],
-                all_files=res.json(),
-            )
         self._log_res("get_files", res)
-        return [File.model_validate(f) for f in res.json()]
+        logger.info("get_all_files: cache miss")
+        all_files = FileTable.from_files(FILE_LIST_ADAPTER.validate_json(res.content, strict=self.strict_validation))
+        self.response_cache.prune(all_files, all_files_cache.all_files if all_files_cache is not None else None)
+        AllFilesCache.write(path=cache_path, etag=res.headers["ETag"], all_files=all_files)
+        return all_files
 
-    @retry_after_429()
     async def get_file(self, file_id: int) -> File:
-        res = await self.client.get(url=f"projects/{self.project_id}/files/{file_id}")
-        self._log_res(f"get_file[file_id={file_id}]", res)
-        return File.model_validate(res.json())
+        return await self._file_flight.do(file_id, lambda: self._get_file(file_id))
+
+    @retry_after_429()
+    async def _get_file(self, file_id: int) -> File:
+        content = await self._get_conditional(
+            "get_file", file_id, f"projects/{self.project_id}/files/{file_id}", f"get_file[file_id={file_id}]"
+        )
+        return File.model_validate_json(content, strict=self.strict_validation)
 
     @retry_after_429()
     async def _get_strings_by_page(
         self,
-        sem: asyncio.Semaphore,
         file_id: int,
         page: int = 1,
-        page_size: int = 800,
         page_count: Optional[int] = None,
     ) -> StringPage:
-        async with sem:
-            logger.info("[get_strings]started: file_id={}, page={}, page_count={}", file_id, page, page_count or "?")
-            res = await self.client.get(
-                url=f"projects/{self.project_id}/strings",
-                params={
-                    "file": file_id,
-                    "page": page,
-                    "pageSize": page_size,
-                },
-            )
-            self._log_res(f"get_strings[file_id={file_id}, page={page}]", res)
-            logger.info("[get_strings]finished: file_id={}, page={}, page_count={}", file_id, page, page_count or "?")
-        return StringPage.model_validate(res.json())
+        logger.info("[get_strings]started: file_id={}, page={}, page_count={}", file_id, page, page_count or "?")
+        content = await self._get_conditional(
+            "get_strings",
+            file_id,
+            f"projects/{self.project_id}/strings",
+            f"get_strings[file_id={file_id}, page={page}]",
+            params={
+                "file": file_id,
+                "page": page,
+                "pageSize": self.page_size,
+            },
+        )
+        logger.info("[get_strings]finished: file_id={}, page={}, page_count={}", file_id, page, page_count or "?")
+        return STRING_PAGE_ADAPTER.validate_json(content, strict=self.strict_validation)
 
-    async def get_strings(self, file_id: int) -> List[StringItem]:
-        # concurrency number
-        sem = asyncio.Semaphore(10)
+    async def get_strings(self, file_id: int) -> StringTable:
+        return await self._strings_flight.do(file_id, lambda: self._get_strings(file_id))
 
-        strings: List[StringItem] = list()
+    async def _get_strings(self, file_id: int) -> StringTable:
+        # the pages in flight are limited by `self.limiter`
+        strings = StringTable()
 
-        string_page = await self._get_strings_by_page(sem, file_id)
-        page_count = string_page.page_count
-        strings.extend(string_page.results)
+        string_page = await self._get_strings_by_page(file_id)
+        page_count = string_page["pageCount"]
+        strings.extend_rows(string_page["results"])
 
         tasks = [
             self._get_strings_by_page(
-                sem,
                 file_id,
                 page=page,
                 page_count=page_count,
@@ -133,68 +285,309 @@ class ClientWrapper:
         ]
 
         tasks_result: Sequence[StringPage] = await asyncio.gather(*tasks)
-        logger.info("[get_strings]finished_all: file_id={}, page_count={}", file_id, page_count)
+        logger.info(
+            "[get_strings]finished_all: file_id={}, page_count={}, concurrency={}",
+            file_id,
+            page_count,
+            self.limiter.current,
+        )
         for string_page in tasks_result:
-            strings.extend(string_page.results)
+            strings.extend_rows(string_page["results"])
 
         return strings
 
-    async def upload_file(self, paratranz_file: ParatranzFile) -> None:
-        file_id = await self._find_file_id_by_file(paratranz_file.file_name)
+    @retry_after_429()
+    async def get_artifact_info(self) -> ArtifactInfo:
+        res = await self._send("get_artifact_info", "GET", f"projects/{self.project_id}/artifacts")
+        self._log_res("get_artifact_info", res)
+        return ArtifactInfo.model_validate_json(res.content, strict=self.strict_validation)
+
+    @retry_after_429()
+    async def download_artifact(self, path: str) -> None:
+        """
+        Download the latest export of the project, streamed to a file.
+
+        Args:
+            path: The file to save the artifact zip to
+        """
+        async with self.client.stream(
+            "GET",
+            f"projects/{self.project_id}/artifacts/download",
+            follow_redirects=True,
+            timeout=self._get_endpoint_policy("download_artifact").timeout,
+        ) as res:
+            self._log_res("download_artifact", res)
+            with open(path + ".tmp", "wb") as fp:
+                async for chunk in res.aiter_bytes():
+                    fp.write(chunk)
+        os.replace(path + ".tmp", path)
+
+    async def get_file_strings(self, file: File) -> StringTable:
+        """
+        Get the strings of a file from the local mirror, only files modified since they were mirrored are downloaded.
+
+        Args:
+            file: The file from `get_all_files`, its `modified_at` decides whether the mirror is still valid
+
+        Returns:
+            The strings of the file
+        """
+        strings = self.string_mirror.get(file)
+        if strings is not None:
+            logger.info("[get_file_strings]mirror hit: file_id={}", file.id)
+            return strings
+        logger.info("[get_file_strings]mirror miss: file_id={}", file.id)
+        strings = await self.get_strings(file.id)
+        self.string_mirror.set(file, strings)
+        return strings
 
-        if file_id is None:
+    async def refresh_string_mirror(self, files: Optional[Sequence[File]] = None, concurrency: int = 2) -> None:
+        """
+        Download the strings of the files modified since they were mirrored, and forget deleted files.
+
+        Args:
+            files: The files to refresh, all files of the project if `None`
+            concurrency: The files refreshed at a time, kept low so that it does not compete with other actions
+        """
+        all_files: FileTable = await self.get_all_files()
+        self.string_mirror.prune(all_files.ids)
+        files = all_files if files is None else files
+        stale_files = [f for f in files if not self.string_mirror.is_fresh(f)]
+        logger.info("[refresh_string_mirror]{} of {} files are stale", len(stale_files), len(files))
+
+        sem = asyncio.Semaphore(concurrency)
+
+        async def refresh(f: File) -> None:
+            async with sem:
+                await self.get_file_strings(f)
+
+        # noinspection PyTypeChecker
+        results = await asyncio.gather(*[refresh(f) for f in stale_files], return_exceptions=True)
+        for f, result in zip(stale_files, results):
+            if isinstance(result, BaseException):
+                logger.warning("[refresh_string_mirror]failed to refresh file_id={}: {}", f.id, result)
+
+    async def upload_file(self, paratranz_file: ParatranzFile, journal: Optional[UploadJournal] = None) -> None:
+        """
+        Create or update a file together with its extra.
+
+        Args:
+            paratranz_file: The file to upload
+            journal: Skip the file if the journal says it was already uploaded with the same content, and record it
+                once uploaded
+        """
+        fingerprint = paratranz_file.fingerprint if journal is not None else ""
+        if journal is not None and journal.is_done(paratranz_file.file_name, fingerprint):
+            logger.info("upload_file[{}]: already uploaded, skipped", paratranz_file.file_name)
+            return
+
+        file = await self._find_file_by_name(paratranz_file.file_name)
+
+        if file is None:
             file_id = await self._create_file(paratranz_file)
         else:
-            await self._update_file(file_id, paratranz_file)
+            file_id = file.id
+            await self._update_file(file, paratranz_file)
 
         await self._save_file_extra(file_id, paratranz_file)
 
-    async def _find_file_id_by_file(self, filename: str) -> Optional[int]:
-        files = await self.get_all_files()
-        for f in files:
-            if f.name == filename:
-                assert isinstance(f.id, int)
-                return f.id
-        return None
+        if journal is not None:
+            journal.record(paratranz_file.file_name, fingerprint)
+
+    async def _find_file_by_name(self, filename: str) -> Optional[File]:
+        files: FileTable = await self.get_all_files()
+        return files.find(filename)
 
     @retry_after_429()
     async def _create_file(self, paratranz_file: ParatranzFile) -> int:
         path = os.path.dirname(paratranz_file.file_name)
-        res = await self.client.post(
-            url=f"projects/{self.project_id}/files",
-            data={"path": path},
-            files={"file": paratranz_file.file_to_be_uploaded},
+        body = file_upload_body(paratranz_file, fields={"path": path})
+        res = await self._send(
+            "create_file",
+            "POST",
+            f"projects/{self.project_id}/files",
+            content=lambda: aiter_chunks(body),
+            headers=body.headers,
         )
         self._log_res(f"create_file[path={path}]", res)
         return File.model_validate(res.json()["file"]).id
 
-    @retry_after_429()
-    async def _update_file(self, file_id: int, paratranz_file: ParatranzFile) -> None:
-        old_strings = await self.get_strings(file_id)
-        old_strings_map: dict[str, StringItem] = {s.key: s for s in old_strings}
+    async def _update_file(self, file: File, paratranz_file: ParatranzFile) -> None:
+        file_id = file.id
+        old_strings = await self.get_file_strings(file)
         for s in paratranz_file.string_items:
-            if s.key in old_strings_map and old_strings_map[s.key].original == s.original:
+            row = old_strings.find(s.key)
+            if row is not None and old_strings.originals[row] == s.original:
                 # If the translation attribute is not empty, meaning that it is in non-automation
                 # and is manually assigned, then that value prevails
                 if not s.translation:
-                    old_translation = old_strings_map[s.key].translation
-                    s.translation = old_translation
+                    s.translation = old_strings.translations[row]
                     s.stage = 1
 
-        res = await self.client.post(
-            url=f"projects/{self.project_id}/files/{file_id}",
-            files={"file": paratranz_file.file_to_be_uploaded},
+        if self.patch_max_change_ratio is not None:
+            patch = StringPatch.diff(old_strings, paratranz_file.string_items, paratranz_file.changed_keys)
+            total = max(len(old_strings), len(paratranz_file.string_items), 1)
+            within_max_changes = self.patch_max_changes is None or patch.change_count <= self.patch_max_changes
+            if patch.change_count / total <= self.patch_max_change_ratio and within_max_changes:
+                logger.info(
+                    "update_file[file_id={}]: patching {} created, {} updated, {} deleted of {} strings",
+                    file_id,
+                    len(patch.to_create),
+                    len(patch.to_update),
+                    len(patch.to_delete),
+                    total,
+                )
+                try:
+                    await self._patch_strings(file_id, patch)
+                    return
+                except Exception as e:
+                    # the file may be left partly patched, which is not retried against strings that no longer match
+                    # the server, the whole file is uploaded instead
+                    logger.warning("update_file[file_id={}]: patching failed, uploading the whole file: {}", file_id, e)
+                finally:
+                    # the strings changed, the mirrored copy is refreshed on next read
+                    self.string_mirror.remove(file_id)
+            else:
+                logger.info(
+                    "update_file[file_id={}]: {} of {} strings changed, uploading the whole file",
+                    file_id,
+                    patch.change_count,
+                    total,
+                )
+
+        await self._upload_file(file_id, paratranz_file)
+
+    @retry_after_429()
+    async def _upload_file(self, file_id: int, paratranz_file: ParatranzFile) -> None:
+        # the strings are about to change, the mirrored copy is refreshed on next read
+        self.string_mirror.remove(file_id)
+        body = file_upload_body(paratranz_file, fields={})
+        res = await self._send(
+            "update_file",
+            "POST",
+            f"projects/{self.project_id}/files/{file_id}",
+            content=lambda: aiter_chunks(body),
+            headers=body.headers,
         )
         self._log_res(f"update_file[file_id={file_id}]", res)
 
+    async def _patch_strings(self, file_id: int, patch: StringPatch) -> None:
+        # the requests in flight are limited by `self.limiter`, the first failed request cancels the others
+        async with task_group() as tg:
+            for s in patch.to_create:
+                tg.create_task(self._create_string(file_id, s))
+            for string_id, changes in patch.to_update:
+                tg.create_task(self._update_string(string_id, changes))
+            for string_id in patch.to_delete:
+                tg.create_task(self._delete_string(string_id))
+
+    @retry_after_429()
+    async def _create_string(self, file_id: int, string_item: StringItem) -> None:
+        res = await self._send(
+            "create_string",
+            "POST",
+            f"projects/{self.project_id}/strings",
+            json={"file": file_id, **string_item.model_dump(exclude={"id"}, exclude_none=True)},
+        )
+        self._log_res(f"create_string[file_id={file_id}, key={string_item.key}]", res)
+
+    @retry_after_429()
+    async def _update_string(self, string_id: int, changes: Dict[str, Any]) -> None:
+        res = await self._send("patch_strings", "PUT", f"projects/{self.project_id}/strings/{string_id}", json=changes)
+        self._log_res(f"update_string[string_id={string_id}]", res)
+
+    @retry_after_429()
+    async def _delete_string(self, string_id: int) -> None:
+        res = await self._send("patch_strings", "DELETE", f"projects/{self.project_id}/strings/{string_id}")
+        self._log_res(f"delete_string[string_id={string_id}]", res)
+
     @retry_after_429()
     async def _save_file_extra(self, file_id: int, paratranz_file: ParatranzFile) -> None:
-        res = await self.client.put(
-            url=f"projects/{self.project_id}/files/{file_id}",
-            json={"extra": paratranz_file.file_extra.model_dump()},
+        res = await self._send(
+            "save_file_extra",
+            "PUT",
+            f"projects/{self.project_id}/files/{file_id}",
+            content=lambda: aiter_chunks(iter_file_extra_json(paratranz_file.file_extra)),
+            headers={"Content-Type": "application/json"},
         )
         self._log_res(f"save_file_extra[file_id={file_id}]", res)
 
+    def _get_endpoint_policy(self, endpoint: str) -> EndpointPolicy:
+        return self.endpoint_policies.get(endpoint, DEFAULT_ENDPOINT_POLICIES.get(endpoint, EndpointPolicy()))
+
+    async def _send(
+        self,
+        endpoint: str,
+        method: str,
+        url: str,
+        content: Optional[Callable[[], AsyncIterator[bytes]]] = None,
+        **kwargs: Any,
+    ) -> Response:
+        """
+        Send a request with the timeout, retries and hedging of the endpoint policy.
+
+        Args:
+            endpoint: The endpoint name in the policies
+            method: The http method
+            url: The url relative to the client base url
+            content: Returns a streamed body, called again for every retry since a stream can only be sent once
+            **kwargs: Passed to `httpx.AsyncClient.request`
+
+        Returns:
+            The response
+        """
+        policy = self._get_endpoint_policy(endpoint)
+
+        async def send_once(start: RequestStart) -> Response:
+            await self.limiter.acquire()
+            start.set()
+            started = time.monotonic()
+            latency: Optional[float] = None
+            overloaded = True
+            try:
+                res = await self.client.request(
+                    method, url, content=content() if content is not None else None, timeout=policy.timeout, **kwargs
+                )
+                overloaded = res.status_code == 429 or res.status_code >= 500
+                latency = time.monotonic() - started
+                return res
+            except HTTPError:
+                # timeouts and connection errors
+                latency = time.monotonic() - started
+                raise
+            finally:
+                await self.limiter.release(latency, overloaded, endpoint)
+
+        return await send_with_policy(
+            send_once,
+            policy,
+            self._latency_trackers[endpoint],
+            f"{endpoint}[{method} {url}]",
+            may_hedge=lambda: self.limiter.in_flight < self.limiter.current,
+        )
+
+    async def _get_conditional(
+        self, endpoint: str, file_id: int, url: str, request_name: str, params: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        """
+        GET a resource of a file with `If-None-Match` set to the ETag of the cached response, an unchanged resource
+        comes back as a 304 without a body and the cached body is used.
+
+        Returns:
+            The response body
+        """
+        cached_response = self.response_cache.get(file_id, url, params)
+        headers = {"If-None-Match": cached_response[0]} if cached_response is not None else {}
+        res = await self._send(endpoint, "GET", url, params=params, headers=headers)
+        if res.status_code == 304 and cached_response is not None:
+            logger.debug("{}: not modified", request_name)
+            return cached_response[1]
+        self._log_res(request_name, res)
+        etag = res.headers.get("ETag")
+        if etag is not None:
+            self.response_cache.set(file_id, url, params, etag, res.content)
+        return res.content
+
     @staticmethod
     def _log_res(request_name: str, res: Response) -> None:
         try:
@@ -1,12 +1,14 @@
-from io import StringIO
-from typing import List, Tuple, Dict
+import heapq
+from typing import List, Dict, Iterable, Tuple, Optional, Set
 
 from loguru import logger
 
 from gtnh_translation_compare.filetypes import Language
 from gtnh_translation_compare.filetypes.filetype import Filetype
+from gtnh_translation_compare.paratranz.artifact import Artifact
 from gtnh_translation_compare.paratranz.client_wrapper import ClientWrapper
-from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache
+from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache, FileExtraCache
+from gtnh_translation_compare.paratranz.string_table import StringTable
 from gtnh_translation_compare.paratranz.types import (
     ParatranzFile,
     TranslationFile,
@@ -15,14 +17,25 @@ from gtnh_translation_compare.paratranz.types import (
     Property,
     StringItem,
 )
+from gtnh_translation_compare.utils.text_splice import Edit, splice, find_all
 from gtnh_translation_compare.utils.unicode import to_unicode
 
+_I18N_LANG_PREFIX = 'val _I18N_Lang = "'
+_I18N_LANG_DECLARATION = f'{_I18N_LANG_PREFIX}{Language.en_US.value}";'
+
 
 class Converter:
-    def __init__(self, client: ClientWrapper, cache: ParatranzCache, target_lang: Language):
+    def __init__(
+        self,
+        client: ClientWrapper,
+        cache: ParatranzCache,
+        target_lang: Language,
+        extra_cache: Optional[FileExtraCache] = None,
+    ):
         self.client = client
         self.cache = cache
         self.target_lang = target_lang
+        self.extra_cache = extra_cache
 
     async def to_translation_file(self, paratranz_file: File) -> "TranslationFile":
         cached = self.cache.get(paratranz_file)
@@ -35,44 +48,72 @@ class Converter:
         return translation_file
 
     async def _to_translation_file(self, paratranz_file: File) -> "TranslationFile":
-        paratranz_file = await self.client.get_file(paratranz_file.id)
-        file_extra_dict = paratranz_file.extra
-        file_extra = FileExtra.model_validate(file_extra_dict)
-        content = file_extra.original
-        string_items = await self.client.get_strings(paratranz_file.id)
-        string_items_map = {item.key: item for item in string_items}
+        file_with_extra = await self.client.get_file(paratranz_file.id)
+        file_extra = FileExtra.model_validate(file_with_extra.extra)
+        if self.extra_cache is not None:
+            self.extra_cache.set(paratranz_file, file_extra)
+        strings = await self.client.get_file_strings(file_with_extra)
+        translated_content = self._translate_content(file_extra, strings)
+        return TranslationFile(relpath=file_extra.target_relpath, content=translated_content)
 
-        properties: List[Tuple[str, Property]] = [(k, v) for k, v in file_extra.properties.items()]
-        properties.sort(key=sort_key)
+    async def to_translation_file_from_artifact(self, paratranz_file: File, artifact: Artifact) -> "TranslationFile":
+        """
+        Build a translation file from the strings in a project artifact, without requesting the strings.
+
+        The extra is taken from the extra cache while the file is unchanged, files modified since the export or missing
+        in the artifact are converted the usual way. Results are not cached, the translation cache is only filled from
+        the API.
+        """
+        cached = self.cache.get(paratranz_file)
+        if cached:
+            logger.info("cache hit: {}", paratranz_file.name)
+            return cached
+        if not artifact.is_up_to_date(paratranz_file):
+            logger.info("{} was modified since the artifact, converting it from the API", paratranz_file.name)
+            return await self.to_translation_file(paratranz_file)
+        strings = artifact.get_strings(paratranz_file.name)
+        if strings is None:
+            logger.warning("{} is not in the artifact, converting it from the API", paratranz_file.name)
+            return await self.to_translation_file(paratranz_file)
+
+        file_extra = self.extra_cache.get(paratranz_file) if self.extra_cache is not None else None
+        if file_extra is None or file_extra.properties.keys() != set(strings.keys):
+            file_extra = FileExtra.model_validate((await self.client.get_file(paratranz_file.id)).extra)
+            if self.extra_cache is not None:
+                self.extra_cache.set(paratranz_file, file_extra)
+        translated_content = self._translate_content(file_extra, strings)
+        return TranslationFile(relpath=file_extra.target_relpath, content=translated_content)
+
+    def _translate_content(self, file_extra: FileExtra, strings: StringTable) -> str:
+        content = file_extra.original
+        # properties are stored in file order, only legacy files or duplicated keys need sorting
+        properties: Iterable[Tuple[str, Property]] = file_extra.properties.items()
+        if not is_sorted_by_start(file_extra.properties.values()):
+            properties = sorted(properties, key=sort_key)
 
         is_script = file_extra.target_relpath.startswith("scripts/")
 
-        left = 0
-        buffer = StringIO()
+        edits: List[Edit] = []
         for k, p in properties:
-            if k not in string_items_map:
+            row = strings.find(k)
+            if row is None or not strings.translations[row]:
                 continue
-            string_item = string_items_map[k]
-            translation = string_item.translation
-            if translation:
-                if is_script:
-                    translation = "<BR>".join([to_unicode(p) for p in translation.split("<BR>")])
-                buffer.write(content[left : p.start])
-                buffer.write(translation)
-            else:
-                buffer.write(content[left : p.end])
-            left = p.end
-        buffer.write(content[left:])
-
-        translated_content = buffer.getvalue()
-        if is_script:
-            translated_content = translated_content.replace(
-                'val _I18N_Lang = "en_US";',
-                f'val _I18N_Lang = "{self.target_lang.value}";',
-            )
-        return TranslationFile(relpath=file_extra.target_relpath, content=translated_content)
+            translation = strings.translations[row]
+            if is_script:
+                translation = "<BR>".join([to_unicode(part) for part in translation.split("<BR>")])
+            edits.append((p.start, p.end, translation))
 
-    async def to_paratranz_file(self, file: Filetype) -> "ParatranzFile":
+        if not is_script:
+            return splice(content, edits)
+
+        # replace the language in `val _I18N_Lang = "en_US";` as one more span instead of a full-text replace
+        lang_edits: List[Edit] = []
+        for start in find_all(content, _I18N_LANG_DECLARATION):
+            lang_start = start + len(_I18N_LANG_PREFIX)
+            lang_edits.append((lang_start, lang_start + len(Language.en_US.value), self.target_lang.value))
+        return splice(content, heapq.merge(edits, lang_edits))
+
+    async def to_paratranz_file(self, file: Filetype, changed_keys: Optional[Set[str]] = None) -> "ParatranzFile":
         file_name = file.get_target_language_relpath(self.target_lang) + ".json"
         string_list: List[StringItem] = [
             StringItem(key=p.key, original=p.value, context=p.full) for p in file.properties.values()
@@ -91,9 +132,19 @@ class Converter:
             file_name=file_name,
             file_extra=paratranz_file_extra,
             string_items=string_list,
+            changed_keys=changed_keys,
         )
 
 
 def sort_key(item: tuple[str, Property]) -> int:
     _, p = item
     return p.start
+
+
+def is_sorted_by_start(properties: Iterable[Property]) -> bool:
+    last_start = -1
+    for p in properties:
+        if p.start < last_start:
+            return False
+        last_start = p.start
+    return True
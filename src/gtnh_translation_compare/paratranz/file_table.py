@@ -0,0 +1,74 @@
+import marshal
+from typing import List, Optional, Iterable, Dict, Sequence, overload, Callable, Any, Tuple
+
+from gtnh_translation_compare.paratranz.types import File
+
+# bump when the layout of FileTable.dumps changes
+_FORMAT_VERSION = 1
+
+
+class FileTable(Sequence[File]):
+    """
+    The files of a project in columns of ids, names and modified times.
+
+    `File` models are only built for the rows that are accessed, and without validation, the columns come either
+    from validated API responses or from our own cache.
+    """
+
+    def __init__(self, ids: List[int], names: List[str], modified_ats: List[Optional[str]]):
+        assert len(ids) == len(names) == len(modified_ats)
+        self.ids = ids
+        self.names = names
+        self.modified_ats = modified_ats
+        self._rows: List[Optional[File]] = [None] * len(ids)
+        self._index: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_files(cls, files: Iterable[File]) -> "FileTable":
+        ids: List[int] = []
+        names: List[str] = []
+        modified_ats: List[Optional[str]] = []
+        for f in files:
+            ids.append(f.id)
+            names.append(f.name)
+            modified_ats.append(f.modified_at)
+        return cls(ids, names, modified_ats)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> File:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[File]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> File | Sequence[File]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        row = self._rows[index]
+        if row is None:
+            row = File.model_construct(id=self.ids[index], name=self.names[index], modified_at=self.modified_ats[index])
+            self._rows[index] = row
+        return row
+
+    def find(self, name: str) -> Optional[File]:
+        if self._index is None:
+            self._index = {n: i for i, n in enumerate(self.names)}
+        row = self._index.get(name)
+        return self[row] if row is not None else None
+
+    def filter_by_name(self, predicate: Callable[[str], bool]) -> List[File]:
+        return [self[i] for i, name in enumerate(self.names) if predicate(name)]
+
+    def dumps(self, *header: Any) -> bytes:
+        return marshal.dumps((_FORMAT_VERSION, header, self.ids, self.names, self.modified_ats))
+
+    @classmethod
+    def loads(cls, data: bytes) -> Tuple[Tuple[Any, ...], "FileTable"]:
+        version, header, ids, names, modified_ats = marshal.loads(data)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported file table format: {version}")
+        return tuple(header), cls(ids, names, modified_ats)
@@ -1,31 +1,160 @@
 import base64
+import hashlib
 import os
+from typing import Optional, Dict, Any, Tuple
 
-from gtnh_translation_compare.paratranz.types import File, TranslationFile
+from gtnh_translation_compare.paratranz.file_table import FileTable
+from gtnh_translation_compare.paratranz.types import File, TranslationFile, FileExtra
 
 
 class ParatranzCache:
-    def __init__(self, cache_dir: str):
+    """
+    Translation files converted from Paratranz, keyed by file name and modified time.
+
+    An entry is stored as the relpath on the first line followed by the content as is, so reading it back is a plain
+    file read instead of decoding a JSON string. Cache entries are written by us and trusted, unless
+    `strict_validation` is set.
+    """
+
+    def __init__(self, cache_dir: str, strict_validation: bool = False):
         self.cache_dir = cache_dir
+        self.strict_validation = strict_validation
         os.makedirs(self.cache_dir, exist_ok=True)
 
     @staticmethod
     def _calc_cache_name(f: File) -> str:
-        return base64.urlsafe_b64encode(f"{f.name} + {f.modified_at}".encode()).decode()
+        return base64.urlsafe_b64encode(f"{f.name} + {f.modified_at}".encode()).decode() + ".txt"
+
+    def has(self, f: File) -> bool:
+        return os.path.exists(os.path.join(self.cache_dir, self._calc_cache_name(f)))
 
     # noinspection PyBroadException
     def get(self, f: File) -> TranslationFile | None:
         try:
             filepath = os.path.join(self.cache_dir, self._calc_cache_name(f))
-            with open(filepath, "r") as fp:
-                result = TranslationFile.model_validate_json(fp.read())
-                # update file modified time when valid cache found
-                os.utime(filepath)
-                return result
+            with open(filepath, "r", encoding="utf-8", newline="") as fp:
+                relpath, sep, content = fp.read().partition("\n")
+            if not sep:
+                return None
+            if self.strict_validation:
+                result = TranslationFile.model_validate({"relpath": relpath, "content": content}, strict=True)
+            else:
+                result = TranslationFile.model_construct(relpath=relpath, content=content)
+            # update file modified time when valid cache found
+            os.utime(filepath)
+            return result
         except Exception:
             return None
 
     def set(self, f: File, translation_file: TranslationFile) -> None:
         filepath = os.path.join(self.cache_dir, self._calc_cache_name(f))
-        with open(filepath, "w") as fp:
-            fp.write(translation_file.model_dump_json())
+        with open(filepath + ".tmp", "w", encoding="utf-8", newline="") as fp:
+            fp.write(translation_file.relpath)
+            fp.write("\n")
+            fp.write(translation_file.content)
+        os.replace(filepath + ".tmp", filepath)
+
+
+class FileExtraCache:
+    """
+    The last seen `FileExtra` of each file, keyed by file id and valid for one modified time.
+
+    An entry is stored as the modified time on the first line followed by the extra as JSON. Any change to the file,
+    e.g. the English text uploaded again with the same keys, changes its modified time and invalidates the entry.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _calc_path(self, file_id: int) -> str:
+        return os.path.join(self.cache_dir, f"{file_id}.json")
+
+    # noinspection PyBroadException
+    def get(self, f: File) -> Optional[FileExtra]:
+        try:
+            filepath = self._calc_path(f.id)
+            with open(filepath, "r", encoding="utf-8") as fp:
+                modified_at, sep, extra = fp.read().partition("\n")
+            if not sep or f.modified_at is None or modified_at != f.modified_at:
+                return None
+            result = FileExtra.model_validate_json(extra)
+            os.utime(filepath)
+            return result
+        except Exception:
+            return None
+
+    def set(self, f: File, file_extra: FileExtra) -> None:
+        if f.modified_at is None:
+            return
+        filepath = self._calc_path(f.id)
+        with open(filepath + ".tmp", "w", encoding="utf-8") as fp:
+            fp.write(f.modified_at)
+            fp.write("\n")
+            fp.write(file_extra.model_dump_json())
+        os.replace(filepath + ".tmp", filepath)
+
+
+class ResponseCache:
+    """
+    The last response body and its ETag of conditional GET requests about a file, keyed by file id, url and query
+    parameters.
+
+    An entry is stored as the ETag on the first line followed by the body as is. The entries of a file are removed
+    once it is modified or deleted, see `prune`, since its old pages and versions will not be requested again.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _calc_path(self, file_id: int, url: str, params: Optional[Dict[str, Any]]) -> str:
+        key = url + "?" + "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+        return os.path.join(self.cache_dir, f"{file_id}-{hashlib.sha1(key.encode()).hexdigest()}.bin")
+
+    # noinspection PyBroadException
+    def get(self, file_id: int, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Tuple[str, bytes]]:
+        """
+        Returns:
+            The ETag and body of the last response, `None` if there is none
+        """
+        try:
+            filepath = self._calc_path(file_id, url, params)
+            with open(filepath, "rb") as fp:
+                etag, sep, body = fp.read().partition(b"\n")
+            if not sep:
+                return None
+            os.utime(filepath)
+            return etag.decode(), body
+        except Exception:
+            return None
+
+    def set(self, file_id: int, url: str, params: Optional[Dict[str, Any]], etag: str, body: bytes) -> None:
+        filepath = self._calc_path(file_id, url, params)
+        with open(filepath + ".tmp", "wb") as fp:
+            fp.write(etag.encode())
+            fp.write(b"\n")
+            fp.write(body)
+        os.replace(filepath + ".tmp", filepath)
+
+    def prune(self, files: FileTable, previous_files: Optional[FileTable]) -> None:
+        """
+        Remove the responses of the files that no longer exist, or were modified since the previous file list.
+
+        Args:
+            files: All files of the project
+            previous_files: The file list the cached responses were requested with, `None` if unknown, in which case
+                only the responses of deleted files are removed
+        """
+        previous_modified_ats = (
+            dict(zip(previous_files.ids, previous_files.modified_ats)) if previous_files is not None else {}
+        )
+        up_to_date_ids = {
+            file_id
+            for file_id, modified_at in zip(files.ids, files.modified_ats)
+            if previous_files is None or previous_modified_ats.get(file_id, modified_at) == modified_at
+        }
+        for name in os.listdir(self.cache_dir):
+            file_id, sep, _ = name.partition("-")
+            if sep and name.endswith(".bin") and file_id.isdigit() and int(file_id) not in up_to_date_ids:
+                os.remove(os.path.join(self.cache_dir, name))
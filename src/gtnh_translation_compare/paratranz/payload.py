@@ -0,0 +1,136 @@
+import asyncio
+import os
+import uuid
+from typing import Iterator, Sequence, List, Dict, AsyncIterator, Iterable, Callable
+
+import pydantic_core
+from pydantic import TypeAdapter
+
+from gtnh_translation_compare.paratranz.types import StringItem, FileExtra, Property, ParatranzFile
+
+# number of string items or properties encoded at a time
+BATCH_SIZE = 500
+# number of characters of a long string encoded at a time
+STRING_CHUNK_SIZE = 64 * 1024
+
+_STRING_LIST_ADAPTER: TypeAdapter[List[StringItem]] = TypeAdapter(List[StringItem])
+_PROPERTY_DICT_ADAPTER: TypeAdapter[Dict[str, Property]] = TypeAdapter(Dict[str, Property])
+
+
+def _strip_brackets(encoded: bytes) -> bytes:
+    # `[...]` or `{...}` -> `...`
+    return encoded[1:-1]
+
+
+def iter_string_items_json(string_items: Sequence[StringItem], batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Encode string items as a JSON array, one batch at a time.
+
+    Args:
+        string_items: The string items
+        batch_size: The number of string items encoded per chunk
+
+    Returns:
+        The chunks of the JSON array, `None` fields are left out
+    """
+    yield b"["
+    for i in range(0, len(string_items), batch_size):
+        batch = _STRING_LIST_ADAPTER.dump_json(list(string_items[i : i + batch_size]), exclude_none=True)
+        yield (b"," if i else b"") + _strip_brackets(batch)
+    yield b"]"
+
+
+def iter_string_json(s: str, chunk_size: int = STRING_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encode a string as a JSON string, one slice at a time.
+    """
+    yield b'"'
+    for i in range(0, len(s), chunk_size):
+        yield pydantic_core.to_json(s[i : i + chunk_size])[1:-1]
+    yield b'"'
+
+
+def iter_file_extra_json(file_extra: FileExtra, batch_size: int = BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Encode the body of the `extra` PUT, `{"extra": {...}}`, without building the whole document.
+    """
+    yield b'{"extra":{"original":'
+    yield from iter_string_json(file_extra.original)
+    yield b',"properties":{'
+    items = list(file_extra.properties.items())
+    for i in range(0, len(items), batch_size):
+        batch = _PROPERTY_DICT_ADAPTER.dump_json(dict(items[i : i + batch_size]))
+        yield (b"," if i else b"") + _strip_brackets(batch)
+    yield b'},"en_us_relpath":' + pydantic_core.to_json(file_extra.en_us_relpath)
+    yield b',"target_relpath":' + pydantic_core.to_json(file_extra.target_relpath)
+    yield b"}}"
+
+
+async def aiter_chunks(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Hand synchronously encoded chunks to httpx, letting other tasks run between chunks.
+    """
+    for chunk in chunks:
+        yield chunk
+        await asyncio.sleep(0)
+
+
+class MultipartBody:
+    """
+    A `multipart/form-data` body with text fields and one file part, which is encoded as it is sent.
+
+    httpx needs the whole file content up front for `files=`, pass this through `aiter_chunks` as `content=` instead,
+    it is sent with chunked transfer encoding.
+    """
+
+    def __init__(
+        self,
+        fields: Dict[str, str],
+        file_field: str,
+        filename: str,
+        content_type: str,
+        chunks: Callable[[], Iterable[bytes]],
+    ):
+        """
+        Args:
+            fields: The text fields
+            file_field: The name of the file field
+            filename: The file name of the file part
+            content_type: The content type of the file part
+            chunks: Returns the chunks of the file content, called each time the body is sent
+        """
+        self.boundary = uuid.uuid4().hex
+        self.fields = fields
+        self.file_field = file_field
+        self.filename = filename
+        self.content_type = content_type
+        self.chunks = chunks
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Content-Type": f"multipart/form-data; boundary={self.boundary}"}
+
+    def __iter__(self) -> Iterator[bytes]:
+        boundary = self.boundary.encode()
+        for name, value in self.fields.items():
+            yield b"--" + boundary + b"\r\n"
+            yield f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+            yield value.encode() + b"\r\n"
+        yield b"--" + boundary + b"\r\n"
+        yield f'Content-Disposition: form-data; name="{self.file_field}"; filename="{self.filename}"\r\n'.encode()
+        yield f"Content-Type: {self.content_type}\r\n\r\n".encode()
+        yield from self.chunks()
+        yield b"\r\n--" + boundary + b"--\r\n"
+
+
+def file_upload_body(paratranz_file: ParatranzFile, fields: Dict[str, str]) -> MultipartBody:
+    """
+    The body to create or update a file with, the strings as a JSON file named after the Paratranz file.
+    """
+    return MultipartBody(
+        fields=fields,
+        file_field="file",
+        filename=os.path.basename(paratranz_file.file_name),
+        content_type="application/json",
+        chunks=lambda: iter_string_items_json(paratranz_file.string_items),
+    )
@@ -0,0 +1,189 @@
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, replace, fields
+from typing import Dict, Optional, Callable, Awaitable, Deque, Any
+
+import httpx
+from loguru import logger
+
+
+# noinspection PyUnresolvedReferences
+@dataclass(frozen=True)
+class EndpointPolicy:
+    """
+    How requests to one Paratranz endpoint are timed out, retried and hedged
+
+    Attributes:
+        timeout (float): Seconds before a request times out
+        retries (int): Extra attempts after a 5xx response or a timeout
+        backoff (float): Upper bound in seconds of the jittered wait before the first retry, doubled per retry
+        hedge (bool): Send a duplicate request when the first one is slower than the p95 latency of the endpoint,
+            only for idempotent reads
+    """
+
+    timeout: float = 60
+    retries: int = 2
+    backoff: float = 1
+    hedge: bool = False
+
+
+# creating a file or a string is not idempotent, a retry after a timeout could create it twice
+DEFAULT_ENDPOINT_POLICIES: Dict[str, EndpointPolicy] = {
+    "get_all_files": EndpointPolicy(timeout=60),
+    "get_file": EndpointPolicy(timeout=30),
+    "get_strings": EndpointPolicy(timeout=30, hedge=True),
+    "create_file": EndpointPolicy(timeout=300, retries=0),
+    "update_file": EndpointPolicy(timeout=300),
+    "save_file_extra": EndpointPolicy(timeout=120),
+    "create_string": EndpointPolicy(timeout=30, retries=0),
+    "patch_strings": EndpointPolicy(timeout=30),
+    "get_artifact_info": EndpointPolicy(timeout=30),
+    "download_artifact": EndpointPolicy(timeout=600),
+}
+
+
+def parse_endpoint_policies(value: str) -> Dict[str, EndpointPolicy]:
+    """
+    Parse endpoint policy overrides on top of the defaults.
+
+    Args:
+        value: e.g. "get_strings=timeout:20,retries:4,hedge:false;get_file=timeout:10"
+
+    Returns:
+        The policy of every endpoint
+    """
+    policies = dict(DEFAULT_ENDPOINT_POLICIES)
+    field_types = {f.name: f.type for f in fields(EndpointPolicy)}
+    for item in value.split(";"):
+        if not item.strip():
+            continue
+        endpoint, sep, overrides = item.strip().partition("=")
+        if not sep or endpoint not in policies:
+            raise ValueError(f"Invalid endpoint policy: {item!r}")
+        changes: Dict[str, Any] = {}
+        for override in overrides.split(","):
+            name, sep, raw = override.strip().partition(":")
+            if not sep or name not in field_types:
+                raise ValueError(f"Invalid endpoint policy: {item!r}")
+            field_type = field_types[name]
+            changes[name] = raw.lower() == "true" if field_type is bool else field_type(raw)  # type: ignore[operator]
+        policies[endpoint] = replace(policies[endpoint], **changes)
+    return policies
+
+
+class LatencyTracker:
+    """
+    The latencies of the recent successful requests to an endpoint.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+
+def _is_transient(res: httpx.Response) -> bool:
+    return 500 <= res.status_code < 600
+
+
+class RequestStart:
+    """
+    Set by `send` once the request is actually sent, after waiting for a local concurrency slot. The hedge delay and
+    the recorded latency are measured from it, so time spent queueing locally is not taken for a slow server.
+    """
+
+    def __init__(self) -> None:
+        self.at: Optional[float] = None
+        self._event = asyncio.Event()
+
+    def set(self) -> None:
+        self.at = time.monotonic()
+        self._event.set()
+
+    async def wait(self) -> None:
+        await self._event.wait()
+
+
+Send = Callable[[RequestStart], Awaitable[httpx.Response]]
+
+
+async def _hedged(
+    send: Send, start: RequestStart, delay: float, may_hedge: Callable[[], bool], name: str
+) -> httpx.Response:
+    first = asyncio.ensure_future(send(start))
+    started = asyncio.ensure_future(start.wait())
+    await asyncio.wait({first, started}, return_when=asyncio.FIRST_COMPLETED)
+    started.cancel()
+    if not first.done():
+        await asyncio.wait({first}, timeout=delay)
+    if first.done():
+        return first.result()
+    if not may_hedge():
+        # another request would only queue behind the ones in flight
+        return await first
+    logger.info("{}: no response after the p95 latency {:.2f}s, sending a hedged request", name, delay)
+    second = asyncio.ensure_future(send(RequestStart()))
+    pending = {first, second}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        # both failed, report the first one
+        return first.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def send_with_policy(
+    send: Send,
+    policy: EndpointPolicy,
+    tracker: LatencyTracker,
+    name: str,
+    may_hedge: Callable[[], bool] = lambda: True,
+) -> httpx.Response:
+    """
+    Send a request, retrying 5xx responses and timeouts with jittered exponential backoff, and hedging it if the
+    policy allows.
+
+    Args:
+        send: Sends the request once and sets the `RequestStart` when it is sent, it is called again for every retry
+            or hedged request
+        policy: The policy of the endpoint
+        tracker: The latencies of the endpoint
+        name: The request name for logs
+        may_hedge: Whether a hedged request may be sent now, e.g. not while the concurrency limit is reached
+
+    Returns:
+        The first non-5xx response, or the last response once the retries are used up
+    """
+    attempt = 0
+    while True:
+        start = RequestStart()
+        delay = tracker.p95() if policy.hedge else None
+        try:
+            res = await (_hedged(send, start, delay, may_hedge, name) if delay is not None else send(start))
+        except httpx.TimeoutException as e:
+            if attempt >= policy.retries:
+                raise
+            logger.warning("{}: {}, retrying", name, type(e).__name__)
+        else:
+            if not _is_transient(res) or attempt >= policy.retries:
+                if not _is_transient(res) and start.at is not None:
+                    tracker.record(time.monotonic() - start.at)
+                return res
+            logger.warning("{}: received {}, retrying", name, res.status_code)
+        await asyncio.sleep(random.uniform(0, policy.backoff * 2**attempt))
+        attempt += 1
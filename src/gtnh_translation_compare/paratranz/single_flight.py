@@ -0,0 +1,41 @@
+import asyncio
+from typing import Dict, Hashable, Callable, Awaitable, TypeVar, Generic, Any
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """
+    Concurrent calls with the same key share one in-flight call and its result.
+
+    The shared call runs as its own task, so a caller being cancelled does not cancel it for the others. Results are
+    not kept once the call finishes.
+
+    Attributes:
+        hits (int): Calls which joined a call already in flight
+        misses (int): Calls which started a new call
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._in_flight: Dict[Hashable, "asyncio.Task[T]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._in_flight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._run(key, fn))
+            self._in_flight[key] = task
+        else:
+            self.hits += 1
+        return await asyncio.shield(task)
+
+    async def _run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            return await fn()
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "in_flight": len(self._in_flight)}
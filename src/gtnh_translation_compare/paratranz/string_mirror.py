@@ -0,0 +1,67 @@
+import base64
+import glob
+import json
+import os
+from typing import Optional, List, Iterable
+
+from gtnh_translation_compare.paratranz.string_table import StringTable
+from gtnh_translation_compare.paratranz.types import File
+
+
+class StringMirror:
+    """
+    A local copy of the strings of every file in a Paratranz project, keyed by file id and stored as the columns of
+    a `StringTable`.
+
+    A mirrored file is valid as long as its `modified_at` equals the one in the latest file list.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _calc_path(self, f: File) -> str:
+        version = base64.urlsafe_b64encode(f"{f.modified_at}".encode()).decode()
+        return os.path.join(self.cache_dir, f"{f.id}-{version}.json")
+
+    def _glob_paths(self, file_id: int) -> List[str]:
+        return glob.glob(os.path.join(glob.escape(self.cache_dir), f"{file_id}-*.json"))
+
+    def is_fresh(self, f: File) -> bool:
+        return os.path.exists(self._calc_path(f))
+
+    # noinspection PyBroadException
+    def get(self, f: File) -> Optional[StringTable]:
+        try:
+            filepath = self._calc_path(f)
+            with open(filepath, "r", encoding="utf-8") as fp:
+                strings = StringTable.from_columns(json.load(fp))
+            # update file modified time when valid mirror found
+            os.utime(filepath)
+            return strings
+        except Exception:
+            return None
+
+    def set(self, f: File, strings: StringTable) -> None:
+        self.remove(f.id)
+        filepath = self._calc_path(f)
+        with open(filepath + ".tmp", "w", encoding="utf-8") as fp:
+            json.dump(strings.to_columns(), fp, ensure_ascii=False)
+        os.replace(filepath + ".tmp", filepath)
+
+    def remove(self, file_id: int) -> None:
+        for filepath in self._glob_paths(file_id):
+            os.remove(filepath)
+
+    def prune(self, file_ids: Iterable[int]) -> None:
+        """
+        Remove the mirrored files that no longer exist in the project.
+
+        Args:
+            file_ids: The ids of all files of the project
+        """
+        known_ids = set(file_ids)
+        for name in os.listdir(self.cache_dir):
+            file_id, sep, _ = name.partition("-")
+            if sep and name.endswith(".json") and file_id.isdigit() and int(file_id) not in known_ids:
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,90 @@
+from typing import List, Optional, Dict, Iterable, Sequence, Any, overload
+
+from gtnh_translation_compare.paratranz.types import StringItem, StringRow
+
+# the columns of a StringTable, in the order of the StringItem fields
+_COLUMNS = ("ids", "keys", "originals", "translations", "contexts", "stages")
+
+
+class StringTable(Sequence[StringItem]):
+    """
+    The strings of a file in parallel columns, with an index from key to row.
+
+    `StringItem` models are only built for the rows that are accessed, reading a translation by key goes through
+    `find` and the columns instead.
+    """
+
+    def __init__(self) -> None:
+        self.ids: List[Optional[int]] = []
+        self.keys: List[str] = []
+        self.originals: List[str] = []
+        self.translations: List[str] = []
+        self.contexts: List[Optional[str]] = []
+        self.stages: List[Optional[int]] = []
+        self._index: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def from_items(cls, items: Iterable[StringItem]) -> "StringTable":
+        table = cls()
+        for s in items:
+            table.ids.append(s.id)
+            table.keys.append(s.key)
+            table.originals.append(s.original)
+            table.translations.append(s.translation)
+            table.contexts.append(s.context)
+            table.stages.append(s.stage)
+        return table
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List[Any]]) -> "StringTable":
+        table = cls()
+        for name in _COLUMNS:
+            setattr(table, name, columns[name])
+        if any(len(getattr(table, name)) != len(table.keys) for name in _COLUMNS):
+            raise ValueError("Columns of a string table must have the same length")
+        return table
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        return {name: getattr(self, name) for name in _COLUMNS}
+
+    def extend_rows(self, rows: Iterable[StringRow]) -> None:
+        for r in rows:
+            self.ids.append(r["id"])
+            self.keys.append(r["key"])
+            self.originals.append(r["original"])
+            self.translations.append(r.get("translation", ""))
+            self.contexts.append(r.get("context"))
+            self.stages.append(r.get("stage"))
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @overload
+    def __getitem__(self, index: int) -> StringItem:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[StringItem]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> StringItem | Sequence[StringItem]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return StringItem.model_construct(
+            id=self.ids[index],
+            key=self.keys[index],
+            original=self.originals[index],
+            translation=self.translations[index],
+            context=self.contexts[index],
+            stage=self.stages[index],
+        )
+
+    def find(self, key: str) -> Optional[int]:
+        """
+        Returns:
+            The row of the key, the last one if the key is duplicated
+        """
+        if self._index is None:
+            self._index = {k: i for i, k in enumerate(self.keys)}
+        return self._index.get(key)
@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import List, Sequence, Union
+
+from gtnh_translation_compare.filetypes import Language
+
+
+# noinspection PyUnresolvedReferences
+@dataclass(frozen=True)
+class Target:
+    """
+    A target language and the Paratranz project it is translated in
+
+    Attributes:
+        language (Language): The target language
+        project_id (int): The Paratranz project id
+    """
+
+    language: Language
+    project_id: int
+
+
+def parse_targets(targets: Union[str, Sequence[str]]) -> List[Target]:
+    """
+    Parse targets in the form of `zh_CN:1234,ja_JP:5678`.
+
+    Args:
+        targets: Comma separated `language:project_id` pairs, or a sequence of them
+
+    Returns:
+        The targets, without duplicates
+    """
+    items = targets.split(",") if isinstance(targets, str) else targets
+    result: List[Target] = []
+    for item in items:
+        item = item.strip()
+        if item == "":
+            continue
+        language, sep, project_id = item.partition(":")
+        if sep == "" or not project_id.strip().isdigit():
+            raise ValueError(f"Invalid target: {item}, expected language:project_id")
+        target = Target(Language.from_str(language.strip()), int(project_id))
+        if target not in result:
+            result.append(target)
+    return result
@@ -1,15 +1,12 @@
-import json
-import os
-from typing import Dict, Any, Optional, TypeAlias, List, Tuple
+import hashlib
+from typing import Dict, Any, Optional, TypeAlias, List, Set
 
 from loguru import logger
-from pydantic import BaseModel as BaseModel, Field, model_validator, AliasChoices
+from pydantic import BaseModel as BaseModel, Field, model_validator, AliasChoices, TypeAdapter
+from typing_extensions import TypedDict, NotRequired
 
 from gtnh_translation_compare.filetypes import Language
 
-# [file_name, file_content, mime_type]
-FileToBeUploaded: TypeAlias = Tuple[str, str, str]
-
 
 class File(BaseModel):
     id: int
@@ -18,6 +15,21 @@ class File(BaseModel):
     extra: Optional[Dict[str, Any]] = Field(None)
 
 
+class ArtifactInfo(BaseModel):
+    """
+    The last export of a project
+
+    Attributes:
+        created_at (str): When the export was made, files modified later are not up to date in it
+    """
+
+    created_at: str = Field(validation_alias=AliasChoices("createdAt", "created_at"))
+
+
+# decodes the file list straight from the response body
+FILE_LIST_ADAPTER: TypeAdapter[List[File]] = TypeAdapter(List[File])
+
+
 class StringItem(BaseModel):
     id: Optional[int] = Field(None)
     key: str
@@ -30,9 +42,22 @@ class StringItem(BaseModel):
 StringList: TypeAlias = List[StringItem]
 
 
-class StringPage(BaseModel):
-    page_count: int = Field(validation_alias=AliasChoices("pageCount", "page_count"))
-    results: StringList
+# a string as returned by the API, decoded as a plain dict on its way into a `StringTable`
+class StringRow(TypedDict):
+    id: Optional[int]
+    key: str
+    original: str
+    translation: NotRequired[str]
+    context: NotRequired[Optional[str]]
+    stage: NotRequired[Optional[int]]
+
+
+class StringPage(TypedDict):
+    pageCount: int
+    results: List[StringRow]
+
+
+STRING_PAGE_ADAPTER: TypeAdapter[StringPage] = TypeAdapter(StringPage)
 
 
 ###
@@ -66,14 +91,21 @@ class ParatranzFile(BaseModel):
     file_name: str
     file_extra: FileExtra
     string_items: StringList
+    # the keys changed since the file was last uploaded, when known, only these strings are compared to the server
+    changed_keys: Optional[Set[str]] = None
 
     @property
-    def file_to_be_uploaded(self) -> FileToBeUploaded:
-        return (
-            os.path.basename(self.file_name),
-            json.dumps([s.model_dump(exclude_none=True) for s in self.string_items]),
-            "application/json",
-        )
+    def fingerprint(self) -> str:
+        """
+        Identifies the content to be uploaded, the strings and properties are all derived from the original.
+        """
+        h = hashlib.sha256()
+        h.update(self.file_name.encode())
+        h.update(b"\0")
+        h.update(self.file_extra.target_relpath.encode())
+        h.update(b"\0")
+        h.update(self.file_extra.original.encode())
+        return h.hexdigest()
 
 
 class TranslationFile(BaseModel):
@@ -0,0 +1,45 @@
+import json
+import os
+from typing import Optional, Set, Tuple
+
+
+class UploadJournal:
+    """
+    A persistent record of completed uploads, keyed by file name and content fingerprint.
+
+    Every record is appended as one JSON line and synced to disk before the next upload starts, so the journal
+    survives the process being killed. A partially written last line is ignored when reading.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._done: Optional[Set[Tuple[str, str]]] = None
+
+    def _load(self) -> Set[Tuple[str, str]]:
+        if self._done is None:
+            self._done = set()
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as fp:
+                    for line in fp:
+                        try:
+                            record = json.loads(line)
+                            self._done.add((record["file_name"], record["fingerprint"]))
+                        except (ValueError, KeyError, TypeError):
+                            continue
+        return self._done
+
+    def is_done(self, file_name: str, fingerprint: str) -> bool:
+        return (file_name, fingerprint) in self._load()
+
+    def record(self, file_name: str, fingerprint: str) -> None:
+        self._load().add((file_name, fingerprint))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fp:
+            fp.write(json.dumps({"file_name": file_name, "fingerprint": fingerprint}, ensure_ascii=False) + "\n")
+            fp.flush()
+            os.fsync(fp.fileno())
+
+    def clear(self) -> None:
+        self._done = set()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,7 +1,10 @@
 import os
 
 from gtnh_translation_compare.filetypes import Language
+from gtnh_translation_compare.paratranz.request_policy import parse_endpoint_policies
+from gtnh_translation_compare.paratranz.target import parse_targets
 from gtnh_translation_compare.utils.env import must_get_env
+from gtnh_translation_compare.utils.failures import FailurePolicy
 
 # NOTE: DO NOT MODIFY THIS THE DEFAULT VALUE IN THE CODE, USE ENVIRONMENT VARIABLES TO OVERRIDE
 TARGET_LANG = Language.from_str(os.environ.get("TARGET_LANG", "zh_CN"))
@@ -24,11 +27,47 @@ GT_LANG_TARGET_REL_PATH = "GregTech.lang"
 
 PARATRANZ_PROJECT_ID = int(must_get_env("PARATRANZ_PROJECT_ID"))
 PARATRANZ_TOKEN = must_get_env("PARATRANZ_TOKEN")
+# Upload to several languages in one run, e.g. "zh_CN:4964,ja_JP:5678", every project must accept PARATRANZ_TOKEN
+PARATRANZ_TARGETS = parse_targets(os.environ.get("PARATRANZ_TARGETS", f"{TARGET_LANG.value}:{PARATRANZ_PROJECT_ID}"))
 
 GIT_AUTHOR = os.environ.get("GIT_AUTHOR", None)
 CLOSE_ISSUE_IN_COMMIT_MESSAGE = os.environ.get("CLOSE_ISSUE_IN_COMMIT_MESSAGE", "true").lower() == "true"
 
 PARATRANZ_CACHE_DIR = os.environ.get("PARATRANZ_CACHE_DIR", ".paratranz_cache")
+SOURCE_CACHE_DIR = os.environ.get("SOURCE_CACHE_DIR", os.path.join(PARATRANZ_CACHE_DIR, "sources"))
+
+# Existing files are patched string by string while at most this share of keys changed,
+# set it to empty to always upload the whole file
+_PARATRANZ_PATCH_MAX_CHANGE_RATIO = os.environ.get("PARATRANZ_PATCH_MAX_CHANGE_RATIO", "0.2")
+PARATRANZ_PATCH_MAX_CHANGE_RATIO = (
+    float(_PARATRANZ_PATCH_MAX_CHANGE_RATIO) if _PARATRANZ_PATCH_MAX_CHANGE_RATIO else None
+)
+# and at most this many strings changed, each change is one request
+PARATRANZ_PATCH_MAX_CHANGES = int(os.environ.get("PARATRANZ_PATCH_MAX_CHANGES", "200"))
+
+# Validate Paratranz responses and cache entries in pydantic strict mode
+PARATRANZ_STRICT_VALIDATION = os.environ.get("PARATRANZ_STRICT_VALIDATION", "false").lower() == "true"
+
+# Override the timeout, retries and hedging of Paratranz endpoints,
+# e.g. "get_strings=timeout:20,retries:4,hedge:false;get_file=timeout:10"
+PARATRANZ_ENDPOINT_POLICIES = parse_endpoint_policies(os.environ.get("PARATRANZ_ENDPOINT_POLICIES", ""))
+
+# The requests in flight per Paratranz project start at PARATRANZ_CONCURRENCY and adapt to how the server responds,
+# up to PARATRANZ_MAX_CONCURRENCY, which also bounds the files uploaded at a time
+PARATRANZ_CONCURRENCY = int(os.environ.get("PARATRANZ_CONCURRENCY", "10"))
+PARATRANZ_MAX_CONCURRENCY = int(os.environ.get("PARATRANZ_MAX_CONCURRENCY", "32"))
+PARATRANZ_PAGE_SIZE = int(os.environ.get("PARATRANZ_PAGE_SIZE", "800"))
+
+# What a bulk upload does when a file fails for good: "fail_fast" cancels the other uploads, "continue" uploads the
+# remaining files, both write the failed files to PARATRANZ_CACHE_DIR/failed_uploads_<command>.json
+UPLOAD_FAILURE_POLICY = FailurePolicy.from_str(os.environ.get("UPLOAD_FAILURE_POLICY", "fail_fast"))
+
+# Build the files downloaded from Paratranz from the latest project artifact instead of requesting their strings
+PARATRANZ_BULK_DOWNLOAD = os.environ.get("PARATRANZ_BULK_DOWNLOAD", "false").lower() == "true"
+
+# Process the modpack one file at a time and keep the estimated memory of files in flight within the budget
+LOW_MEMORY = os.environ.get("LOW_MEMORY", "false").lower() == "true"
+MEMORY_BUDGET_MB = int(os.environ.get("MEMORY_BUDGET_MB", "256"))
 
 __all__ = [
     "TARGET_LANG",
@@ -39,6 +78,20 @@ __all__ = [
     "GT_LANG_TARGET_REL_PATH",
     "PARATRANZ_PROJECT_ID",
     "PARATRANZ_TOKEN",
+    "PARATRANZ_TARGETS",
     "GIT_AUTHOR",
     "CLOSE_ISSUE_IN_COMMIT_MESSAGE",
+    "PARATRANZ_CACHE_DIR",
+    "SOURCE_CACHE_DIR",
+    "PARATRANZ_PATCH_MAX_CHANGE_RATIO",
+    "PARATRANZ_PATCH_MAX_CHANGES",
+    "PARATRANZ_STRICT_VALIDATION",
+    "PARATRANZ_ENDPOINT_POLICIES",
+    "PARATRANZ_CONCURRENCY",
+    "PARATRANZ_MAX_CONCURRENCY",
+    "PARATRANZ_PAGE_SIZE",
+    "UPLOAD_FAILURE_POLICY",
+    "PARATRANZ_BULK_DOWNLOAD",
+    "LOW_MEMORY",
+    "MEMORY_BUDGET_MB",
 ]
@@ -0,0 +1,52 @@
+import marshal
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from gtnh_translation_compare.filetypes.lang_reparse import LangLines
+
+_FORMAT_VERSION = 1
+
+
+# noinspection PyUnresolvedReferences
+@dataclass
+class LangParseState:
+    """
+    The last uploaded version of a lang file, which the next version is reparsed against
+
+    Attributes:
+        commit_sha (str): The commit the version was fetched at
+        lines (LangLines): The parsed lines of the version
+        project_ids (List[int]): The Paratranz projects the version was uploaded to
+    """
+
+    commit_sha: str
+    lines: LangLines
+    project_ids: List[int]
+
+    # noinspection PyBroadException
+    @classmethod
+    def read(cls, path: str) -> Optional["LangParseState"]:
+        try:
+            with open(path, "rb") as fp:
+                version, commit_sha, lines, keys, value_starts, project_ids = marshal.load(fp)
+            if version != _FORMAT_VERSION:
+                return None
+            return cls(commit_sha, LangLines(lines, keys, value_starts), project_ids)
+        except Exception:
+            return None
+
+    def write(self, path: str) -> None:
+        with open(path + ".tmp", "wb") as fp:
+            marshal.dump(
+                (
+                    _FORMAT_VERSION,
+                    self.commit_sha,
+                    self.lines.lines,
+                    self.lines.keys,
+                    self.lines.value_starts,
+                    self.project_ids,
+                ),
+                fp,
+            )
+        os.replace(path + ".tmp", path)
@@ -0,0 +1,136 @@
+import base64
+import codecs
+import os
+import re
+from typing import Optional, Tuple, AsyncIterator, Iterator
+
+from httpx import AsyncClient
+from loguru import logger
+from pydantic import BaseModel
+
+_COMMIT_SHA_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+def is_commit_sha(ref: Optional[str]) -> bool:
+    """
+    Check whether a git ref is a full commit sha, whose content never changes.
+
+    Args:
+        ref: The git ref, e.g. a branch name or a commit sha
+
+    Returns:
+        True if the ref is a full commit sha
+    """
+    return ref is not None and _COMMIT_SHA_PATTERN.match(ref) is not None
+
+
+class SourceMeta(BaseModel):
+    url: str
+    etag: Optional[str] = None
+    encoding: str = "utf-8"
+
+    # noinspection PyBroadException
+    @classmethod
+    def read(cls, path: str) -> Optional["SourceMeta"]:
+        try:
+            with open(path, "r") as fp:
+                return cls.model_validate_json(fp.read())
+        except Exception:
+            return None
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as fp:
+            fp.write(self.model_dump_json())
+
+
+class SourceFetcher:
+    """
+    Downloads source files (quest book template, GT lang, ...) and keeps a local copy of each of them.
+
+    Immutable sources, e.g. a file at a commit sha, are served from the local copy without any network request.
+    Other sources are revalidated with a conditional GET on their ETag.
+    """
+
+    def __init__(self, client: AsyncClient, cache_dir: str) -> None:
+        self.client = client
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _calc_cache_paths(self, url: str) -> Tuple[str, str]:
+        name = base64.urlsafe_b64encode(url.encode()).decode()
+        return os.path.join(self.cache_dir, f"{name}.body"), os.path.join(self.cache_dir, f"{name}.json")
+
+    async def fetch(self, url: str, immutable: bool = False) -> str:
+        """
+        Get the text of a source file.
+
+        Args:
+            url: The url of the source file
+            immutable: Whether the content behind the url never changes, e.g. it is pinned to a commit sha
+
+        Returns:
+            The text of the source file
+        """
+        return "".join([chunk async for chunk in self.stream(url, immutable)])
+
+    async def stream(self, url: str, immutable: bool = False) -> AsyncIterator[str]:
+        """
+        Get the text of a source file chunk by chunk, as soon as each chunk is downloaded or read from the local copy.
+
+        Args:
+            url: The url of the source file
+            immutable: Whether the content behind the url never changes, e.g. it is pinned to a commit sha
+
+        Returns:
+            An async iterator of the decoded chunks
+        """
+        body_path, meta_path = self._calc_cache_paths(url)
+        meta = SourceMeta.read(meta_path) if os.path.exists(body_path) else None
+
+        if meta is not None and immutable:
+            logger.info("fetch_source[url={}]: cache hit", url)
+            for chunk in self._read_body(body_path, meta_path, meta):
+                yield chunk
+            return
+
+        headers = {}
+        if meta is not None and meta.etag is not None:
+            headers["If-None-Match"] = meta.etag
+        async with self.client.stream("GET", url=url, headers=headers) as res:
+            if res.status_code == 304 and meta is not None:
+                logger.info("fetch_source[url={}]: not modified", url)
+                for chunk in self._read_body(body_path, meta_path, meta):
+                    yield chunk
+                return
+            if res.status_code != 200:
+                raise ValueError(f"Failed to get source file from {url}")
+
+            logger.info("fetch_source[url={}]: cache miss", url)
+            meta = SourceMeta(url=url, etag=res.headers.get("ETag"), encoding=res.encoding or "utf-8")
+            decoder = codecs.getincrementaldecoder(meta.encoding)(errors="replace")
+            tmp_body_path = body_path + ".tmp"
+            try:
+                with open(tmp_body_path, "wb") as fp:
+                    async for raw_chunk in res.aiter_bytes():
+                        fp.write(raw_chunk)
+                        chunk = decoder.decode(raw_chunk)
+                        if chunk:
+                            yield chunk
+                chunk = decoder.decode(b"", final=True)
+                if chunk:
+                    yield chunk
+                os.replace(tmp_body_path, body_path)
+                meta.write(meta_path)
+            finally:
+                if os.path.exists(tmp_body_path):
+                    os.remove(tmp_body_path)
+
+    @staticmethod
+    def _read_body(body_path: str, meta_path: str, meta: SourceMeta) -> Iterator[str]:
+        with open(body_path, "r", encoding=meta.encoding, errors="replace", newline="") as fp:
+            while chunk := fp.read(_READ_CHUNK_SIZE):
+                yield chunk
+        # update file modified time when valid cache found
+        os.utime(body_path)
+        os.utime(meta_path)
@@ -0,0 +1,82 @@
+import json
+import os
+from enum import Enum
+from typing import Dict, List, Optional
+
+
+class FailurePolicy(Enum):
+    """
+    What a bulk upload does when a file fails for good.
+
+    `fail_fast` cancels the uploads in flight and stops, `continue` uploads the remaining files and fails at the end.
+    """
+
+    fail_fast = "fail_fast"
+    continue_ = "continue"
+
+    @classmethod
+    def from_str(cls, s: str) -> "FailurePolicy":
+        return cls(s)
+
+
+class FailureLog:
+    """
+    The files which did not finish in a bulk upload, written as JSON so that they can be retried on their own.
+
+    The file holds `{"complete": bool, "failed": [{"file": relpath, "error": message}, ...], "pending": [relpath]}`.
+    Pending files were cancelled in flight. A log is not complete when the run stopped early: the files not reached
+    yet are in neither list, so retrying only the listed files would skip them. The log is removed after a run
+    without failures.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.complete = True
+        self.failed: Dict[str, str] = {}
+        self.pending: List[str] = []
+
+    def record(self, file: str, error: BaseException) -> None:
+        self.failed[file] = f"{type(error).__name__}: {error}"
+
+    def mark_pending(self, file: str) -> None:
+        if file not in self.failed:
+            self.pending.append(file)
+
+    @property
+    def files(self) -> List[str]:
+        return [*self.failed, *self.pending]
+
+    def write(self) -> None:
+        if not self.failed and not self.pending and self.complete:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path + ".tmp", "w", encoding="utf-8") as fp:
+            json.dump(
+                {
+                    "complete": self.complete,
+                    "failed": [{"file": file, "error": error} for file, error in self.failed.items()],
+                    "pending": self.pending,
+                },
+                fp,
+                ensure_ascii=False,
+                indent=2,
+            )
+        os.replace(self.path + ".tmp", self.path)
+
+    @classmethod
+    def read(cls, path: str) -> Optional["FailureLog"]:
+        """
+        Returns:
+            The failure log of the last run, `None` if the last run had no failures
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as fp:
+            data = json.load(fp)
+        failure_log = cls(path)
+        failure_log.complete = data["complete"]
+        failure_log.failed = {failure["file"]: failure["error"] for failure in data["failed"]}
+        failure_log.pending = data["pending"]
+        return failure_log
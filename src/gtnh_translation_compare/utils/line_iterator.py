@@ -1,4 +1,4 @@
-from typing import Iterable, Tuple
+from typing import Iterable, Tuple, AsyncIterable, AsyncIterator
 
 
 def line_iterator(content: str) -> Iterable[Tuple[int, str, int, int]]:
@@ -16,3 +16,40 @@ def line_iterator(content: str) -> Iterable[Tuple[int, str, int, int]]:
         start = end + int(idx != 0)
         end = start + len(line)
         yield idx, line, start, end
+
+
+async def async_line_iterator(chunks: AsyncIterable[str]) -> AsyncIterator[Tuple[int, str, int, int]]:
+    """
+    Iterate over lines in a string that arrives in chunks.
+
+    Lines are split the same way as `str.splitlines`, so the result equals `line_iterator(content)` for the
+    concatenated chunks, without building the whole content. The indexes refer to the content with LF line breaks.
+
+    Args:
+        chunks: The chunks of the content to iterate over.
+
+    Returns:
+        An async iterator of tuples containing the line number, the line content, the start index and the end index.
+    """
+    idx = 0
+    end = 0
+    carry = ""
+    async for chunk in chunks:
+        parts = (carry + chunk).splitlines(keepends=True)
+        carry = ""
+        if parts:
+            last = parts[-1]
+            # a trailing "\r" may be the first half of a "\r\n" in the next chunk
+            if last.endswith("\r") or last.splitlines()[0] == last:
+                carry = parts.pop()
+        for part in parts:
+            line = part.splitlines()[0]
+            start = end + int(idx != 0)
+            end = start + len(line)
+            yield idx, line, start, end
+            idx += 1
+    if carry:
+        line = carry.splitlines()[0]
+        start = end + int(idx != 0)
+        end = start + len(line)
+        yield idx, line, start, end
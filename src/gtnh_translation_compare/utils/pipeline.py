@@ -0,0 +1,105 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Iterable, Callable, Awaitable, TypeVar, Union, Optional, AsyncIterator
+
+T = TypeVar("T")
+
+
+@asynccontextmanager
+async def task_group() -> AsyncIterator[asyncio.TaskGroup]:
+    """
+    An `asyncio.TaskGroup` which raises the first error as is instead of an `ExceptionGroup`, the first error cancels
+    the other tasks so the rest are only consequences of it.
+    """
+    try:
+        async with asyncio.TaskGroup() as tg:
+            yield tg
+    except ExceptionGroup as e:
+        raise e.exceptions[0] from None
+
+
+class MemoryBudget:
+    """
+    Limits the estimated memory of the items in flight, an item larger than the whole budget is let through alone.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.used = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, size: int) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.used == 0 or self.used + size <= self.limit)
+            self.used += size
+
+    async def release(self, size: int) -> None:
+        async with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+
+class _Done:
+    pass
+
+
+_DONE = _Done()
+
+
+async def run_pipeline(
+    source: Iterable[T],
+    worker: Callable[[T], Awaitable[None]],
+    workers: int,
+    queue_size: int,
+    weigh: Optional[Callable[[T], int]] = None,
+    memory_budget: Optional[int] = None,
+) -> None:
+    """
+    Feed the items of a blocking iterable to a fixed pool of workers through a bounded queue.
+
+    The iterable is advanced in a thread, so producing items overlaps with the workers, and at most `queue_size`
+    produced items wait for a worker at any time. The first error cancels the producer and the other workers and is
+    raised as is.
+
+    Args:
+        source: The items to process, e.g. files scanned lazily from a modpack
+        worker: The coroutine function to process an item with
+        workers: The number of workers
+        queue_size: The maximum number of items waiting for a worker
+        weigh: The function to estimate the memory of an item with, in bytes
+        memory_budget: The maximum estimated memory of the items produced but not yet processed, in bytes
+    """
+    queue: asyncio.Queue[Union[T, _Done]] = asyncio.Queue(maxsize=queue_size)
+    budget = MemoryBudget(memory_budget) if memory_budget is not None and weigh is not None else None
+
+    async def produce() -> None:
+        iterator = iter(source)
+        while True:
+            item = await asyncio.to_thread(next, iterator, _DONE)
+            if isinstance(item, _Done):
+                break
+            if budget is not None and weigh is not None:
+                await budget.acquire(weigh(item))
+            await queue.put(item)
+            del item
+        for _ in range(workers):
+            await queue.put(_DONE)
+
+    async def consume() -> None:
+        while True:
+            item = await queue.get()
+            if isinstance(item, _Done):
+                break
+            size = weigh(item) if budget is not None and weigh is not None else 0
+            try:
+                await worker(item)
+            finally:
+                # drop the reference before releasing the budget, so the item can be freed
+                del item
+                if budget is not None:
+                    await budget.release(size)
+
+    async with task_group() as tg:
+        tg.create_task(produce())
+        for _ in range(workers):
+            tg.create_task(consume())
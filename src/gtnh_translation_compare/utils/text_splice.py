@@ -0,0 +1,46 @@
+from typing import Iterable, Tuple, TypeAlias
+
+# [start, end, replacement]
+Edit: TypeAlias = Tuple[int, int, str]
+
+
+def splice(content: str, edits: Iterable[Edit]) -> str:
+    """
+    Replace spans of a string in one pass.
+
+    Only the text between the edits is sliced, and all segments are joined once at the end.
+
+    Args:
+        content: The string to edit.
+        edits: The spans to replace and their replacements, sorted by start and not overlapping.
+
+    Returns:
+        The edited string.
+    """
+    segments = []
+    left = 0
+    for start, end, replacement in edits:
+        segments.append(content[left:start])
+        segments.append(replacement)
+        left = end
+    if not segments:
+        return content
+    segments.append(content[left:])
+    return "".join(segments)
+
+
+def find_all(content: str, sub: str) -> Iterable[int]:
+    """
+    Find the start index of every occurrence of a substring, without copying the string.
+
+    Args:
+        content: The string to search in.
+        sub: The substring to search for.
+
+    Returns:
+        An iterable of the start indexes in ascending order.
+    """
+    start = content.find(sub)
+    while start != -1:
+        yield start
+        start = content.find(sub, start + len(sub))
@@ -0,0 +1,96 @@
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional
+
+import httpx
+import pytest
+
+# settings are read on import and need a project
+os.environ.setdefault("PARATRANZ_PROJECT_ID", "1")
+os.environ.setdefault("PARATRANZ_TOKEN", "token")
+
+from gtnh_translation_compare import settings  # noqa: E402
+from gtnh_translation_compare.cmd.action import Action  # noqa: E402
+from gtnh_translation_compare.filetypes import FiletypeLang  # noqa: E402
+from gtnh_translation_compare.paratranz.target import Target  # noqa: E402
+from gtnh_translation_compare.paratranz.types import File, FileExtra, Property  # noqa: E402
+
+Handler = Callable[[httpx.Request], httpx.Response]
+ActionBuilder = Callable[[Handler], Action]
+
+
+@pytest.fixture
+def new_action(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> ActionBuilder:
+    monkeypatch.setattr(settings, "PARATRANZ_CACHE_DIR", str(tmp_path / "paratranz_cache"))
+    monkeypatch.setattr(settings, "SOURCE_CACHE_DIR", str(tmp_path / "source_cache"))
+
+    def new(handler: Handler) -> Action:
+        action = Action()
+        # talk to the mock Paratranz instead
+        action.paratranz_client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"
+        )
+        action._client_wrappers.clear()
+        action._converters.clear()
+        action.client = action._get_client_wrapper(settings.PARATRANZ_PROJECT_ID)
+        action.converter = action._get_converter(Target(settings.TARGET_LANG, settings.PARATRANZ_PROJECT_ID))
+        return action
+
+    return new
+
+
+class MockParatranz:
+    """
+    A Paratranz project with lang files, serving the file list, the files with their extra and the string pages.
+    """
+
+    def __init__(self) -> None:
+        self.files: Dict[int, Dict[str, Any]] = {}
+        self.strings: Dict[int, List[Dict[str, Any]]] = {}
+        self.requests: List[httpx.Request] = []
+
+    def add_file(
+        self, name: str, target_relpath: str, content: str, translations: Dict[str, str], modified_at: str
+    ) -> File:
+        file_id = len(self.files) + 1
+        lang = FiletypeLang("en_US.lang", content)
+        extra = FileExtra(
+            original=lang.content,
+            properties={k: Property(key=p.key, start=p.start, end=p.end) for k, p in lang.properties.items()},
+            en_us_relpath="",
+            target_relpath=target_relpath,
+        )
+        file = File(id=file_id, name=name, modified_at=modified_at)
+        self.files[file_id] = {"id": file_id, "name": name, "modifiedAt": modified_at, "extra": extra.model_dump()}
+        self.strings[file_id] = [
+            {
+                "id": file_id * 1000 + i,
+                "key": k,
+                "original": p.value,
+                "translation": translations.get(k, ""),
+                "stage": 1,
+            }
+            for i, (k, p) in enumerate(lang.properties.items())
+        ]
+        return file
+
+    def paths(self, method: str = "GET") -> List[str]:
+        return [
+            r.url.path + (f"?file={r.url.params['file']}" if "file" in r.url.params else "")
+            for r in self.requests
+            if r.method == method
+        ]
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path.removeprefix(f"/api/projects/{settings.PARATRANZ_PROJECT_ID}")
+        if path == "/files":
+            listed = [{k: v for k, v in f.items() if k != "extra"} for f in self.files.values()]
+            return httpx.Response(200, content=json.dumps(listed), headers={"ETag": f'"{len(listed)}"'})
+        if path.startswith("/files/"):
+            return httpx.Response(200, json=self.files[int(path.removeprefix("/files/"))])
+        if path == "/strings":
+            results: Optional[List[Dict[str, Any]]] = self.strings.get(int(request.url.params["file"]))
+            return httpx.Response(200, json={"pageCount": 1, "results": results or []})
+        return httpx.Response(404)
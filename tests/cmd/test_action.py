@@ -0,0 +1,186 @@
+import asyncio
+from pathlib import Path
+from typing import List, Sequence, Dict, Any, Optional, Set
+
+import httpx
+import pytest
+from dulwich import porcelain
+from dulwich.object_store import iter_tree_contents
+from dulwich.repo import Repo
+
+from gtnh_translation_compare import settings
+from gtnh_translation_compare.cmd.action import Action
+from gtnh_translation_compare.filetypes import FiletypeLang, Filetype
+from gtnh_translation_compare.utils.failures import FailureLog
+from tests.cmd.conftest import ActionBuilder, MockParatranz
+
+FILES = [FiletypeLang(f"resources/mod{i}/lang/en_US.lang", "a=A\n") for i in range(30)]
+
+
+def not_found(_: httpx.Request) -> httpx.Response:
+    return httpx.Response(404)
+
+
+class FailingConverter:
+    async def to_paratranz_file(self, file: Filetype, changed_keys: Any = None) -> Any:
+        raise ValueError(f"cannot convert {file.relpath}")
+
+
+def upload(action: Action, policy: str, retry_failed: bool = False, resume: bool = False) -> None:
+    asyncio.run(
+        action._upload_files_to_targets("test", FILES, [], {}, policy, retry_failed, resume, workers=3, queue_size=3)
+    )
+
+
+def stub_uploads(action: Action, failing: str) -> List[str]:
+    uploaded: List[str] = []
+
+    async def upload_to_targets(file: Filetype, converters: Sequence[Any], journals: Dict[int, Any]) -> None:
+        await asyncio.sleep(0.01)
+        if file.relpath == failing:
+            raise ValueError("failed")
+        uploaded.append(file.relpath)
+
+    action._upload_to_targets = upload_to_targets  # type: ignore[method-assign]
+    return uploaded
+
+
+def test_upload_to_targets_raises_the_error_itself(new_action: ActionBuilder) -> None:
+    with pytest.raises(ValueError, match="cannot convert"):
+        asyncio.run(Action._upload_to_targets(FILES[0], [FailingConverter()], {}))  # type: ignore[list-item]
+
+
+def test_fail_fast_needs_resume_to_retry(new_action: ActionBuilder) -> None:
+    action = new_action(not_found)
+    uploaded = stub_uploads(action, FILES[4].relpath)
+    with pytest.raises(ValueError, match="failed"):
+        upload(action, "fail_fast")
+    assert len(uploaded) < len(FILES) - 1
+
+    failure_log = FailureLog.read(f"{settings.PARATRANZ_CACHE_DIR}/failed_uploads_test.json")
+    assert failure_log is not None and not failure_log.complete
+    assert failure_log.failed == {FILES[4].relpath: "ValueError: failed"}
+
+    # the files not reached are not in the log, only a resumed run knows what is left
+    with pytest.raises(ValueError, match="--resume"):
+        upload(action, "fail_fast", retry_failed=True)
+    uploaded.clear()
+    with pytest.raises(RuntimeError, match="1 files failed"):
+        upload(action, "continue", retry_failed=True, resume=True)
+    assert len(uploaded) == len(FILES) - 1
+
+
+def test_continue_retries_failed_files(new_action: ActionBuilder) -> None:
+    action = new_action(not_found)
+    uploaded = stub_uploads(action, FILES[4].relpath)
+    with pytest.raises(RuntimeError, match="1 files failed"):
+        upload(action, "continue")
+    assert len(uploaded) == len(FILES) - 1
+
+    uploaded = stub_uploads(action, "")
+    upload(action, "continue", retry_failed=True)
+    assert uploaded == [FILES[4].relpath]
+    assert FailureLog.read(f"{settings.PARATRANZ_CACHE_DIR}/failed_uploads_test.json") is None
+
+
+def test_prefetch_warms_only_stale_files(new_action: ActionBuilder) -> None:
+    paratranz = MockParatranz()
+    for mod in ("a", "b"):
+        paratranz.add_file(
+            f"resources/{mod}/lang/zh_CN.lang.json",
+            f"resources/{mod}/lang/zh_CN.lang",
+            "a=A\nb=B",
+            {"lang|a": "甲"},
+            modified_at="2024-01-01T00:00:00.000Z",
+        )
+    asyncio.run(new_action(paratranz)._prefetch())
+    assert sorted(paratranz.paths()) == [
+        "/api/projects/1/files",
+        "/api/projects/1/files/1",
+        "/api/projects/1/files/2",
+        "/api/projects/1/strings?file=1",
+        "/api/projects/1/strings?file=2",
+    ]
+
+    # only the file modified since is downloaded again
+    paratranz.requests.clear()
+    paratranz.files[2]["modifiedAt"] = "2024-01-02T00:00:00.000Z"
+    action = new_action(paratranz)
+    asyncio.run(action._prefetch())
+    assert sorted(paratranz.paths()) == [
+        "/api/projects/1/files",
+        "/api/projects/1/files/2",
+        "/api/projects/1/strings?file=2",
+    ]
+    all_files = asyncio.run(action.client.get_all_files())
+    for f in all_files:
+        translation_file = action.converter.cache.get(f)
+        assert translation_file is not None and translation_file.content == "a=甲\nb=B"
+
+    # the strings of a file whose translation file is up to date are not downloaded again
+    paratranz.requests.clear()
+    action.client.string_mirror.remove(1)
+    asyncio.run(new_action(paratranz)._prefetch())
+    assert paratranz.paths() == ["/api/projects/1/files"]
+
+
+def test_paratranz_to_all_lists_once_and_commits_once(new_action: ActionBuilder, tmp_path: Path) -> None:
+    paratranz = MockParatranz()
+    modified_at = "2024-01-01T00:00:00.000Z"
+    quest_book_relpath = settings.DEFAULT_QUESTS_LANG_TARGET_REL_PATH
+    paratranz.add_file(f"{quest_book_relpath}.json", quest_book_relpath, "q=Q", {"lang|q": "任务"}, modified_at)
+    paratranz.add_file(
+        "resources/Mod A[a]/lang/zh_CN.lang.json",
+        "resources/Mod A[a]/lang/zh_CN.lang",
+        "a=A",
+        {"lang|a": "甲"},
+        modified_at,
+    )
+    gt_lang_relpath = settings.GT_LANG_TARGET_REL_PATH
+    paratranz.add_file(
+        f"{gt_lang_relpath}.json",
+        gt_lang_relpath,
+        "B:UseThisFileAsLanguageFile=false\ng=G",
+        {"lang|g": "格"},
+        modified_at,
+    )
+    repo_path = tmp_path / "repo"
+    porcelain.init(str(repo_path))  # type: ignore[no-untyped-call]
+
+    new_action(paratranz).paratranz_to_all(repo_path=str(repo_path))
+
+    assert paratranz.paths().count("/api/projects/1/files") == 1
+    assert (repo_path / quest_book_relpath).read_text(encoding="utf-8") == "q=任务"
+    assert (repo_path / "config/txloader/forceload/Mod A[a]/lang/zh_CN.lang").read_text(encoding="utf-8") == "a=甲"
+    gt_lang = (repo_path / "GregTech_en_US.lang").read_text(encoding="utf-8")
+    assert gt_lang == "B:UseThisFileAsLanguageFile=true\ng=格"
+
+    repo = Repo(str(repo_path))
+    commits = [entry.commit for entry in repo.get_walker()]
+    assert len(commits) == 1
+    assert len(list(iter_tree_contents(repo.object_store, commits[0].tree))) == 3
+
+
+def test_quest_book_passes_changed_keys_since_last_upload(new_action: ActionBuilder) -> None:
+    action = new_action(not_found)
+    contents = ["a=A\nb=B\nc=C", "a=A\nb=B2\nc=C"]
+    uploads: List[Optional[Dict[int, Set[str]]]] = []
+
+    async def fetch(url: str, immutable: bool = False) -> str:
+        return contents.pop(0)
+
+    async def upload_to_targets(
+        file: Filetype,
+        converters: Sequence[Any],
+        journals: Dict[int, Any],
+        changed_keys: Optional[Dict[int, Set[str]]] = None,
+    ) -> None:
+        assert file.properties == FiletypeLang(file.relpath, file.content).properties
+        uploads.append(changed_keys)
+
+    action.source_fetcher.fetch = fetch  # type: ignore[method-assign]
+    action._upload_to_targets = upload_to_targets  # type: ignore[method-assign]
+    asyncio.run(action._quest_book_to_paratranz("0" * 40))
+    asyncio.run(action._quest_book_to_paratranz("1" * 40, targets=["zh_CN:1", "ja_JP:2"]))
+    # the first version is compared in full, the second only for the project the first was uploaded to
+    assert uploads == [{}, {1: {"lang|b"}}]
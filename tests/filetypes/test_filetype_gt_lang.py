@@ -1,3 +1,6 @@
+import asyncio
+from typing import AsyncIterator
+
 from gtnh_translation_compare.filetypes import FiletypeGTLang, Language, Property
 import pytest
 
@@ -193,3 +196,15 @@ def test_get_target_relpath(
     assert ja_jp_filetype_gt_lang.get_target_language_relpath(Language.zh_CN) == ZH_CN_RELPATH
     assert ko_kr_filetype_gt_lang.get_target_language_relpath(Language.zh_CN) == ZH_CN_RELPATH
     assert pt_br_filetype_gt_lang.get_target_language_relpath(Language.zh_CN) == ZH_CN_RELPATH
+
+
+def test_from_stream(en_us_filetype_gt_lang: FiletypeGTLang) -> None:
+    crlf_content = EN_US_CONTENT.replace("\n", "\r\n")
+
+    async def chunks() -> AsyncIterator[str]:
+        for i in range(0, len(crlf_content), 7):
+            yield crlf_content[i : i + 7]
+
+    streamed = asyncio.run(FiletypeGTLang.from_stream(EN_US_RELPATH, chunks()))
+    assert streamed.content == en_us_filetype_gt_lang.content.rstrip("\n")
+    assert streamed.properties == en_us_filetype_gt_lang.properties
@@ -0,0 +1,91 @@
+import random
+from typing import List
+
+from gtnh_translation_compare.filetypes import FiletypeLang
+from gtnh_translation_compare.filetypes.lang_reparse import parse_lang, reparse_lang
+
+OLD_CONTENT = "\n".join(
+    [
+        "# comment",
+        "a=A",
+        "b=B",
+        "",
+        "dup=first",
+        "c=C",
+        "dup=second",
+        "d=D=D",
+    ]
+)
+
+
+def parse(content: str) -> FiletypeLang:
+    return FiletypeLang("test/en_US.lang", content)
+
+
+def test_parse_lang() -> None:
+    result = parse_lang(OLD_CONTENT)
+    assert result.properties == parse(OLD_CONTENT).properties
+    assert result.lines.keys == [None, "lang|a", "lang|b", None, "lang|dup", "lang|c", "lang|dup", "lang|d"]
+    assert result.changed_keys is None
+
+
+def test_reparse_lang() -> None:
+    new_content = "\n".join(
+        [
+            "# comment changed",
+            "a=A",
+            "b=B2",
+            "",
+            "dup=first",
+            "c=C",
+            "e=E",
+            "d=D=D",
+        ]
+    )
+    result = reparse_lang(parse_lang(OLD_CONTENT).lines, new_content)
+    assert result.properties == parse(new_content).properties
+    # the removed `dup=second` makes `dup=first` the value of `dup`
+    assert result.changed_keys == {"lang|b", "lang|dup", "lang|e"}
+
+
+def test_reparse_lang_reordered_duplicates() -> None:
+    new_content = (
+        OLD_CONTENT.replace("dup=first", "tmp").replace("dup=second", "dup=first").replace("tmp", "dup=second")
+    )
+    result = reparse_lang(parse_lang(OLD_CONTENT).lines, new_content)
+    assert result.properties == parse(new_content).properties
+    assert result.changed_keys == {"lang|dup"}
+
+
+def edit(rng: random.Random, lines: List[str], ops: List[str]) -> None:
+    for _ in range(rng.randint(1, 5)):
+        i = rng.randrange(len(lines))
+        op = rng.choice(ops)
+        if op == "insert":
+            lines.insert(i, f"key{rng.randrange(60)}=new {rng.random()}")
+        elif op == "delete":
+            del lines[i]
+        elif op == "move":
+            lines.insert(rng.randrange(len(lines)), lines.pop(i))
+        else:
+            lines[i] = lines[i] + "!"
+
+
+def test_reparse_lang_matches_full_parse() -> None:
+    rng = random.Random(0)
+    lines = [f"key{i % 40}=value {i}" if i % 7 else f"# comment {i}" for i in range(200)]
+    previous = parse_lang("\n".join(lines))
+    for n in range(100):
+        # lines changed in place only, then lines added and removed as well
+        edit(rng, lines, ["change"] if n % 2 else ["insert", "delete", "move", "change"])
+        new_content = "\n".join(lines)
+        old = parse("\n".join(previous.lines.lines)).properties
+        new = parse(new_content).properties
+        result = reparse_lang(previous.lines, new_content)
+        assert result.properties == new
+        assert list(result.properties) == list(new)
+        assert result.lines == parse_lang(new_content).lines
+        assert result.changed_keys == {
+            k for k in old.keys() | new.keys() if k not in old or k not in new or old[k].full != new[k].full
+        }
+        previous = result
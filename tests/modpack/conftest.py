@@ -0,0 +1,37 @@
+import json
+import zipfile
+from pathlib import Path
+from typing import Dict, Callable
+
+import pytest
+
+# {jar name: {entry name: entry content}}
+PackSpec = Dict[str, Dict[str, str]]
+PackBuilder = Callable[[PackSpec, Dict[str, str]], Path]
+
+
+def write_jar(jar_path: Path, entries: Dict[str, str]) -> None:
+    jar_path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(jar_path, "w", compression=zipfile.ZIP_DEFLATED) as jar:
+        for name, content in entries.items():
+            jar.writestr(name, content)
+
+
+def new_jar_entries(mod_name: str, lang_files: Dict[str, str]) -> Dict[str, str]:
+    entries = {"mcmod.info": json.dumps([{"name": mod_name}])}
+    entries.update(lang_files)
+    return entries
+
+
+@pytest.fixture
+def build_pack(tmp_path: Path) -> PackBuilder:
+    def build(jars: PackSpec, scripts: Dict[str, str]) -> Path:
+        pack_path = tmp_path / "pack"
+        for jar_name, entries in jars.items():
+            write_jar(pack_path / "mods" / jar_name, entries)
+        (pack_path / "scripts").mkdir(parents=True, exist_ok=True)
+        for script_name, content in scripts.items():
+            (pack_path / "scripts" / script_name).write_text(content, encoding="utf-8")
+        return pack_path
+
+    return build
@@ -0,0 +1,106 @@
+import os
+import re
+import threading
+import zipfile
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Iterator, Callable
+
+import pytest
+
+from gtnh_translation_compare.modpack.http_range_file import HttpRangeFile
+from gtnh_translation_compare.modpack.mod import Mod
+from gtnh_translation_compare.modpack.modpack import ModPack
+from gtnh_translation_compare.modpack.pack_source import ZipPackSource
+from tests.modpack.conftest import PackBuilder, new_jar_entries
+
+# serves the given bytes and returns their url
+Serve = Callable[[bytes], str]
+
+
+@pytest.fixture
+def serve() -> Iterator[Serve]:
+    servers = []
+
+    def start(data: bytes) -> str:
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+                if match is None:
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                    return
+                start, end = int(match.group(1)), min(int(match.group(2)), len(data) - 1)
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+                self.send_header("Content-Length", str(end - start + 1))
+                self.end_headers()
+                self.wfile.write(data[start : end + 1])
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/pack.zip"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_read_and_seek(serve: Serve) -> None:
+    data = os.urandom(10_000)
+    f = HttpRangeFile(serve(data), block_size=1000, max_cached_blocks=3)
+    assert f.size == len(data)
+    assert f.read(10) == data[:10]
+    f.seek(2_500)
+    assert f.read(5_000) == data[2_500:7_500]
+    f.seek(-100, os.SEEK_END)
+    assert f.read() == data[-100:]
+    # the last blocks are cached
+    fetched = f.fetched_bytes
+    f.seek(-50, os.SEEK_END)
+    assert f.read(50) == data[-50:]
+    assert f.fetched_bytes == fetched
+
+
+def test_remote_modpack(build_pack: PackBuilder, serve: Serve, tmp_path: Path) -> None:
+    pack_path = build_pack(
+        {
+            "a.jar": new_jar_entries("Mod A", {"assets/a/lang/en_US.lang": "a=A"}),
+            "b.jar": new_jar_entries("Mod B", {"assets/b/lang/en_US.lang": "b=B"}),
+        },
+        {"a.zs": 'val I18N_a_0 = "A";'},
+    )
+    zip_path = tmp_path / "pack.zip"
+    with zipfile.ZipFile(zip_path, "w") as pack_zip:
+        for f in sorted(pack_path.rglob("*")):
+            if f.is_file():
+                pack_zip.write(f, f.relative_to(pack_path).as_posix())
+        # assets that are never read
+        pack_zip.writestr("resources/textures.zip", os.urandom(4 * 1024 * 1024))
+    data = zip_path.read_bytes()
+
+    url = serve(data)
+    modpack = ModPack(url)
+    relpaths = [f.relpath for f in [*modpack.lang_files, *modpack.script_files]]
+    assert sorted(relpaths) == [
+        "resources/Mod A[a]/lang/en_US.lang",
+        "resources/Mod B[b]/lang/en_US.lang",
+        "scripts/a.zs",
+    ]
+
+    modpack.close()
+
+    range_file = HttpRangeFile(url)
+    source = ZipPackSource(range_file)
+    assert [Mod(jar).mod_name for jar in source.iter_jars()] == ["Mod A", "Mod B"]
+    assert range_file.fetched_bytes < len(data) / 4
+    # the range file and the client it created are closed with the source
+    source.close()
+    assert range_file.closed and range_file.client.is_closed
@@ -0,0 +1,136 @@
+import asyncio
+import tracemalloc
+import zipfile
+from pathlib import Path
+from typing import List, Tuple
+
+import httpx
+
+from gtnh_translation_compare.filetypes import Property, Filetype, Language
+from gtnh_translation_compare.modpack.modpack import ModPack
+from gtnh_translation_compare.modpack.pack_source import ZipPackSource
+from gtnh_translation_compare.paratranz.client_wrapper import ClientWrapper
+from gtnh_translation_compare.paratranz.converter import Converter
+from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache
+from gtnh_translation_compare.paratranz.payload import file_upload_body
+from gtnh_translation_compare.utils.pipeline import run_pipeline
+from tests.modpack.conftest import PackBuilder, new_jar_entries
+
+SHARED_LANG = "﻿shared.a=A\r\nshared.b=B\r\n"
+
+
+def test_lang_files(build_pack: PackBuilder) -> None:
+    pack_path = build_pack(
+        {
+            "a.jar": new_jar_entries("Mod A", {"assets/a/lang/en_US.lang": "a=A"}),
+            "b.jar": new_jar_entries("Mod B", {"assets/shared/lang/en_US.lang": SHARED_LANG}),
+            "c.jar": new_jar_entries("Mod C", {"assets/shared/lang/en_US.lang": SHARED_LANG}),
+        },
+        {},
+    )
+    lang_files = {f.relpath: f for f in ModPack(pack_path).lang_files}
+    assert sorted(lang_files) == [
+        "resources/Mod A[a]/lang/en_US.lang",
+        "resources/Mod B[shared]/lang/en_US.lang",
+        "resources/Mod C[shared]/lang/en_US.lang",
+    ]
+    assert lang_files["resources/Mod A[a]/lang/en_US.lang"].properties == {
+        "lang|a": Property("lang|a", "A", "a=A", 2, 3),
+    }
+
+    b = lang_files["resources/Mod B[shared]/lang/en_US.lang"]
+    c = lang_files["resources/Mod C[shared]/lang/en_US.lang"]
+    assert b.content == "shared.a=A\nshared.b=B"
+    # identical lang files are decoded and parsed only once
+    assert b.content is c.content
+    assert b.properties is c.properties
+
+
+def zip_pack(pack_path: Path, zip_path: Path, jar_compression: int) -> Path:
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as pack_zip:
+        for f in sorted(pack_path.rglob("*")):
+            if f.is_file():
+                arcname = f"GTNH/{f.relative_to(pack_path).as_posix()}"
+                compression = jar_compression if f.suffix == ".jar" else zipfile.ZIP_DEFLATED
+                pack_zip.write(f, arcname, compress_type=compression)
+        pack_zip.writestr("GTNH/resources/big.png", b"\0" * 1024)
+    return zip_path
+
+
+def test_zip_pack(build_pack: PackBuilder, tmp_path: Path) -> None:
+    pack_path = build_pack(
+        {
+            "a.jar": new_jar_entries("Mod A", {"assets/a/lang/en_US.lang": "a=A", "assets/a/lang/zh_CN.lang": "a=甲"}),
+            "sub/b.jar": new_jar_entries("Mod B", {"assets/b/lang/en_US.lang": SHARED_LANG}),
+        },
+        {"a.zs": 'val I18N_a_0 = "A";', "b.zs": "recipes.remove(<minecraft:stone>);"},
+    )
+
+    def files(modpack: ModPack) -> List[Tuple[str, str]]:
+        return sorted((f.relpath, f.content) for f in [*modpack.lang_files, *modpack.script_files])
+
+    expected = files(ModPack(pack_path))
+    assert [relpath for relpath, _ in expected] == [
+        "resources/Mod A[a]/lang/en_US.lang",
+        "resources/Mod B[b]/lang/en_US.lang",
+        "scripts/a.zs",
+    ]
+    for compression in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        zip_path = zip_pack(pack_path, tmp_path / f"pack-{compression}.zip", compression)
+        modpack = ModPack(zip_path)
+        assert files(modpack) == expected
+        modpack.close()
+
+    # the zip file is closed with the source
+    with zip_path.open("rb") as fp:
+        ZipPackSource(fp).close()
+        assert fp.closed
+
+
+def measure_upload_peak(pack_path: Path, tmp_path: Path, low_memory: bool = True) -> int:
+    converter = Converter(
+        client=ClientWrapper(client=httpx.AsyncClient(), project_id=1, cache_dir=str(tmp_path / "cache")),
+        cache=ParatranzCache(str(tmp_path / "cache")),
+        target_lang=Language.zh_CN,
+    )
+
+    async def upload_file(file: Filetype) -> None:
+        paratranz_file = await converter.to_paratranz_file(file)
+        for _ in file_upload_body(paratranz_file, fields={}):
+            pass
+
+    async def run() -> None:
+        await run_pipeline(
+            ModPack(pack_path, low_memory=low_memory, dedup_budget=100_000).iter_lang_files(),
+            upload_file,
+            workers=1,
+            queue_size=1,
+            weigh=lambda f: len(f.content) * 8,
+            memory_budget=1024 * 1024,
+        )
+
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        asyncio.run(run())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def test_low_memory_peak_stays_flat(build_pack: PackBuilder, tmp_path: Path) -> None:
+    def build(jar_count: int) -> Path:
+        jars = {}
+        for i in range(jar_count):
+            content = "\n".join(f"mod{i}.key{j}=Value {j} of mod {i}" for j in range(2000))
+            jars[f"mod{i}.jar"] = new_jar_entries(f"Mod {i}", {f"assets/mod{i}/lang/en_US.lang": content})
+        return build_pack(jars, {}).rename(tmp_path / f"pack-{jar_count}")
+
+    small_pack, large_pack = build(5), build(20)
+    for low_memory in (True, False):
+        small_peak = measure_upload_peak(small_pack, tmp_path, low_memory)
+        large_peak = measure_upload_peak(large_pack, tmp_path, low_memory)
+        # the deduplication table is bounded too
+        assert large_peak < small_peak * 1.5
@@ -0,0 +1,74 @@
+import asyncio
+
+from gtnh_translation_compare.paratranz.adaptive_limiter import AdaptiveLimiter
+
+
+def test_additive_increase_and_multiplicative_decrease() -> None:
+    async def run() -> None:
+        limiter = AdaptiveLimiter("test", initial=4, maximum=8, cooldown=60, min_samples=2)
+        # about one more per `limit` healthy responses
+        for _ in range(6):
+            await limiter.acquire()
+            await limiter.release(0.1)
+        assert limiter.current == 5
+
+        await limiter.acquire()
+        await limiter.release(0.1, overloaded=True)
+        assert limiter.current == 2
+        # within the cooldown, a burst of failures counts once
+        await limiter.acquire()
+        await limiter.release(0.1, overloaded=True)
+        assert limiter.current == 2
+
+        limiter.cooldown = 0
+        await limiter.acquire()
+        await limiter.release(10)
+        assert limiter.current == 1
+
+        # no signal, e.g. a cancelled hedged request
+        await limiter.acquire()
+        await limiter.release(None, overloaded=True)
+        assert limiter.current == 1
+
+    asyncio.run(run())
+
+
+def test_limits_in_flight() -> None:
+    async def run() -> int:
+        limiter = AdaptiveLimiter("test", initial=2)
+        in_flight = 0
+        max_in_flight = 0
+
+        async def request() -> None:
+            nonlocal in_flight, max_in_flight
+            await limiter.acquire()
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            await limiter.release(None)
+
+        await asyncio.gather(*[request() for _ in range(10)])
+        return max_in_flight
+
+    assert asyncio.run(run()) == 2
+
+
+def test_latency_spikes_are_per_endpoint() -> None:
+    async def run() -> int:
+        limiter = AdaptiveLimiter("test", initial=10, cooldown=0)
+        # healthy mixed traffic: fast page reads and the occasional slow upload
+        for i in range(200):
+            await limiter.acquire()
+            if i % 10 == 9:
+                await limiter.release(0.5, endpoint="update_file")
+            else:
+                await limiter.release(0.05, endpoint="get_strings")
+        # a real spike of one endpoint still cuts back
+        limit = limiter.current
+        await limiter.acquire()
+        await limiter.release(1, endpoint="get_strings")
+        assert limiter.current == limit // 2
+        return limit
+
+    assert asyncio.run(run()) > 10
@@ -0,0 +1,104 @@
+import asyncio
+import io
+import json
+import zipfile
+from pathlib import Path
+from typing import List
+
+import httpx
+
+from gtnh_translation_compare.filetypes import FiletypeLang, Language
+from gtnh_translation_compare.paratranz.artifact import Artifact
+from gtnh_translation_compare.paratranz.client_wrapper import ClientWrapper
+from gtnh_translation_compare.paratranz.converter import Converter
+from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache, FileExtraCache
+from gtnh_translation_compare.paratranz.types import File
+
+FILE = File(id=1, name="resources/x/lang/zh_CN.lang.json", modified_at="2024-01-01T00:00:00.000Z")
+ARTIFACT_CREATED_AT = "2024-01-02T00:00:00.000Z"
+
+
+def test_to_translation_file_from_artifact(tmp_path: Path) -> None:
+    requests: List[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path == "/api/projects/1/artifacts":
+            return httpx.Response(200, json={"id": 1, "createdAt": ARTIFACT_CREATED_AT})
+        if request.url.path == "/api/projects/1/strings":
+            return httpx.Response(200, json={"pageCount": 1, "results": raw_strings})
+        if request.url.path == "/api/projects/1/artifacts/download":
+            return httpx.Response(302, headers={"Location": "https://cdn.paratranz.test/artifact.zip"})
+        if request.url.host == "cdn.paratranz.test":
+            return httpx.Response(200, content=artifact_zip.getvalue())
+        return httpx.Response(200, json={**FILE.model_dump(), "extra": paratranz_file.file_extra.model_dump()})
+
+    converter = Converter(
+        client=ClientWrapper(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+            project_id=1,
+            cache_dir=str(tmp_path),
+        ),
+        cache=ParatranzCache(str(tmp_path / "translations")),
+        target_lang=Language.zh_CN,
+        extra_cache=FileExtraCache(str(tmp_path / "extras")),
+    )
+    paratranz_file = asyncio.run(converter.to_paratranz_file(FiletypeLang("resources/x/lang/en_US.lang", "a=A\nb=B")))
+    translations = {"lang|a": "甲"}
+    raw_strings = [
+        {"id": idx, "translation": translations.get(s.key, ""), **s.model_dump(exclude={"id", "translation"})}
+        for idx, s in enumerate(paratranz_file.string_items)
+    ]
+    artifact_zip = io.BytesIO()
+    with zipfile.ZipFile(artifact_zip, "w") as z:
+        z.writestr(f"raw/{FILE.name}", json.dumps(raw_strings))
+        z.writestr(f"utf8/{FILE.name}", "{}")
+
+    artifact_path = str(tmp_path / "artifact.zip")
+    artifact_info = asyncio.run(converter.client.get_artifact_info())
+    asyncio.run(converter.client.download_artifact(artifact_path))
+    artifact = Artifact(artifact_path, created_at=artifact_info.created_at)
+    for _ in range(2):
+        translation_file = asyncio.run(converter.to_translation_file_from_artifact(FILE, artifact))
+        assert translation_file.relpath == "resources/x/lang/zh_CN.lang"
+        assert translation_file.content == "a=甲\nb=B"
+    # the extra is requested once, then read from the extra cache
+    assert [r.url.path for r in requests] == [
+        "/api/projects/1/artifacts",
+        "/api/projects/1/artifacts/download",
+        "/artifact.zip",
+        "/api/projects/1/files/1",
+    ]
+
+    # an extra whose keys do not match the strings is requested again
+    stale_extra = paratranz_file.file_extra.model_copy(update={"properties": {}})
+    assert converter.extra_cache is not None
+    converter.extra_cache.set(FILE, stale_extra)
+    asyncio.run(converter.to_translation_file_from_artifact(FILE, artifact))
+    assert len(requests) == 5
+    assert artifact.get_strings("missing.json") is None
+
+    # the extra cached for an older version of the file is not used, even with the same keys
+    modified_file = FILE.model_copy(update={"modified_at": "2024-01-01T12:00:00.000Z"})
+    assert converter.extra_cache.get(modified_file) is None
+
+    # a file modified after the export is converted from the API
+    edited_file = FILE.model_copy(update={"modified_at": "2024-01-03T00:00:00.000Z"})
+    translation_file = asyncio.run(converter.to_translation_file_from_artifact(edited_file, artifact))
+    assert translation_file.content == "a=甲\nb=B"
+    assert requests[-1].url.path == "/api/projects/1/strings"
+
+
+def test_files_modified_after_the_artifact_use_the_api(tmp_path: Path) -> None:
+    artifact_zip = tmp_path / "artifact.zip"
+    with zipfile.ZipFile(artifact_zip, "w") as z:
+        z.writestr(f"raw/{FILE.name}", json.dumps([{"id": 1, "key": "a", "original": "A", "translation": "old"}]))
+    artifact = Artifact(str(artifact_zip), created_at=ARTIFACT_CREATED_AT)
+    assert artifact.is_up_to_date(FILE)
+    assert not artifact.is_up_to_date(FILE.model_copy(update={"modified_at": "2024-01-03T00:00:00.000Z"}))
+    assert not artifact.is_up_to_date(FILE.model_copy(update={"modified_at": None}))
+    assert not Artifact(str(artifact_zip), created_at=None).is_up_to_date(FILE)
+    # a time without an offset is taken as UTC instead of failing to compare with one with an offset
+    assert artifact.is_up_to_date(FILE.model_copy(update={"modified_at": "2024-01-01T00:00:00"}))
+    assert not artifact.is_up_to_date(FILE.model_copy(update={"modified_at": "2024-01-03T00:00:00"}))
+    artifact.close()
@@ -0,0 +1,342 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from gtnh_translation_compare.paratranz.adaptive_limiter import AdaptiveLimiter
+from gtnh_translation_compare.paratranz.client_wrapper import ClientWrapper, StringPatch
+from gtnh_translation_compare.paratranz.string_table import StringTable
+from gtnh_translation_compare.paratranz.types import StringItem, ParatranzFile, FileExtra, File
+from gtnh_translation_compare.paratranz.upload_journal import UploadJournal
+
+FILE = File(id=10, name="test/zh_CN.lang.json", modified_at="2024-01-01T00:00:00.000Z")
+OLD_STRINGS = [
+    {"id": 1, "key": "lang|a", "original": "A", "translation": "甲", "stage": 1},
+    {"id": 2, "key": "lang|b", "original": "B", "translation": "乙", "stage": 1},
+    {"id": 3, "key": "lang|c", "original": "C", "translation": "", "stage": 0},
+]
+
+
+def new_paratranz_file(string_items: List[StringItem]) -> ParatranzFile:
+    return ParatranzFile(
+        file_name="test/zh_CN.lang.json",
+        file_extra=FileExtra(original="", properties={}, en_us_relpath="", target_relpath=""),
+        string_items=string_items,
+    )
+
+
+def test_string_patch_diff() -> None:
+    old = StringTable.from_items(StringItem.model_validate(s) for s in OLD_STRINGS)
+    new = [
+        StringItem(key="lang|a", original="A", translation="甲"),
+        StringItem(key="lang|b", original="B2"),
+        StringItem(key="lang|d", original="D"),
+    ]
+    patch = StringPatch.diff(old, new)
+    assert [s.key for s in patch.to_create] == ["lang|d"]
+    # the translation of the old original is cleared
+    assert patch.to_update == [(2, {"original": "B2", "translation": "", "stage": 0})]
+    assert patch.to_delete == [3]
+    assert patch.change_count == 3
+
+
+def test_string_patch_diff_compares_changed_keys() -> None:
+    old = StringTable.from_items(StringItem.model_validate(s) for s in OLD_STRINGS)
+    new = [
+        StringItem(key="lang|a", original="A2"),
+        StringItem(key="lang|b", original="B2"),
+        StringItem(key="lang|c", original="C"),
+    ]
+    # only lang|b changed since the last upload, lang|a differing on Paratranz is not compared
+    patch = StringPatch.diff(old, new, {"lang|b"})
+    assert patch.to_update == [(2, {"original": "B2", "translation": "", "stage": 0})]
+    assert patch.to_create == [] and patch.to_delete == []
+
+    # lang|c is missing on Paratranz, so it does not match the last upload and all strings are compared
+    old = StringTable.from_items(StringItem.model_validate(s) for s in OLD_STRINGS[:2])
+    patch = StringPatch.diff(old, new, {"lang|b"})
+    assert [s.key for s in patch.to_create] == ["lang|c"]
+    assert [string_id for string_id, _ in patch.to_update] == [1, 2]
+
+
+def new_client_wrapper(
+    tmp_path: Path, requests: List[httpx.Request], ratio: float = 0.5, max_changes: Optional[int] = None
+) -> ClientWrapper:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "GET" and request.url.path.endswith("/files"):
+            return httpx.Response(200, json=[FILE.model_dump()], headers={"ETag": '"files"'})
+        if request.method == "GET":
+            return httpx.Response(200, json={"pageCount": 1, "results": OLD_STRINGS})
+        return httpx.Response(200, json={})
+
+    return ClientWrapper(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+        project_id=1,
+        cache_dir=str(tmp_path),
+        patch_max_change_ratio=ratio,
+        patch_max_changes=max_changes,
+    )
+
+
+def run_update(
+    tmp_path: Path, ratio: float, string_items: List[StringItem], max_changes: Optional[int] = None
+) -> List[httpx.Request]:
+    requests: List[httpx.Request] = []
+    client = new_client_wrapper(tmp_path, requests, ratio, max_changes)
+    asyncio.run(client._update_file(FILE, new_paratranz_file(string_items)))
+    return [r for r in requests if r.method != "GET"]
+
+
+def test_update_file_patches_small_changes(tmp_path: Path) -> None:
+    requests = run_update(
+        tmp_path,
+        0.5,
+        [
+            StringItem(key="lang|a", original="A"),
+            StringItem(key="lang|b", original="B"),
+            StringItem(key="lang|c", original="C2"),
+        ],
+    )
+    assert [(r.method, r.url.path) for r in requests] == [("PUT", "/api/projects/1/strings/3")]
+    assert json.loads(requests[0].content) == {"original": "C2", "stage": 0}
+
+
+def test_update_file_falls_back_to_full_upload(tmp_path: Path) -> None:
+    requests = run_update(
+        tmp_path,
+        0.5,
+        [
+            StringItem(key="lang|a", original="A2"),
+            StringItem(key="lang|b", original="B2"),
+            StringItem(key="lang|c", original="C"),
+        ],
+    )
+    assert [(r.method, r.url.path) for r in requests] == [("POST", "/api/projects/1/files/10")]
+
+
+def test_update_file_uploads_when_over_max_changes(tmp_path: Path) -> None:
+    string_items = [
+        StringItem(key="lang|a", original="A"),
+        StringItem(key="lang|b", original="B"),
+        StringItem(key="lang|c", original="C2"),
+    ]
+    requests = run_update(tmp_path, 0.5, string_items, max_changes=0)
+    assert [(r.method, r.url.path) for r in requests] == [("POST", "/api/projects/1/files/10")]
+
+
+def test_update_file_uploads_when_patching_fails(tmp_path: Path) -> None:
+    requests: List[httpx.Request] = []
+    deleted = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "GET":
+            return httpx.Response(200, json={"pageCount": 1, "results": OLD_STRINGS})
+        if request.method == "PUT":
+            return httpx.Response(400)
+        if request.method == "DELETE":
+            # only finishes if it is not cancelled by the failed update
+            await asyncio.sleep(5)
+            deleted.set()
+        return httpx.Response(200, json={})
+
+    client = ClientWrapper(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+        project_id=1,
+        cache_dir=str(tmp_path),
+        patch_max_change_ratio=1,
+    )
+    string_items = [StringItem(key="lang|a", original="A"), StringItem(key="lang|b", original="B2")]
+    asyncio.run(client._update_file(FILE, new_paratranz_file(string_items)))
+
+    assert not deleted.is_set()
+    assert [(r.method, r.url.path) for r in requests if r.method != "GET"] == [
+        ("PUT", "/api/projects/1/strings/2"),
+        ("DELETE", "/api/projects/1/strings/3"),
+        ("POST", "/api/projects/1/files/10"),
+    ]
+    # the partly patched file is read from the server again
+    assert client.string_mirror.get(FILE) is None
+
+
+def test_get_file_strings_reads_mirror(tmp_path: Path) -> None:
+    requests: List[httpx.Request] = []
+    client = new_client_wrapper(tmp_path, requests)
+    assert [s.key for s in asyncio.run(client.get_file_strings(FILE))] == ["lang|a", "lang|b", "lang|c"]
+    assert [s.key for s in asyncio.run(client.get_file_strings(FILE))] == ["lang|a", "lang|b", "lang|c"]
+    assert len(requests) == 1
+
+    # a newer modified_at invalidates the mirrored copy
+    asyncio.run(client.get_file_strings(FILE.model_copy(update={"modified_at": "2024-01-02T00:00:00.000Z"})))
+    assert len(requests) == 2
+
+
+def test_upload_file_with_journal(tmp_path: Path) -> None:
+    requests: List[httpx.Request] = []
+    client = new_client_wrapper(tmp_path, requests)
+    journal = UploadJournal(str(tmp_path / "journal.jsonl"))
+    paratranz_file = new_paratranz_file([StringItem(key="lang|a", original="A")])
+
+    async def upload_twice() -> None:
+        await client.upload_file(paratranz_file, journal)
+        count = len(requests)
+        await client.upload_file(paratranz_file, journal)
+        assert len(requests) == count
+
+    asyncio.run(upload_twice())
+    assert journal.is_done(paratranz_file.file_name, paratranz_file.fingerprint)
+
+
+def test_get_all_files_prunes_responses_of_modified_files(tmp_path: Path) -> None:
+    files = [FILE]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/files"):
+            return httpx.Response(200, json=[f.model_dump() for f in files], headers={"ETag": f'"{len(files)}"'})
+        return httpx.Response(200, json=FILE.model_dump(), headers={"ETag": '"file"'})
+
+    def list_files() -> ClientWrapper:
+        client = ClientWrapper(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+            project_id=1,
+            cache_dir=str(tmp_path),
+        )
+        asyncio.run(client.get_all_files())
+        return client
+
+    client = list_files()
+    asyncio.run(client.get_file(FILE.id))
+    file_url = f"projects/1/files/{FILE.id}"
+    assert client.response_cache.get(FILE.id, file_url) is not None
+
+    files = [FILE.model_copy(update={"modified_at": "2024-01-02T00:00:00.000Z"})]
+    assert list_files().response_cache.get(FILE.id, file_url) is None
+
+
+def test_get_all_files_reads_binary_cache_on_304(tmp_path: Path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("If-None-Match") == '"files"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=[FILE.model_dump()], headers={"ETag": '"files"'})
+
+    def new_client() -> ClientWrapper:
+        return ClientWrapper(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+            project_id=1,
+            cache_dir=str(tmp_path),
+        )
+
+    assert asyncio.run(new_client().get_all_files()).names == [FILE.name]
+    all_files = asyncio.run(new_client().get_all_files())
+    assert all_files.ids == [FILE.id]
+    assert all_files.find(FILE.name) == FILE
+    assert all_files.find("missing.lang.json") is None
+    assert list(all_files) == [FILE]
+
+
+def test_strict_validation_rejects_coerced_values(tmp_path: Path) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"pageCount": "1", "results": OLD_STRINGS})
+
+    def get_strings(strict_validation: bool) -> List[StringItem]:
+        client = ClientWrapper(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+            project_id=1,
+            cache_dir=str(tmp_path),
+            strict_validation=strict_validation,
+        )
+        return asyncio.run(client.get_strings(FILE.id))
+
+    assert [s.key for s in get_strings(False)] == ["lang|a", "lang|b", "lang|c"]
+    with pytest.raises(ValidationError):
+        get_strings(True)
+
+
+def test_get_strings_reuses_cached_pages_on_304(tmp_path: Path) -> None:
+    bodies: List[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        page = request.url.params["page"]
+        if request.headers.get("If-None-Match") == f'"page-{page}"':
+            bodies.append(b"")
+            return httpx.Response(304)
+        res = httpx.Response(
+            200,
+            json={"pageCount": 2, "results": OLD_STRINGS[:2] if page == "1" else OLD_STRINGS[2:]},
+            headers={"ETag": f'"page-{page}"'},
+        )
+        bodies.append(res.content)
+        return res
+
+    def get_strings() -> List[str]:
+        client = ClientWrapper(
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+            project_id=1,
+            cache_dir=str(tmp_path),
+        )
+        return [s.key for s in asyncio.run(client.get_strings(FILE.id))]
+
+    assert get_strings() == ["lang|a", "lang|b", "lang|c"]
+    assert get_strings() == ["lang|a", "lang|b", "lang|c"]
+    assert [len(body) > 0 for body in bodies] == [True, True, False, False]
+
+
+def test_concurrent_reads_are_coalesced(tmp_path: Path) -> None:
+    paths: List[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        paths.append(request.url.path)
+        await asyncio.sleep(0.01)
+        if request.url.path.endswith("/strings"):
+            return httpx.Response(200, json={"pageCount": 1, "results": OLD_STRINGS})
+        if request.url.path.endswith("/files"):
+            return httpx.Response(200, json=[FILE.model_dump()], headers={"ETag": '"files"'})
+        return httpx.Response(200, json=FILE.model_dump())
+
+    client = ClientWrapper(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+        project_id=1,
+        cache_dir=str(tmp_path),
+    )
+
+    async def read_twice() -> None:
+        await asyncio.gather(
+            client.get_all_files(),
+            client.get_all_files(),
+            client.get_file(FILE.id),
+            client.get_file(FILE.id),
+            client.get_strings(FILE.id),
+            client.get_strings(FILE.id),
+        )
+        await client.get_all_files()
+
+    asyncio.run(read_twice())
+    assert sorted(paths) == ["/api/projects/1/files", "/api/projects/1/files/10", "/api/projects/1/strings"]
+    assert client.single_flight_stats["get_strings"] == {"hits": 1, "misses": 1, "in_flight": 0}
+    assert client.single_flight_stats["get_all_files"]["hits"] == 1
+
+
+def test_pages_waiting_for_a_slot_are_not_hedged(tmp_path: Path) -> None:
+    requests: List[int] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(int(request.url.params["page"]))
+        await asyncio.sleep(0.005)
+        return httpx.Response(200, json={"pageCount": 40, "results": []})
+
+    client = ClientWrapper(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+        project_id=1,
+        cache_dir=str(tmp_path),
+        limiter=AdaptiveLimiter("test", initial=4, maximum=4),
+    )
+    # a p95 above the server latency, only local queueing could exceed it
+    for _ in range(20):
+        client._latency_trackers["get_strings"].record(0.02)
+    asyncio.run(client.get_strings(FILE.id))
+    assert sorted(requests) == list(range(1, 41))
@@ -0,0 +1,64 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from gtnh_translation_compare.filetypes import FiletypeLang, FiletypeScript, Filetype, Language
+from gtnh_translation_compare.paratranz.client_wrapper import ClientWrapper
+from gtnh_translation_compare.paratranz.converter import Converter
+from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache
+from gtnh_translation_compare.paratranz.types import File
+
+LANG_CONTENT = "\n".join(["#comment", "a=A", "b=B", "c=C"])
+SCRIPT_CONTENT = "\n".join(
+    [
+        'val _I18N_Lang = "en_US";',
+        'val I18N_a = "A";',
+        'val I18N_b = "B<BR>B";',
+    ]
+)
+
+
+def new_converter(tmp_path: Path, file: Filetype, translations: Dict[str, str]) -> Converter:
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/files/1"):
+            return httpx.Response(
+                200,
+                json={"id": 1, "name": paratranz_file.file_name, "extra": paratranz_file.file_extra.model_dump()},
+            )
+        results: List[Dict[str, Any]] = [
+            {"id": idx, "translation": translations.get(s.key, ""), **s.model_dump(exclude={"id", "translation"})}
+            for idx, s in enumerate(paratranz_file.string_items)
+        ]
+        return httpx.Response(200, json={"pageCount": 1, "results": results})
+
+    client = ClientWrapper(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://paratranz.test/api"),
+        project_id=1,
+        cache_dir=str(tmp_path),
+    )
+    converter = Converter(client=client, cache=ParatranzCache(str(tmp_path)), target_lang=Language.zh_CN)
+    paratranz_file = asyncio.run(converter.to_paratranz_file(file))
+    return converter
+
+
+def test_to_translation_file_lang(tmp_path: Path) -> None:
+    file = FiletypeLang("resources/x/lang/en_US.lang", LANG_CONTENT)
+    converter = new_converter(tmp_path, file, {"lang|a": "甲", "lang|c": "丙"})
+    translation_file = asyncio.run(converter.to_translation_file(File(id=1, name="x", modified_at="t")))
+    assert translation_file.relpath == "resources/x/lang/zh_CN.lang"
+    assert translation_file.content == "\n".join(["#comment", "a=甲", "b=B", "c=丙"])
+
+
+def test_to_translation_file_script(tmp_path: Path) -> None:
+    file = FiletypeScript("scripts/x.zs", SCRIPT_CONTENT)
+    converter = new_converter(tmp_path, file, {"script|I18N_b": "乙<BR>乙"})
+    translation_file = asyncio.run(converter.to_translation_file(File(id=1, name="x", modified_at="t")))
+    assert translation_file.content == "\n".join(
+        [
+            'val _I18N_Lang = "zh_CN";',
+            'val I18N_a = "A";',
+            'val I18N_b = "\\u4e59<BR>\\u4e59";',
+        ]
+    )
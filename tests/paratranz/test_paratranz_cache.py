@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from gtnh_translation_compare.paratranz.file_table import FileTable
+from gtnh_translation_compare.paratranz.paratranz_cache import ParatranzCache, ResponseCache
+from gtnh_translation_compare.paratranz.types import File, TranslationFile
+
+FILE = File(id=10, name="test/zh_CN.lang.json", modified_at="2024-01-01T00:00:00.000Z")
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    translation_file = TranslationFile(relpath="resources/test/lang/zh_CN.lang", content='a=甲\r\nb="乙"\n\n')
+    for strict_validation in (False, True):
+        cache = ParatranzCache(str(tmp_path / str(strict_validation)), strict_validation=strict_validation)
+        assert cache.get(FILE) is None
+        cache.set(FILE, translation_file)
+        assert cache.has(FILE)
+        assert cache.get(FILE) == translation_file
+        assert cache.get(FILE.model_copy(update={"modified_at": "2024-01-02T00:00:00.000Z"})) is None
+
+
+def test_response_cache(tmp_path: Path) -> None:
+    cache = ResponseCache(str(tmp_path))
+    assert cache.get(1, "projects/1/strings", {"file": 1, "page": 1}) is None
+    cache.set(1, "projects/1/strings", {"file": 1, "page": 1}, '"etag"', b'{"a":\n1}')
+    assert cache.get(1, "projects/1/strings", {"page": 1, "file": 1}) == ('"etag"', b'{"a":\n1}')
+    assert cache.get(1, "projects/1/strings", {"file": 1, "page": 2}) is None
+
+
+def test_response_cache_prune(tmp_path: Path) -> None:
+    cache = ResponseCache(str(tmp_path))
+    for file_id in (1, 2, 3):
+        cache.set(file_id, f"projects/1/files/{file_id}", None, '"etag"', b"{}")
+    previous_files = FileTable([1, 2, 3], ["a", "b", "c"], ["t1", "t1", "t1"])
+
+    # without the previous list, only the responses of deleted files are known to be out of date
+    cache.prune(FileTable([1, 2], ["a", "b"], ["t1", "t2"]), None)
+    assert cache.get(2, "projects/1/files/2") is not None
+    assert cache.get(3, "projects/1/files/3") is None
+    # the responses of a file modified since the previous list are out of date
+    cache.prune(FileTable([1, 2, 4], ["a", "b", "d"], ["t1", "t2", "t1"]), previous_files)
+    assert cache.get(1, "projects/1/files/1") is not None
+    assert cache.get(2, "projects/1/files/2") is None
@@ -0,0 +1,53 @@
+import email
+import json
+
+from gtnh_translation_compare.paratranz.payload import (
+    iter_string_items_json,
+    iter_file_extra_json,
+    iter_string_json,
+    file_upload_body,
+)
+from gtnh_translation_compare.paratranz.types import StringItem, FileExtra, Property, ParatranzFile
+
+STRING_ITEMS = [StringItem(key=f"lang|k{i}", original=f'"V{i}"\n値', context=None if i % 2 else "c") for i in range(7)]
+
+
+def test_iter_string_items_json() -> None:
+    expected = [s.model_dump(exclude_none=True) for s in STRING_ITEMS]
+    for batch_size in (1, 3, 7, 100):
+        assert json.loads(b"".join(iter_string_items_json(STRING_ITEMS, batch_size))) == expected
+    assert json.loads(b"".join(iter_string_items_json([]))) == []
+
+
+def test_iter_string_json() -> None:
+    s = 'a"b\\c\n値🙂' * 5
+    assert json.loads(b"".join(iter_string_json(s, chunk_size=4))) == s
+
+
+def test_iter_file_extra_json() -> None:
+    file_extra = FileExtra(
+        original="a=A\nb=B\n" * 100,
+        properties={f"lang|k{i}": Property(key=f"k{i}", start=i, end=i + 1) for i in range(1200)},
+        en_us_relpath="resources/x/lang/en_US.lang",
+        target_relpath="resources/x/lang/zh_CN.lang",
+    )
+    assert json.loads(b"".join(iter_file_extra_json(file_extra))) == {"extra": file_extra.model_dump()}
+
+
+def test_file_upload_body() -> None:
+    paratranz_file = ParatranzFile(
+        file_name="resources/x/lang/zh_CN.lang.json",
+        file_extra=FileExtra(original="", properties={}, en_us_relpath="", target_relpath=""),
+        string_items=STRING_ITEMS,
+    )
+    body = file_upload_body(paratranz_file, fields={"path": "resources/x/lang"})
+    raw = b"".join(body)
+    # the body can be sent again on retry
+    assert b"".join(body) == raw
+
+    message = email.message_from_bytes(b"Content-Type: " + body.headers["Content-Type"].encode() + b"\r\n\r\n" + raw)
+    path_part, file_part = message.get_payload()
+    assert path_part.get_param("name", header="Content-Disposition") == "path"
+    assert path_part.get_payload() == "resources/x/lang"
+    assert file_part.get_filename() == "zh_CN.lang.json"
+    assert json.loads(file_part.get_payload(decode=True)) == [s.model_dump(exclude_none=True) for s in STRING_ITEMS]
@@ -0,0 +1,126 @@
+import asyncio
+from typing import List
+
+import httpx
+import pytest
+
+from gtnh_translation_compare.paratranz.request_policy import (
+    EndpointPolicy,
+    LatencyTracker,
+    DEFAULT_ENDPOINT_POLICIES,
+    RequestStart,
+    Send,
+    parse_endpoint_policies,
+    send_with_policy,
+)
+
+
+def sender(client: httpx.AsyncClient) -> Send:
+    async def send(start: RequestStart) -> httpx.Response:
+        start.set()
+        return await client.get("/")
+
+    return send
+
+
+def test_parse_endpoint_policies() -> None:
+    policies = parse_endpoint_policies("get_strings=timeout:20,retries:4,hedge:false; get_file=timeout:10")
+    assert policies["get_strings"] == EndpointPolicy(timeout=20, retries=4, hedge=False)
+    assert policies["get_file"] == EndpointPolicy(timeout=10)
+    assert policies["create_file"] == DEFAULT_ENDPOINT_POLICIES["create_file"]
+    # requests which create something are not retried
+    assert policies["create_file"].retries == policies["create_string"].retries == 0
+    assert parse_endpoint_policies("") == DEFAULT_ENDPOINT_POLICIES
+
+    with pytest.raises(ValueError):
+        parse_endpoint_policies("unknown=timeout:1")
+    with pytest.raises(ValueError):
+        parse_endpoint_policies("get_file=deadline:1")
+
+
+def test_retry_5xx_and_timeout() -> None:
+    calls: List[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        if len(calls) == 1:
+            raise httpx.ReadTimeout("timeout", request=request)
+        if len(calls) == 2:
+            return httpx.Response(503)
+        return httpx.Response(200)
+
+    async def run() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://test") as client:
+            return await send_with_policy(
+                sender(client), EndpointPolicy(retries=2, backoff=0), LatencyTracker(), "test"
+            )
+
+    assert asyncio.run(run()).status_code == 200
+    assert len(calls) == 3
+
+
+def test_retries_used_up() -> None:
+    async def run() -> httpx.Response:
+        transport = httpx.MockTransport(lambda _: httpx.Response(502))
+        async with httpx.AsyncClient(transport=transport, base_url="https://test") as client:
+            return await send_with_policy(
+                sender(client), EndpointPolicy(retries=1, backoff=0), LatencyTracker(), "test"
+            )
+
+    assert asyncio.run(run()).status_code == 502
+
+
+def test_hedge_slow_request() -> None:
+    calls: List[int] = []
+
+    async def handler(_: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(5)
+            return httpx.Response(200, text="slow")
+        return httpx.Response(200, text="hedged")
+
+    tracker = LatencyTracker(min_samples=3)
+    for _ in range(3):
+        tracker.record(0.01)
+
+    async def run() -> httpx.Response:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://test") as client:
+            return await send_with_policy(sender(client), EndpointPolicy(hedge=True), tracker, "test")
+
+    assert asyncio.run(run()).text == "hedged"
+    assert len(calls) == 2
+
+
+def test_no_hedge_while_queued_or_saturated() -> None:
+    calls: List[int] = []
+
+    async def handler(_: httpx.Request) -> httpx.Response:
+        calls.append(1)
+        await asyncio.sleep(0.005)
+        return httpx.Response(200)
+
+    tracker = LatencyTracker(min_samples=3)
+    for _ in range(3):
+        tracker.record(0.01)
+
+    async def run() -> None:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="https://test") as client:
+
+            async def queued(start: RequestStart) -> httpx.Response:
+                # waiting for a local slot is not counted as server latency
+                await asyncio.sleep(0.05)
+                start.set()
+                return await client.get("/")
+
+            await send_with_policy(queued, EndpointPolicy(hedge=True), tracker, "test")
+
+            async def slow(start: RequestStart) -> httpx.Response:
+                start.set()
+                await asyncio.sleep(0.05)
+                return await client.get("/")
+
+            await send_with_policy(slow, EndpointPolicy(hedge=True), tracker, "test", may_hedge=lambda: False)
+
+    asyncio.run(run())
+    assert len(calls) == 2
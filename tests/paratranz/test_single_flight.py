@@ -0,0 +1,53 @@
+import asyncio
+from typing import List
+
+import pytest
+
+from gtnh_translation_compare.paratranz.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_call() -> None:
+    calls: List[int] = []
+
+    async def fetch(key: int) -> int:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key * 10
+
+    async def run() -> List[int]:
+        flight: SingleFlight[int] = SingleFlight()
+        results = await asyncio.gather(*[flight.do(k, lambda k=k: fetch(k)) for k in (1, 1, 2, 1)])  # type: ignore
+        assert flight.stats() == {"hits": 2, "misses": 2, "in_flight": 0}
+        # finished calls are not kept
+        await flight.do(1, lambda: fetch(1))
+        assert flight.misses == 3
+        return list(results)
+
+    assert asyncio.run(run()) == [10, 10, 20, 10]
+    assert calls == [1, 2, 1]
+
+
+def test_error_and_cancellation() -> None:
+    async def fail() -> int:
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def slow() -> int:
+        await asyncio.sleep(0.01)
+        return 1
+
+    async def run() -> None:
+        flight: SingleFlight[int] = SingleFlight()
+        results = await asyncio.gather(flight.do("a", fail), flight.do("a", fail), return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+
+        # cancelling one caller leaves the shared call running for the other
+        first = asyncio.ensure_future(flight.do("b", slow))
+        second = asyncio.ensure_future(flight.do("b", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 1
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(run())
@@ -0,0 +1,35 @@
+import pytest
+
+from gtnh_translation_compare.paratranz.string_table import StringTable
+from gtnh_translation_compare.paratranz.types import StringItem
+
+
+def test_rows_and_columns() -> None:
+    table = StringTable()
+    table.extend_rows(
+        [
+            {"id": 1, "key": "a", "original": "A", "translation": "甲", "stage": 1},
+            {"id": 2, "key": "b", "original": "B"},
+        ]
+    )
+    assert table.find("b") == 1
+    assert table.find("c") is None
+    assert table.translations == ["甲", ""]
+    assert list(table) == [
+        StringItem(id=1, key="a", original="A", translation="甲", stage=1),
+        StringItem(id=2, key="b", original="B"),
+    ]
+
+    table.extend_rows([{"id": 3, "key": "c", "original": "C"}])
+    assert table.find("c") == 2
+
+    copied = StringTable.from_columns(table.to_columns())
+    assert list(copied) == list(table)
+    assert StringTable.from_items(table).to_columns() == table.to_columns()
+
+
+def test_from_columns_rejects_ragged_columns() -> None:
+    columns = StringTable.from_items([StringItem(key="a", original="A")]).to_columns()
+    columns["keys"] = []
+    with pytest.raises(ValueError):
+        StringTable.from_columns(columns)
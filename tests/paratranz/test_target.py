@@ -0,0 +1,15 @@
+import pytest
+
+from gtnh_translation_compare.filetypes import Language
+from gtnh_translation_compare.paratranz.target import Target, parse_targets
+
+
+def test_parse_targets() -> None:
+    assert parse_targets("zh_CN:1") == [Target(Language.zh_CN, 1)]
+    assert parse_targets(" zh_CN:1, ja_JP:2 ,zh_CN:1,") == [Target(Language.zh_CN, 1), Target(Language.ja_JP, 2)]
+    assert parse_targets(["ko_KR:3", "pt_BR:3"]) == [Target(Language.ko_KR, 3), Target(Language.pt_BR, 3)]
+
+    with pytest.raises(ValueError):
+        parse_targets("zh_CN")
+    with pytest.raises(ValueError):
+        parse_targets("xx_XX:1")
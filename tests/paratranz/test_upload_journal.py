@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from gtnh_translation_compare.paratranz.upload_journal import UploadJournal
+
+
+def test_upload_journal(tmp_path: Path) -> None:
+    path = str(tmp_path / "journal.jsonl")
+    journal = UploadJournal(path)
+    assert not journal.is_done("a.json", "1")
+    journal.record("a.json", "1")
+    journal.record("b.json", "2")
+
+    # a crash in the middle of writing leaves a partial last line
+    with open(path, "a") as fp:
+        fp.write('{"file_name": "c.js')
+
+    reopened = UploadJournal(path)
+    assert reopened.is_done("a.json", "1")
+    assert reopened.is_done("b.json", "2")
+    assert not reopened.is_done("a.json", "2")
+    assert not reopened.is_done("c.json", "3")
+
+    reopened.clear()
+    assert not UploadJournal(path).is_done("a.json", "1")
@@ -0,0 +1,12 @@
+from pathlib import Path
+
+from gtnh_translation_compare.filetypes.lang_reparse import parse_lang
+from gtnh_translation_compare.source.parse_state import LangParseState
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    lines = parse_lang("# comment\na=A\nb=B=B\n\nb=B2").lines
+    path = str(tmp_path / "state.bin")
+    assert LangParseState.read(path) is None
+    LangParseState("0" * 40, lines, [1, 2]).write(path)
+    assert LangParseState.read(path) == LangParseState("0" * 40, lines, [1, 2])
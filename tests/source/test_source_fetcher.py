@@ -0,0 +1,63 @@
+import asyncio
+from pathlib import Path
+from typing import List
+
+import httpx
+import pytest
+
+from gtnh_translation_compare.source.source_fetcher import SourceFetcher, is_commit_sha
+
+URL = "https://source.test/file.lang"
+
+
+def new_source_fetcher(tmp_path: Path, requests: List[httpx.Request]) -> SourceFetcher:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text="a=测试\r\n", headers={"ETag": '"v1"'})
+
+    return SourceFetcher(client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), cache_dir=str(tmp_path))
+
+
+def test_is_commit_sha() -> None:
+    assert is_commit_sha("0123456789abcdef0123456789abcdef01234567")
+    assert not is_commit_sha("master")
+    assert not is_commit_sha(None)
+
+
+def test_fetch_immutable(tmp_path: Path) -> None:
+    requests: List[httpx.Request] = []
+    source_fetcher = new_source_fetcher(tmp_path, requests)
+    assert asyncio.run(source_fetcher.fetch(URL, immutable=True)) == "a=测试\r\n"
+    assert asyncio.run(source_fetcher.fetch(URL, immutable=True)) == "a=测试\r\n"
+    assert len(requests) == 1
+
+
+def test_fetch_conditional(tmp_path: Path) -> None:
+    requests: List[httpx.Request] = []
+    source_fetcher = new_source_fetcher(tmp_path, requests)
+    assert asyncio.run(source_fetcher.fetch(URL)) == "a=测试\r\n"
+    assert asyncio.run(source_fetcher.fetch(URL)) == "a=测试\r\n"
+    assert [r.headers.get("If-None-Match") for r in requests] == [None, '"v1"']
+
+
+def test_fetch_failed(tmp_path: Path) -> None:
+    source_fetcher = SourceFetcher(
+        client=httpx.AsyncClient(transport=httpx.MockTransport(lambda _: httpx.Response(404))),
+        cache_dir=str(tmp_path),
+    )
+    with pytest.raises(ValueError):
+        asyncio.run(source_fetcher.fetch(URL))
+
+
+def test_stream(tmp_path: Path) -> None:
+    requests: List[httpx.Request] = []
+    source_fetcher = new_source_fetcher(tmp_path, requests)
+
+    async def collect() -> List[str]:
+        return [chunk async for chunk in source_fetcher.stream(URL)]
+
+    assert "".join(asyncio.run(collect())) == "a=测试\r\n"
+    assert "".join(asyncio.run(collect())) == "a=测试\r\n"
+    assert len(requests) == 2
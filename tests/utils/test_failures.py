@@ -0,0 +1,33 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from gtnh_translation_compare.utils.failures import FailureLog, FailurePolicy
+
+
+def test_failure_log(tmp_path: Path) -> None:
+    path = str(tmp_path / "failed_uploads.json")
+    assert FailureLog.read(path) is None
+
+    failure_log = FailureLog(path)
+    failure_log.record("resources/a/lang/en_US.lang", ValueError("bad"))
+    failure_log.record("scripts/b.zs", TimeoutError())
+    failure_log.mark_pending("scripts/c.zs")
+    failure_log.complete = False
+    failure_log.write()
+    with open(path, encoding="utf-8") as fp:
+        assert json.load(fp)["failed"][0] == {"file": "resources/a/lang/en_US.lang", "error": "ValueError: bad"}
+    read_back = FailureLog.read(path)
+    assert read_back is not None and not read_back.complete
+    assert read_back.files == ["resources/a/lang/en_US.lang", "scripts/b.zs", "scripts/c.zs"]
+
+    # a run without failures removes the log
+    FailureLog(path).write()
+    assert FailureLog.read(path) is None
+
+
+def test_failure_policy() -> None:
+    assert FailurePolicy.from_str("continue") == FailurePolicy.continue_
+    with pytest.raises(ValueError):
+        FailurePolicy.from_str("ignore")
@@ -1,4 +1,7 @@
-from gtnh_translation_compare.utils.line_iterator import line_iterator
+import asyncio
+from typing import AsyncIterator, List, Tuple
+
+from gtnh_translation_compare.utils.line_iterator import line_iterator, async_line_iterator
 
 
 def test_line_iterator() -> None:
@@ -10,3 +13,18 @@ def test_line_iterator() -> None:
         (2, "", 6, 6),
         (3, "测试", 7, 9),
     ]
+
+
+def test_async_line_iterator() -> None:
+    content = "\r\n".join(["", "test", "", "测试", "a\rb", ""]) + "\r"
+
+    async def chunks(size: int) -> AsyncIterator[str]:
+        for i in range(0, len(content), size):
+            yield content[i : i + size]
+
+    async def collect(size: int) -> List[Tuple[int, str, int, int]]:
+        return [item async for item in async_line_iterator(chunks(size))]
+
+    expected = list(line_iterator(content))
+    for size in range(1, len(content) + 1):
+        assert asyncio.run(collect(size)) == expected
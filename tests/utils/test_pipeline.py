@@ -0,0 +1,46 @@
+import asyncio
+from typing import Iterator, List
+
+import pytest
+
+from gtnh_translation_compare.utils.pipeline import run_pipeline
+
+
+def test_run_pipeline() -> None:
+    events: List[str] = []
+    running = 0
+    max_running = 0
+
+    def source() -> Iterator[int]:
+        for i in range(20):
+            events.append(f"produce {i}")
+            yield i
+
+    async def worker(item: int) -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        events.append(f"consume {item}")
+        running -= 1
+
+    asyncio.run(run_pipeline(source(), worker, workers=3, queue_size=2))
+
+    assert sorted(e for e in events if e.startswith("consume")) == sorted(f"consume {i}" for i in range(20))
+    assert max_running == 3
+    # scanning and processing overlap
+    assert events.index("consume 0") < events.index("produce 19")
+
+
+def test_run_pipeline_cancels_on_first_error() -> None:
+    finished: List[int] = []
+
+    async def worker(item: int) -> None:
+        if item == 0:
+            raise ValueError("failed")
+        await asyncio.sleep(0.05)
+        finished.append(item)
+
+    with pytest.raises(ValueError):
+        asyncio.run(run_pipeline(iter(range(20)), worker, workers=3, queue_size=2))
+    assert finished == []
@@ -0,0 +1,14 @@
+from gtnh_translation_compare.utils.text_splice import splice, find_all
+
+
+def test_splice() -> None:
+    assert splice("foo=bar", []) == "foo=bar"
+    assert splice("foo=bar", [(4, 7, "测试")]) == "foo=测试"
+    assert splice("a=1\nb=2\nc=3", [(2, 3, "一"), (10, 11, "三")]) == "a=一\nb=2\nc=三"
+    assert splice("abc", [(0, 0, "x"), (3, 3, "y")]) == "xabcy"
+
+
+def test_find_all() -> None:
+    assert list(find_all("abcabcab", "ab")) == [0, 3, 6]
+    assert list(find_all("aaaa", "aa")) == [0, 2]
+    assert list(find_all("abc", "d")) == []